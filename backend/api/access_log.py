@@ -0,0 +1,140 @@
+"""
+Structured access logging for the Django backend.
+
+``api.middleware.RequestLoggingMiddleware`` emits one record per request on
+the ``api.access`` logger, carrying a dict in ``record.access``::
+
+    {"request_id": "...", "method": "GET", "route": "blogpost-list",
+     "status": 200, "duration_ms": 12.4, "db_queries": 3, "db_time_ms": 1.9,
+     "size": 5120, "user_id": 7, "ip": "203.0.113.9"}
+
+``AccessLogHandler`` puts records on a bounded in-memory queue and a
+``QueueListener`` thread formats and writes them, so log I/O never runs on
+the request thread. When the queue is full records are dropped and counted
+rather than blocking the request.
+
+Successful requests are sampled with ``ACCESS_LOG_SAMPLE_RATE``; requests
+with a status of ``ACCESS_LOG_ALWAYS_STATUS`` or above, and requests slower
+than ``ACCESS_LOG_SLOW_MS``, are always logged.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+from django.conf import settings
+
+logger = logging.getLogger('api.access')
+
+
+def get_sample_rate():
+    return getattr(settings, 'ACCESS_LOG_SAMPLE_RATE', 1.0)
+
+
+def get_slow_ms():
+    return getattr(settings, 'ACCESS_LOG_SLOW_MS', 1000)
+
+
+def get_always_status():
+    return getattr(settings, 'ACCESS_LOG_ALWAYS_STATUS', 400)
+
+
+def should_log(status, duration_ms):
+    """Always keep errors and slow requests; sample the rest."""
+    if status >= get_always_status() or duration_ms >= get_slow_ms():
+        return True
+    rate = get_sample_rate()
+    return rate >= 1 or (rate > 0 and random.random() < rate)
+
+
+def log_request(access):
+    """Emit ``access`` as one structured record, subject to sampling."""
+    if not getattr(settings, 'ACCESS_LOG_ENABLED', True):
+        return
+    if not should_log(access['status'], access['duration_ms']):
+        return
+    level = logging.WARNING if access['status'] >= 500 else logging.INFO
+    logger.log(level, 'request', extra={'access': access})
+
+
+class JSONFormatter(logging.Formatter):
+    """Render a record's ``access`` dict (or its message) as one JSON line."""
+
+    def format(self, record):
+        data = getattr(record, 'access', None)
+        if data is None:
+            data = {'message': record.getMessage()}
+        data = {
+            'timestamp': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'),
+            'level': record.levelname,
+            'logger': record.name,
+            **data,
+        }
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str, separators=(',', ':'))
+
+
+class AccessLogHandler(QueueHandler):
+    """
+    Non-blocking handler: enqueue on the caller, write on a listener thread.
+
+    Writes to ``filename`` when given (reopened if rotated externally),
+    otherwise to stdout. The listener starts with the first record and is
+    stopped, after draining the queue, at interpreter exit.
+    """
+
+    def __init__(self, filename=None, max_queue=10000):
+        super().__init__(queue.Queue(maxsize=max_queue))
+        if filename:
+            target = WatchedFileHandler(filename)
+        else:
+            target = logging.StreamHandler(sys.stdout)
+        target.setFormatter(JSONFormatter())
+        self.target = target
+        self.listener = QueueListener(self.queue, target, respect_handler_level=True)
+        self.started = False
+        self.start_lock = threading.Lock()
+        self.dropped = 0
+
+    def setFormatter(self, fmt):
+        # Formatting happens on the listener thread.
+        self.target.setFormatter(fmt)
+
+    def prepare(self, record):
+        # Skip QueueHandler's eager formatting; the target handler formats.
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        if not self.started:
+            self.start()
+        super().emit(record)
+
+    def start(self):
+        with self.start_lock:
+            if not self.started:
+                self.listener.start()
+                self.started = True
+                atexit.register(self.stop)
+
+    def stop(self):
+        with self.start_lock:
+            if self.started:
+                self.listener.stop()
+                self.started = False
+
+    def close(self):
+        self.stop()
+        self.target.close()
+        super().close()
@@ -0,0 +1,258 @@
+"""
+Audit trail capture for the API and authentication views.
+
+``record()`` builds an unsaved ``AuditLog`` and appends it to an in-process
+buffer once the surrounding transaction commits (events of rolled-back
+writes are never recorded). A background writer thread drains the buffer
+with ``bulk_create``:
+
+- every ``AUDIT_FLUSH_INTERVAL`` seconds, and as soon as
+  ``AUDIT_BATCH_SIZE`` events are waiting;
+- at interpreter exit, so a worker's shutdown flushes what it holds.
+
+The buffer holds at most ``AUDIT_BUFFER_SIZE`` events. When it is full the
+recording thread writes a batch itself, so a stalled writer slows requests
+down instead of growing memory or losing events. A batch that fails to
+write is retried one event at a time, so a bad row only loses itself;
+events that still fail are logged and dropped.
+
+Events whose organization is not known from the audited object take the
+caller's tenant (``api.tenancy``); the rest are resolved from the user's
+profile at flush time, one query per batch.
+
+With ``AUDIT_FLUSH_INTERVAL = 0`` there is no writer thread: batches are
+written by the recording thread when full, or by ``flush()``.
+"""
+
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.utils import timezone
+
+from . import metrics, ratelimit, tenancy
+from .models import AuditLog, Organization, UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+def is_enabled():
+    return getattr(settings, 'AUDIT_ENABLED', True)
+
+
+def get_batch_size():
+    return getattr(settings, 'AUDIT_BATCH_SIZE', 500)
+
+
+def get_buffer_size():
+    return getattr(settings, 'AUDIT_BUFFER_SIZE', 10000)
+
+
+def get_flush_interval():
+    return getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0)
+
+
+def organization_of(instance):
+    if isinstance(instance, Organization):
+        return instance.pk
+    return getattr(instance, 'organization_id', None)
+
+
+class AuditBuffer:
+    def __init__(self):
+        self.events = deque()
+        self.lock = threading.Lock()
+        # Serializes writers so batches are written in recording order.
+        self.write_lock = threading.Lock()
+        self.writer = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def put(self, event):
+        with self.lock:
+            self.events.append(event)
+            waiting = len(self.events)
+        if waiting >= get_buffer_size():
+            # Backpressure: the recording thread pays for the write.
+            self.write_batch()
+        elif self.ensure_writer():
+            if waiting >= get_batch_size():
+                self.writer.wake.set()
+        elif waiting >= get_batch_size():
+            self.write_batch()
+
+    def take(self, limit):
+        with self.lock:
+            count = min(limit, len(self.events))
+            return [self.events.popleft() for _ in range(count)]
+
+    def write_batch(self):
+        """Write up to one batch; returns the number of events written."""
+        with self.write_lock:
+            batch = self.take(get_batch_size())
+            if not batch:
+                return 0
+            try:
+                resolve_organizations(batch)
+                with transaction.atomic():
+                    AuditLog.objects.bulk_create(batch)
+            except DatabaseError:
+                logger.warning('Audit batch of %d events failed; writing them one by one', len(batch), exc_info=True)
+                written = self.write_each(batch)
+            else:
+                written = len(batch)
+            metrics.AUDIT_EVENTS.inc('written', amount=written)
+            return written
+
+    def write_each(self, batch):
+        written = 0
+        for event in batch:
+            try:
+                with transaction.atomic():
+                    AuditLog.objects.bulk_create([event])
+            except DatabaseError:
+                logger.exception('Dropped audit event %r on %s %s', event.action, event.model_name, event.object_id)
+                metrics.AUDIT_EVENTS.inc('dropped')
+            else:
+                written += 1
+        return written
+
+    def flush(self):
+        """Write every buffered event; returns how many were written."""
+        written = 0
+        while self.events:
+            before = len(self.events)
+            written += self.write_batch()
+            if len(self.events) >= before:
+                break
+        return written
+
+    def ensure_writer(self):
+        """Start this process's writer thread if configured; whether one runs."""
+        interval = get_flush_interval()
+        if not interval:
+            return False
+        writer = self.writer
+        if writer is not None and writer.pid == os.getpid():
+            return True
+        with self.lock:
+            # A forked worker inherits the parent's (dead) thread object.
+            if self.writer is None or self.writer.pid != os.getpid():
+                self.writer = AuditWriter(self, interval)
+                self.writer.start()
+                atexit.register(self.shutdown)
+        return True
+
+    def shutdown(self):
+        if self.writer is not None:
+            self.writer.stop()
+        self.flush()
+
+
+class AuditWriter(threading.Thread):
+    """Daemon thread writing batches every interval, or when woken."""
+
+    def __init__(self, buffer, interval):
+        super().__init__(name='audit-writer', daemon=True)
+        self.buffer = buffer
+        self.interval = interval
+        self.pid = os.getpid()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            try:
+                self.buffer.flush()
+            finally:
+                connection.close_if_unusable_or_obsolete()
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+
+
+BUFFER = AuditBuffer()
+
+
+def resolve_organizations(batch):
+    user_ids = {event.user_id for event in batch if event.organization_id is None and event.user_id}
+    if not user_ids:
+        return
+    organizations = dict(
+        UserProfile.objects.filter(user_id__in=user_ids).values_list('user_id', 'organization_id')
+    )
+    for event in batch:
+        if event.organization_id is None:
+            event.organization_id = organizations.get(event.user_id)
+
+
+def record(action, request=None, instance=None, user=None, model_name=None,
+           object_id=None, organization_id=None, details=None):
+    """
+    Buffer one audit event.
+
+    ``user`` and the client IP default to those of ``request``;
+    ``model_name``, ``object_id`` and the organization to those of
+    ``instance``.
+    """
+    if not is_enabled():
+        return None
+    if user is None and request is not None:
+        user = request.user
+    if user is not None and not user.is_authenticated:
+        user = None
+    if instance is not None:
+        model_name = model_name or type(instance).__name__
+        object_id = instance.pk if object_id is None else object_id
+        if organization_id is None:
+            organization_id = organization_of(instance)
+    if organization_id is None and user is not None and request is not None and user == request.user:
+        organization_id = tenancy.get_tenant(request).organization_id
+
+    event = AuditLog(
+        user=user,
+        organization_id=organization_id,
+        action=action,
+        model_name=model_name or '',
+        object_id='' if object_id is None else str(object_id),
+        details=details or {},
+        ip_address=ratelimit.client_ip(request) if request is not None else None,
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(lambda: BUFFER.put(event))
+    return event
+
+
+def flush():
+    return BUFFER.flush()
+
+
+class AuditMixin:
+    """
+    Records create/update/delete events for a ``ModelViewSet``. Views that
+    override ``perform_create`` call ``self.audit('create', instance)``.
+    """
+
+    def audit(self, action, instance=None, **kwargs):
+        return record(action, request=self.request, instance=instance, **kwargs)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        self.audit('create', serializer.instance)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.audit('update', serializer.instance, details={'fields': sorted(serializer.validated_data)})
+
+    def perform_destroy(self, instance):
+        pk, organization_id = instance.pk, organization_of(instance)
+        super().perform_destroy(instance)
+        self.audit('delete', instance, object_id=pk, organization_id=organization_id)
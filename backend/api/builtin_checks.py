@@ -0,0 +1,95 @@
+"""
+Offline scan checks: rules over the scanned model's own metadata, with no
+network access or model artefacts needed, so results are deterministic and
+usable in tests. See ``api.scan_checks``.
+"""
+
+import re
+
+from .scan_checks import finding, register
+
+SECRET_PATTERNS = (
+    ('secret.aws-access-key', re.compile(r'\b(?:AKIA|ASIA)[0-9A-Z]{16}\b')),
+    ('secret.api-key', re.compile(r'\bsk-[A-Za-z0-9_-]{20,}\b')),
+    ('secret.private-key', re.compile(r'-----BEGIN (?:[A-Z]+ )?PRIVATE KEY-----')),
+    ('secret.password', re.compile(r'\b(?:password|passwd|pwd)\s*[:=]\s*\S+', re.IGNORECASE)),
+    ('secret.connection-string', re.compile(r'\b[a-z][a-z0-9+.-]*://[^\s:/@]+:[^\s@]+@', re.IGNORECASE)),
+)
+
+UNPINNED_VERSIONS = {'', 'latest', 'main', 'master', 'dev', 'head', 'stable', 'current'}
+RANGE_PATTERN = re.compile(r'[*^~<>]|\.x\b', re.IGNORECASE)
+
+# Capabilities that widen an LLM's prompt injection surface.
+CAPABILITY_PATTERNS = (
+    ('injection.tool-use', re.compile(r'\b(?:tool[- ]?use|function[- ]calling|plugins?|agents?)\b', re.IGNORECASE)),
+    ('injection.browsing', re.compile(r'\b(?:brows(?:e|ing)|web search|retriev(?:al|es)|RAG)\b', re.IGNORECASE)),
+    ('injection.code-execution', re.compile(r'\b(?:code (?:execution|interpreter)|shell|exec)\b', re.IGNORECASE)),
+)
+
+DOCUMENTATION_TOPICS = (
+    ('documentation.intended-use', re.compile(r'\bintended use\b', re.IGNORECASE), 'intended use'),
+    ('documentation.limitations', re.compile(r'\blimitations?\b', re.IGNORECASE), 'limitations'),
+    ('documentation.training-data', re.compile(r'\btraining data\b', re.IGNORECASE), 'training data'),
+)
+
+MIN_DESCRIPTION_LENGTH = 200
+
+
+@register('embedded-secrets', scan_types=('vulnerability', 'penetration'), executor='process')
+def embedded_secrets(model):
+    """Credentials pasted into the model description."""
+    findings = []
+    for number, line in enumerate(model['description'].splitlines(), 1):
+        for rule_id, pattern in SECRET_PATTERNS:
+            if pattern.search(line):
+                findings.append(finding(
+                    rule_id, 'critical', 'Credential-like value in the model description',
+                    f'description:{number}',
+                ))
+    return findings
+
+
+@register('lifecycle-status', scan_types=('vulnerability', 'compliance'))
+def lifecycle_status(model):
+    if model['status'] == 'deprecated':
+        return [finding('lifecycle.deprecated', 'high', 'Deprecated model is still registered for scanning', 'status')]
+    if model['status'] == 'inactive':
+        return [finding('lifecycle.inactive', 'low', 'Inactive model is still registered for scanning', 'status')]
+    return []
+
+
+@register('version-pinning', scan_types=('vulnerability', 'compliance'))
+def version_pinning(model):
+    version = model['version'].strip()
+    if version.lower() in UNPINNED_VERSIONS or RANGE_PATTERN.search(version):
+        return [finding(
+            'version.unpinned', 'medium', f'Version "{version}" does not identify a single model build', 'version',
+        )]
+    if not re.search(r'\d', version):
+        return [finding('version.unversioned', 'low', f'Version "{version}" has no version number', 'version')]
+    return []
+
+
+@register('prompt-injection-surface', scan_types=('penetration',))
+def prompt_injection_surface(model):
+    if model['model_type'] != 'llm':
+        return []
+    return [
+        finding(rule_id, 'medium', 'Capability exposes the model to indirect prompt injection', 'description')
+        for rule_id, pattern in CAPABILITY_PATTERNS if pattern.search(model['description'])
+    ]
+
+
+@register('documentation', scan_types=('compliance',))
+def documentation(model):
+    description = model['description']
+    findings = []
+    if len(description.strip()) < MIN_DESCRIPTION_LENGTH:
+        findings.append(finding(
+            'documentation.too-short', 'low',
+            f'Description is shorter than {MIN_DESCRIPTION_LENGTH} characters', 'description',
+        ))
+    for rule_id, pattern, topic in DOCUMENTATION_TOPICS:
+        if not pattern.search(description):
+            findings.append(finding(rule_id, 'info', f'Description does not cover {topic}', 'description'))
+    return findings
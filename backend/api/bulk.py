@@ -0,0 +1,203 @@
+"""
+Set-based bulk operations on an organization's security incidents.
+
+Every operation works on ids of the caller's organization only, in chunks
+small enough for the backend's bound-parameter limit. Each chunk runs in its
+own transaction: its rows are locked, checked, changed with one statement,
+and the daily rollups and organization statistics are adjusted by the
+chunk's net counts (``api.signals`` is suspended meanwhile), so a failure
+leaves earlier chunks applied and consistent.
+
+Operations return ``(summary, results)``: counts per outcome and one
+``{'id': ..., 'result': ...}`` entry per requested id, in request order.
+
+Status transitions follow ``TRANSITIONS``. Entering ``resolved`` or
+``closed`` stamps ``resolved_at`` (kept when moving between the two);
+reopening clears it. Incidents created resolved or closed are stamped too.
+Single-incident writes through ``SecurityIncidentSerializer`` follow the
+same rules.
+"""
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from . import rollups, signals, statistics
+from .models import SecurityIncident
+
+TRANSITIONS = {
+    'open': {'investigating', 'resolved', 'closed'},
+    'investigating': {'open', 'resolved', 'closed'},
+    'resolved': {'open', 'investigating', 'closed'},
+    'closed': {'open'},
+}
+RESOLVED_STATUSES = {'resolved', 'closed'}
+
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+INVALID_TRANSITION = 'invalid_transition'
+DELETED = 'deleted'
+
+
+def get_chunk_size():
+    size = getattr(settings, 'INCIDENT_BULK_CHUNK_SIZE', 1000)
+    limit = connection.features.max_query_params
+    if limit:
+        # Leave room for the statement's other parameters.
+        size = min(size, limit - 50)
+    return size
+
+
+def chunked(ids, size=None):
+    size = size or get_chunk_size()
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def unique(ids):
+    return list(dict.fromkeys(ids))
+
+
+def can_transition(current, new):
+    return new in TRANSITIONS.get(current, ())
+
+
+def _results(ids, outcomes):
+    results = [{'id': pk, 'result': outcomes.get(pk, NOT_FOUND)} for pk in ids]
+    return Counter(result['result'] for result in results), results
+
+
+def _group_counts(queryset):
+    """``[(organization, day, severity, status, count)]`` of ``queryset``'s rows."""
+    return [
+        (row['organization_id'], row['day'], row['severity'], row['status'], row['total'])
+        for row in queryset.order_by().annotate(day=TruncDate('created_at')).values(
+            'organization_id', 'day', 'severity', 'status'
+        ).annotate(total=Count('pk'))
+    ]
+
+
+def _scaled(organization_id, severity, status, count):
+    incident = SecurityIncident(organization_id=organization_id, severity=severity, status=status)
+    fields = statistics.incident_contribution(incident)[organization_id]
+    return {field: amount * count for field, amount in fields.items()}
+
+
+def _apply_derived(groups, new_status=None, removed=False):
+    """Move ``groups`` to ``new_status``, or out of the counters when ``removed``."""
+    deltas = Counter()
+    before = defaultdict(Counter)
+    after = defaultdict(Counter)
+    for organization_id, day, severity, status, count in groups:
+        deltas[(organization_id, day, severity, status)] -= count
+        before[organization_id].update(_scaled(organization_id, severity, status, count))
+        if not removed:
+            deltas[(organization_id, day, severity, new_status)] += count
+            after[organization_id].update(_scaled(organization_id, severity, new_status, count))
+    rollups.apply(deltas)
+    if statistics.is_materialized():
+        statistics.apply_change(before, after)
+
+
+def transition(organization_id, ids, new_status):
+    """Move incidents to ``new_status`` where ``TRANSITIONS`` allows it."""
+    ids = unique(ids)
+    outcomes = {}
+    now = timezone.now()
+    sources = [status for status, targets in TRANSITIONS.items() if new_status in targets]
+    if new_status in RESOLVED_STATUSES:
+        resolved_at = Coalesce(F('resolved_at'), Value(now))
+    else:
+        resolved_at = None
+
+    for chunk in chunked(ids):
+        with transaction.atomic(), signals.suspended():
+            incidents = SecurityIncident.objects.filter(organization_id=organization_id, pk__in=chunk)
+            current = dict(incidents.select_for_update().values_list('pk', 'status'))
+            movable = []
+            for pk, status in current.items():
+                if status == new_status:
+                    outcomes[pk] = UNCHANGED
+                elif can_transition(status, new_status):
+                    outcomes[pk] = UPDATED
+                    movable.append(pk)
+                else:
+                    outcomes[pk] = INVALID_TRANSITION
+            if not movable:
+                continue
+            targets = SecurityIncident.objects.filter(pk__in=movable, status__in=sources)
+            groups = _group_counts(targets)
+            targets.update(status=new_status, updated_at=now, resolved_at=resolved_at)
+            _apply_derived(groups, new_status=new_status)
+    return _results(ids, outcomes)
+
+
+def assign(organization_id, ids, assignee):
+    """Assign incidents to ``assignee`` (``None`` unassigns)."""
+    ids = unique(ids)
+    outcomes = {}
+    now = timezone.now()
+    assignee_id = assignee.pk if assignee is not None else None
+    for chunk in chunked(ids):
+        with transaction.atomic():
+            incidents = SecurityIncident.objects.filter(organization_id=organization_id, pk__in=chunk)
+            current = dict(incidents.select_for_update().values_list('pk', 'assigned_to_id'))
+            changed = [pk for pk, assigned_to_id in current.items() if assigned_to_id != assignee_id]
+            outcomes.update((pk, UNCHANGED) for pk in current)
+            outcomes.update((pk, UPDATED) for pk in changed)
+            if changed:
+                SecurityIncident.objects.filter(pk__in=changed).update(assigned_to=assignee, updated_at=now)
+    return _results(ids, outcomes)
+
+
+def delete(organization_id, ids):
+    """Delete incidents."""
+    ids = unique(ids)
+    outcomes = {}
+    for chunk in chunked(ids):
+        with transaction.atomic(), signals.suspended():
+            incidents = SecurityIncident.objects.filter(organization_id=organization_id, pk__in=chunk)
+            found = list(incidents.select_for_update().values_list('pk', flat=True))
+            if not found:
+                continue
+            groups = _group_counts(SecurityIncident.objects.filter(pk__in=found))
+            SecurityIncident.objects.filter(pk__in=found).delete()
+            _apply_derived(groups, removed=True)
+            outcomes.update((pk, DELETED) for pk in found)
+    return _results(ids, outcomes)
+
+
+def create(organization_id, reporter, items):
+    """
+    Insert validated incident field dicts with ``bulk_create``, one chunk per
+    transaction. Returns the created incidents in input order.
+    """
+    created = []
+    now = timezone.now()
+    for chunk in chunked(items):
+        incidents = [
+            SecurityIncident(organization_id=organization_id, reported_by=reporter, **fields)
+            for fields in chunk
+        ]
+        for incident in incidents:
+            if incident.status in RESOLVED_STATUSES and incident.resolved_at is None:
+                incident.resolved_at = now
+        with transaction.atomic():
+            incidents = SecurityIncident.objects.bulk_create(incidents)
+            groups = Counter(
+                (organization_id, rollups.day_of(incident.created_at), incident.severity, incident.status)
+                for incident in incidents
+            )
+            rollups.apply(groups)
+            if statistics.is_materialized():
+                after = defaultdict(Counter)
+                for (_, _, severity, status), count in groups.items():
+                    after[organization_id].update(_scaled(organization_id, severity, status, count))
+                statistics.apply_change({}, after)
+        created.extend(incidents)
+    return created
@@ -0,0 +1,23 @@
+"""
+Whether the default cache is shared by every worker process.
+
+Invalidation through the cache (response-cache generations, cached tenants)
+only reaches the process that made the change when the backend keeps its
+data in process memory (``LocMemCache``, ``DummyCache``). Under gunicorn's
+several workers the others would keep serving stale entries, so features
+relying on it stay off with such a backend, unless ``CACHE_SINGLE_PROCESS``
+says a single process serves every request (the development server, tests).
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias='default'):
+    if getattr(settings, 'CACHE_SINGLE_PROCESS', False):
+        return True
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
@@ -0,0 +1,132 @@
+"""
+Conditional GET support for DRF viewsets.
+
+Validators are derived from the database before anything is serialized:
+
+- ``retrieve``: the object's ``updated_at`` (and ``version`` when the model
+  has one), fetched with a single ``values()`` query.
+- ``list``: the ``pk`` and ``updated_at`` of the rows on the requested
+  page, fetched through the viewset's paginator as a ``values()`` query,
+  combined with the full request URL so pagination, filters and ordering
+  each get their own validator. With keyset pagination this is one
+  ``LIMIT`` query on the list's own index and no ``COUNT(*)``; a total the
+  page reports (page-number pagination, ``?count=true``) is included, so
+  deletions elsewhere in the collection are caught too.
+
+If the client's ``If-None-Match``/``If-Modified-Since`` matches, the view
+answers ``304 Not Modified`` without running the serializer.
+
+Rows that embed related objects (organization and model names, usernames)
+list the related lookups in ``validator_fields``; their values are part of
+both validators, so renaming an organization changes the ETag of every
+incident that shows it. Viewsets can also override ``get_validator_state``
+to describe their state differently (the content app uses its cache
+generations).
+"""
+
+import hashlib
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+class ConditionalGetMixin:
+    """Answer conditional ``list``/``retrieve`` requests with 304 when possible."""
+    last_modified_field = 'updated_at'
+    # Related lookups whose values appear in the representation.
+    validator_fields = ()
+
+    def get_last_modified_field(self):
+        model = self.get_queryset().model
+        field_names = {field.name for field in model._meta.get_fields()}
+        if self.last_modified_field in field_names:
+            return self.last_modified_field
+        if 'created_at' in field_names:
+            return 'created_at'
+        return None
+
+    def get_object_state(self):
+        field = self.get_last_modified_field()
+        if field is None:
+            return None
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        has_version = any(f.name == 'version' for f in queryset.model._meta.get_fields())
+        columns = ['pk', field, *self.validator_fields] + (['version'] if has_version else [])
+        row = queryset.filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        ).values(*columns).first()
+        if row is None:
+            return None
+        return row[field], [row[column] for column in columns]
+
+    def get_collection_state(self):
+        field = self.get_last_modified_field()
+        if field is None:
+            return None
+        columns = ['pk', field, *self.validator_fields]
+        paginator = self.paginator
+        if paginator is not None and getattr(paginator, 'keyset_field', None):
+            columns.append(paginator.keyset_field)
+        columns = list(dict.fromkeys(columns))
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*columns)
+        rows = self.paginate_queryset(queryset)
+        if rows is None:
+            rows = list(queryset)
+        last_modified = max((row[field] for row in rows if row[field] is not None), default=None)
+        parts = [self.get_collection_total()]
+        parts.extend(row[column] for row in rows for column in columns)
+        return last_modified, parts
+
+    def get_collection_total(self):
+        """The total the paginator reports for the current page, if any."""
+        paginator = getattr(self.paginator, 'fallback', None) or self.paginator
+        page = getattr(paginator, 'page', None)
+        if hasattr(page, 'paginator'):
+            return page.paginator.count
+        return getattr(paginator, 'count', None)
+
+    def get_validator_state(self):
+        """Return ``(last_modified, [etag parts])`` or ``None`` to skip."""
+        if self.action == 'retrieve':
+            return self.get_object_state()
+        return self.get_collection_state()
+
+    def get_validators(self, request):
+        """Return ``(etag, last_modified_timestamp)`` or ``None``."""
+        state = self.get_validator_state()
+        if state is None:
+            return None
+        last_modified, parts = state
+        raw = '|'.join(str(part) for part in [
+            request.get_full_path(),
+            last_modified.isoformat() if last_modified else '',
+            *parts,
+        ])
+        etag = quote_etag(hashlib.sha256(raw.encode()).hexdigest()[:32])
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return etag, timestamp
+
+    def conditional(self, request, handler, *args, **kwargs):
+        validators = None
+        if request.method in ('GET', 'HEAD'):
+            validators = self.get_validators(request)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        response = not_modified if not_modified is not None else handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, super().retrieve, *args, **kwargs)
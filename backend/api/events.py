@@ -0,0 +1,314 @@
+"""
+In-process event bus for live updates.
+
+Every process has one ``EventBus``. Event streams (``api.streams``)
+subscribe to topics, ``org:<id>`` for an organization and ``scan:<id>`` for
+one scan, and the bus fans each event out to the matching subscriptions
+in memory. Publishers call ``publish()``; once the surrounding transaction
+commits, the event goes to the ``EVENT_BUS_BACKEND``:
+
+- ``local`` (default): delivered to this process's bus only. Enough for
+  tests, development and single-process servers; events published by scan
+  worker processes do not reach the web processes.
+- ``postgres``: ``NOTIFY`` on the ``EVENT_BUS_CHANNEL`` channel. Each process
+  keeps one ``LISTEN`` connection, from a background thread, and feeds the
+  notifications to its bus. However many streams are open, a process costs
+  one idle connection and no polling.
+
+Published events:
+
+- ``scan.status``: a scan was created or changed state
+  (``api.scan_queue``, or a save through the ORM);
+- ``scan.progress``: a check of a running scan finished (``api.scan_checks``);
+- ``incident.created`` / ``incident.updated`` / ``incident.deleted``, and
+  ``incident.bulk`` once per bulk operation.
+
+An event is ``{'type', 'organization_id', 'scan_id', 'time', 'data'}``.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more.
+MAX_NOTIFY_BYTES = 7900
+
+
+def is_enabled():
+    return getattr(settings, 'EVENTS_ENABLED', True)
+
+
+def get_buffer_size():
+    return getattr(settings, 'EVENT_STREAM_BUFFER', 1000)
+
+
+def organization_topic(organization_id):
+    return f'org:{organization_id}'
+
+
+def scan_topic(scan_id):
+    return f'scan:{scan_id}'
+
+
+def topics_of(event):
+    topics = [organization_topic(event['organization_id'])]
+    if event.get('scan_id') is not None:
+        topics.append(scan_topic(event['scan_id']))
+    return topics
+
+
+class Subscription:
+    """The events of a set of topics for one stream, buffered in a queue."""
+
+    def __init__(self, bus, topics, maxsize=None):
+        self.bus = bus
+        self.topics = tuple(topics)
+        self.queue = self.make_queue(maxsize or get_buffer_size())
+        # Set when events were dropped because the stream fell behind.
+        self.overflowed = False
+
+    def make_queue(self, maxsize):
+        return queue.Queue(maxsize)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """The next event, or ``None`` after ``timeout`` seconds."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+    """A subscription read from an asyncio event loop."""
+
+    def __init__(self, bus, topics, maxsize=None, loop=None):
+        self.loop = loop or asyncio.get_running_loop()
+        super().__init__(bus, topics, maxsize)
+
+    def make_queue(self, maxsize):
+        return asyncio.Queue(maxsize)
+
+    def put(self, event):
+        self.put_all(self.loop, [self], event)
+
+    @staticmethod
+    def put_all(loop, subscriptions, event):
+        """Queue ``event`` for ``subscriptions`` of ``loop`` with one loop callback."""
+        try:
+            loop.call_soon_threadsafe(AsyncSubscription._put_all, subscriptions, event)
+        except RuntimeError:
+            # The loop is closed; its streams are gone.
+            for subscription in subscriptions:
+                subscription.close()
+
+    @staticmethod
+    def _put_all(subscriptions, event):
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.overflowed = True
+
+    def wake(self):
+        """Make a pending ``get()`` return ``None`` now."""
+        self.put(None)
+
+    async def get(self, timeout):
+        try:
+            # Events already queued need no timer.
+            return self.queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscriptions = defaultdict(set)
+
+    def subscribe(self, topics, subscription_class=Subscription, **kwargs):
+        subscription = subscription_class(self, topics, **kwargs)
+        with self.lock:
+            for topic in subscription.topics:
+                self.subscriptions[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            for topic in subscription.topics:
+                subscribers = self.subscriptions.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self.subscriptions[topic]
+
+    def subscriber_count(self):
+        with self.lock:
+            return len(set().union(*self.subscriptions.values()))
+
+    def dispatch(self, event):
+        with self.lock:
+            targets = set()
+            for topic in topics_of(event):
+                targets.update(self.subscriptions.get(topic, ()))
+        loops = defaultdict(list)
+        for subscription in targets:
+            if isinstance(subscription, AsyncSubscription):
+                loops[subscription.loop].append(subscription)
+            else:
+                subscription.put(event)
+        for loop, subscriptions in loops.items():
+            AsyncSubscription.put_all(loop, subscriptions, event)
+
+
+class LocalBackend:
+    def __init__(self, bus):
+        self.bus = bus
+
+    def start(self):
+        pass
+
+    def publish(self, event):
+        self.bus.dispatch(event)
+
+
+class PostgresBackend:
+    """``NOTIFY`` to publish; one ``LISTEN`` connection per process to receive."""
+
+    def __init__(self, bus):
+        self.bus = bus
+        self.channel = getattr(settings, 'EVENT_BUS_CHANNEL', 'api_events')
+
+    def start(self):
+        threading.Thread(target=self.listen, name='event-listener', daemon=True).start()
+
+    def publish(self, event):
+        payload = json.dumps(event, cls=DjangoJSONEncoder)
+        if len(payload.encode()) > MAX_NOTIFY_BYTES:
+            # Subscribers get the event without its data and can refetch.
+            event = {**event, 'data': {'id': event['data'].get('id'), 'truncated': True}}
+            payload = json.dumps(event, cls=DjangoJSONEncoder)
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [self.channel, payload])
+
+    def listen(self):
+        while True:
+            wrapper = connections.create_connection('default')
+            try:
+                wrapper.ensure_connection()
+                raw = wrapper.connection
+                raw.autocommit = True
+                raw.execute(f'LISTEN {self.channel}')
+                # psycopg 3: blocks until the next notification.
+                for notification in raw.notifies():
+                    try:
+                        self.bus.dispatch(json.loads(notification.payload))
+                    except (ValueError, KeyError):
+                        logger.warning('Ignoring malformed event on %s', self.channel)
+            except Exception:
+                logger.exception('Event listener failed; reconnecting')
+                time.sleep(1)
+            finally:
+                wrapper.close()
+
+
+BACKENDS = {'local': LocalBackend, 'postgres': PostgresBackend}
+
+_bus = None
+_backend = None
+_pid = None
+_lock = threading.Lock()
+
+
+def get_bus():
+    """This process's bus, with its backend started."""
+    global _bus, _backend, _pid
+    if _pid != os.getpid():
+        with _lock:
+            # A forked worker starts its own bus and listener.
+            if _pid != os.getpid():
+                _bus = EventBus()
+                name = getattr(settings, 'EVENT_BUS_BACKEND', 'local')
+                _backend = BACKENDS[name](_bus)
+                _backend.start()
+                _pid = os.getpid()
+    return _bus
+
+
+def subscribe(topics, subscription_class=Subscription, **kwargs):
+    return get_bus().subscribe(topics, subscription_class, **kwargs)
+
+
+def publish(event_type, organization_id, data, scan_id=None):
+    """Publish an event once the current transaction commits."""
+    if not is_enabled() or organization_id is None:
+        return
+    event = {
+        'type': event_type,
+        'organization_id': organization_id,
+        'scan_id': scan_id,
+        'time': timezone.now().isoformat(),
+        'data': json.loads(json.dumps(data, cls=DjangoJSONEncoder)),
+    }
+    get_bus()
+    transaction.on_commit(lambda: _deliver(event))
+
+
+def _deliver(event):
+    try:
+        _backend.publish(event)
+    except Exception:
+        # Live updates are best effort; the write itself has committed.
+        logger.exception('Could not publish %s event', event['type'])
+
+
+def scan_organization_id(scan):
+    if scan.target_model_id is None:
+        return None
+    if type(scan).target_model.is_cached(scan):
+        return scan.target_model.organization_id
+    from .models import AIModel
+    return AIModel.objects.filter(pk=scan.target_model_id).values_list('organization_id', flat=True).first()
+
+
+def scan_status(scan_id, organization_id, status, **data):
+    publish('scan.status', organization_id, {'id': scan_id, 'status': status, **data}, scan_id=scan_id)
+
+
+def scan_progress(scan_id, organization_id, **data):
+    publish('scan.progress', organization_id, {'id': scan_id, **data}, scan_id=scan_id)
+
+
+def incident_changed(action, incident):
+    publish(f'incident.{action}', incident.organization_id, {
+        'id': incident.pk,
+        'title': incident.title,
+        'severity': incident.severity,
+        'status': incident.status,
+        'assigned_to': incident.assigned_to_id,
+    })
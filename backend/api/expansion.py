@@ -0,0 +1,156 @@
+"""
+Field selection and expansion for the ``api`` serializers.
+
+Related objects render compactly by default, as their id and display name
+(``CompactRelatedField``). Relations listed in a serializer's
+``Meta.expandable_fields`` can be rendered in full instead:
+
+- ``?expand=affected_model,affected_model.organization`` expands relations,
+  nested ones with dotted paths;
+- ``?fields=id,title,affected_model.name`` keeps only the listed fields
+  (dotted paths select inside expanded relations).
+
+Fields listed in ``Meta.list_deferred_fields`` (bulky ones) are left out of
+list responses, and not loaded, unless selected with ``?fields=``.
+
+Unknown names are rejected with a 400. ``ExpandableQuerysetMixin`` derives
+the ``select_related`` / ``prefetch_related`` lookups from the same
+parameters, so a page renders in a fixed number of queries.
+"""
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_paths(value):
+    """``'a,b.c'`` -> ``{'a': {}, 'b': {'c': {}}}``."""
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for part in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(part, {})
+    return tree
+
+
+def request_paths(request, param):
+    """The parsed ``param`` query parameter, or ``None`` when absent or empty."""
+    if request is None:
+        return None
+    return parse_paths(request.query_params.get(param, '')) or None
+
+
+class CompactRelatedField(serializers.Field):
+    """A related object as ``{'id': ..., <display_field>: ...}`` (read only)."""
+
+    def __init__(self, display_field='name', **kwargs):
+        kwargs['read_only'] = True
+        self.display_field = display_field
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return {'id': value.pk, self.display_field: getattr(value, self.display_field)}
+
+
+class ExpandableSerializerMixin:
+    """
+    Applies ``fields`` / ``expand`` (path trees, see ``parse_paths``) to a
+    model serializer. The top-level serializer reads them from the request;
+    nested ones receive them from their parent.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and expand is None:
+            request = self.context.get('request')
+            fields = request_paths(request, 'fields')
+            expand = request_paths(request, 'expand')
+        self.selected_fields = fields
+        self.expanded_fields = expand or {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, 'expandable_fields', {})
+        unknown = sorted(set(self.expanded_fields) - set(expandable))
+        if unknown:
+            raise ValidationError({'expand': [f'Cannot expand: {", ".join(unknown)}']})
+        selected = self.selected_fields
+        if selected is not None:
+            unknown = sorted(set(selected) - set(fields))
+            if unknown:
+                raise ValidationError({'fields': [f'Unknown fields: {", ".join(unknown)}']})
+
+        for name, nested in self.expanded_fields.items():
+            if selected is None or name in selected:
+                fields[name] = expandable[name](
+                    read_only=True, fields=(selected or {}).get(name) or None, expand=nested
+                )
+        if selected is not None:
+            fields = {name: field for name, field in fields.items() if name in selected}
+        elif isinstance(self.parent, serializers.ListSerializer):
+            for name in getattr(self.Meta, 'list_deferred_fields', ()):
+                fields.pop(name, None)
+        return fields
+
+
+def related_lookups(serializer_class, fields=None, expand=None, prefix=''):
+    """``(select_related, prefetch_related)`` lookups for rendering ``serializer_class``."""
+    serializer = serializer_class(fields=fields, expand=expand or {})
+    model = serializer.Meta.model
+    select, prefetch = [], []
+    for field in serializer.fields.values():
+        related = isinstance(field, (CompactRelatedField, serializers.RelatedField, serializers.ManyRelatedField))
+        if not (related or isinstance(field, ExpandableSerializerMixin)):
+            continue
+        if field.source == '*' or '.' in field.source:
+            continue
+        model_field = model._meta.get_field(field.source)
+        lookup = prefix + field.source
+        many = model_field.many_to_many or model_field.one_to_many
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and not many:
+            # Rendered from the local ``<name>_id`` column.
+            continue
+        (prefetch if many else select).append(lookup)
+        if isinstance(field, ExpandableSerializerMixin):
+            nested_select, nested_prefetch = related_lookups(
+                type(field), field.selected_fields, field.expanded_fields, lookup + '__'
+            )
+            if many:
+                prefetch.extend(nested_select)
+            else:
+                select.extend(nested_select)
+            prefetch.extend(nested_prefetch)
+    return select, prefetch
+
+
+def optimize(queryset, serializer_class, request=None):
+    """``queryset`` with the joins and prefetches ``serializer_class`` needs for ``request``."""
+    select, prefetch = related_lookups(
+        serializer_class, request_paths(request, 'fields'), request_paths(request, 'expand')
+    )
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class ExpandableQuerysetMixin:
+    """
+    Applies ``optimize()`` for the view's serializer to ``get_queryset()``,
+    and defers its ``list_deferred_fields`` in lists that leave them out.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer_class = self.get_serializer_class()
+        if not issubclass(serializer_class, ExpandableSerializerMixin):
+            return queryset
+        if getattr(self, 'action', None) == 'list':
+            selected = request_paths(self.request, 'fields')
+            deferred = [
+                name for name in getattr(serializer_class.Meta, 'list_deferred_fields', ())
+                if selected is None or name not in selected
+            ]
+            if deferred:
+                queryset = queryset.defer(*deferred)
+        return optimize(queryset, serializer_class, self.request)
@@ -0,0 +1,280 @@
+"""
+Read-only fast path for hot list endpoints.
+
+``get_plan(serializer_class)`` walks a serializer's fields once and compiles
+them into a ``Plan``: the ``values()`` columns the representation needs and
+row builders producing the same dicts, key for key and in the same order, as
+``to_representation``. Plain fields still format through their own
+``to_representation``, so the JSON is byte-identical; only the model
+instances and per-field attribute lookups are skipped. Many-to-many
+relations cost one query per relation and page, keyed by the owning row.
+
+Compiled fields:
+
+- model fields, including file and image fields;
+- ``PrimaryKeyRelatedField`` (single or ``many``) and ``CompactRelatedField``;
+- nested model serializers on forward foreign keys and many-to-many fields;
+- ``SerializerMethodField`` listed in the serializer's ``fast_method_fields``
+  (field name -> column, usually an annotation of the list queryset);
+- fields implementing ``fast_path(prefix, model)`` -> ``(columns, build)``;
+  a ``build`` with a ``load(rows, state)`` method is loaded once per page,
+  like a many-to-many relation.
+
+Any other field makes the plan ``None`` and the view keeps the regular
+serializer. ``FastListMixin`` serves ``list`` through the plan while
+``FAST_SERIALIZATION_ENABLED`` is on.
+"""
+
+import functools
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .expansion import CompactRelatedField, ExpandableSerializerMixin, parse_paths
+
+
+class Unsupported(Exception):
+    """A field the fast path cannot build from ``values()`` rows."""
+
+
+def is_enabled():
+    return getattr(settings, 'FAST_SERIALIZATION_ENABLED', True)
+
+
+def model_field(model, source):
+    """The concrete model field behind a serializer ``source``."""
+    *path, name = source.split('.')
+    try:
+        for part in path:
+            model = model._meta.get_field(part).related_model
+            if model is None:
+                raise Unsupported(source)
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        raise Unsupported(source)
+    if not field.concrete:
+        raise Unsupported(source)
+    return field
+
+
+class ManyRelation:
+    """A many-to-many field loaded for a whole page in one query."""
+
+    def __init__(self, field, owner_column):
+        through = field.remote_field.through
+        self.owner = field.m2m_field_name()
+        self.target = field.m2m_reverse_field_name()
+        self.owner_column = owner_column
+        self.queryset = through._default_manager.all()
+        # The order the related manager (and so the serializer) sees.
+        self.ordering = [
+            f'-{self.target}__{name[1:]}' if name.startswith('-') else f'{self.target}__{name}'
+            for name in field.related_model._meta.ordering if isinstance(name, str)
+        ] + ['pk']
+        self.plan = Plan()
+
+    def load(self, rows, state):
+        ids = {row[self.owner_column] for row in rows} - {None}
+        grouped = defaultdict(list)
+        if ids:
+            related = list(
+                self.queryset.filter(**{f'{self.owner}__in': ids})
+                .order_by(*self.ordering).values(self.owner, *self.plan.columns)
+            )
+            self.plan.load(related, state)
+            for row in related:
+                grouped[row[self.owner]].append(self.build(row, state))
+        state[self] = grouped
+
+    def build(self, row, state):
+        raise NotImplementedError
+
+    def __call__(self, row, state):
+        return state[self].get(row[self.owner_column], [])
+
+
+class PrimaryKeyRelation(ManyRelation):
+    def __init__(self, field, owner_column):
+        super().__init__(field, owner_column)
+        self.column = self.plan.column(self.target)
+
+    def build(self, row, state):
+        return row[self.column]
+
+
+class NestedRelation(ManyRelation):
+    def __init__(self, field, owner_column, serializer):
+        super().__init__(field, owner_column)
+        self.builders = self.plan.compile(serializer, f'{self.target}__')
+
+    def build(self, row, state):
+        return {key: build(row, state) for key, build in self.builders}
+
+
+class Plan:
+    """``values()`` columns plus row builders for one serializer."""
+
+    def __init__(self):
+        self.columns = []
+        self.relations = []
+        self.builders = []
+
+    def column(self, lookup):
+        if lookup not in self.columns:
+            self.columns.append(lookup)
+        return lookup
+
+    def values(self, queryset, *extra):
+        return queryset.values(*dict.fromkeys([*extra, *self.columns]))
+
+    def load(self, rows, state):
+        for relation in self.relations:
+            relation.load(rows, state)
+
+    def render(self, rows, context=None):
+        """The serializer's ``many=True`` output for ``values()`` ``rows``."""
+        rows = list(rows)
+        state = {'request': (context or {}).get('request')}
+        self.load(rows, state)
+        builders = self.builders
+        return [{key: build(row, state) for key, build in builders} for row in rows]
+
+    def compile(self, serializer, prefix=''):
+        """``[(key, build(row, state))]`` for ``serializer``'s readable fields."""
+        model = serializer.Meta.model
+        method_columns = getattr(serializer, 'fast_method_fields', {})
+        builders = []
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            if hasattr(field, 'fast_path'):
+                columns, build = field.fast_path(prefix, model)
+                for column in columns:
+                    self.column(column)
+                if hasattr(build, 'load'):
+                    self.relations.append(build)
+            elif isinstance(field, serializers.SerializerMethodField):
+                if name not in method_columns:
+                    raise Unsupported(name)
+                build = self.raw(prefix + method_columns[name])
+            else:
+                build = self.compile_field(field, model, prefix)
+            builders.append((name, build))
+        return builders
+
+    def compile_field(self, field, model, prefix):
+        source = field.source
+        if source == '*':
+            raise Unsupported(field.field_name)
+        target = model_field(model, source)
+        lookup = prefix + source.replace('.', '__')
+
+        if isinstance(field, serializers.ListSerializer) or isinstance(field, serializers.ManyRelatedField):
+            if not target.many_to_many:
+                raise Unsupported(source)
+            owner = self.column(prefix + model._meta.pk.attname)
+            if isinstance(field, serializers.ManyRelatedField):
+                if not isinstance(field.child_relation, serializers.PrimaryKeyRelatedField):
+                    raise Unsupported(source)
+                relation = PrimaryKeyRelation(target, owner)
+            else:
+                if not isinstance(field.child, serializers.ModelSerializer):
+                    raise Unsupported(source)
+                relation = NestedRelation(target, owner, field.child)
+            self.relations.append(relation)
+            return relation
+
+        if target.many_to_many:
+            raise Unsupported(source)
+        if isinstance(field, serializers.ModelSerializer):
+            if not target.is_relation:
+                raise Unsupported(source)
+            key = self.column(lookup)
+            nested = self.compile(field, lookup + '__')
+            return lambda row, state: None if row[key] is None else {
+                name: build(row, state) for name, build in nested
+            }
+        if isinstance(field, CompactRelatedField):
+            key = self.column(lookup)
+            display = self.column(f'{lookup}__{field.display_field}')
+            return lambda row, state: None if row[key] is None else {
+                'id': row[key], field.display_field: row[display],
+            }
+        if isinstance(field, serializers.PrimaryKeyRelatedField):
+            if field.pk_field is not None:
+                raise Unsupported(source)
+            return self.raw(lookup)
+        if isinstance(field, serializers.RelatedField) or target.is_relation:
+            raise Unsupported(source)
+        if isinstance(field, serializers.FileField):
+            return self.file(field, target, lookup)
+
+        key = self.column(lookup)
+        to_representation = field.to_representation
+
+        def build(row, state):
+            value = row[key]
+            return None if value is None else to_representation(value)
+        return build
+
+    def raw(self, lookup):
+        key = self.column(lookup)
+        return lambda row, state: row[key]
+
+    def file(self, field, target, lookup):
+        key = self.column(lookup)
+        use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+        # serializers.FileField.to_representation, from the stored name.
+        def build(row, state):
+            name = row[key]
+            if not name:
+                return None
+            if not use_url:
+                return name
+            url = target.storage.url(name)
+            request = state['request']
+            return request.build_absolute_uri(url) if request is not None else url
+        return build
+
+
+@functools.lru_cache(maxsize=256)
+def get_plan(serializer_class, fields='', expand=''):
+    """The compiled plan of ``serializer_class``, or ``None`` if unsupported."""
+    if issubclass(serializer_class, ExpandableSerializerMixin):
+        serializer = serializer_class(fields=parse_paths(fields) or None, expand=parse_paths(expand))
+    else:
+        serializer = serializer_class()
+    plan = Plan()
+    try:
+        plan.builders = plan.compile(serializer)
+    except Unsupported:
+        return None
+    return plan
+
+
+class FastListMixin:
+    """Serve ``list`` from ``values()`` rows through the serializer's plan."""
+
+    def get_fast_plan(self):
+        if not is_enabled():
+            return None
+        params = self.request.query_params
+        return get_plan(self.get_serializer_class(), params.get('fields', ''), params.get('expand', ''))
+
+    def list(self, request, *args, **kwargs):
+        plan = self.get_fast_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+        keyset_field = getattr(self.paginator, 'keyset_field', None)
+        extra = ('pk', keyset_field) if keyset_field else ()
+        queryset = plan.values(self.filter_queryset(self.get_queryset()), *extra)
+        context = self.get_serializer_context()
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(plan.render(page, context))
+        return Response(plan.render(queryset, context))
@@ -0,0 +1,49 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import partitions
+
+
+class Command(BaseCommand):
+    help = 'Export audit log months past the retention period to gzipped JSON lines, then drop them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retention-months', type=int, default=getattr(settings, 'AUDIT_RETENTION_MONTHS', 12),
+            help='Full months to keep besides the current one',
+        )
+        parser.add_argument(
+            '--output-dir', default=getattr(settings, 'AUDIT_ARCHIVE_DIR', ''),
+            help='Directory receiving auditlog-YYYY-MM.jsonl.gz files',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Only list the months to archive')
+
+    def handle(self, *args, **options):
+        if options['retention_months'] < 0:
+            raise CommandError('--retention-months must not be negative')
+        directory = options['output_dir']
+        if not directory and not options['dry_run']:
+            raise CommandError('Set --output-dir or AUDIT_ARCHIVE_DIR')
+
+        now = timezone.now()
+        cutoff = partitions.add_months(partitions.month_start(now), -options['retention_months'])
+        months = partitions.expired_months(cutoff)
+        if options['dry_run']:
+            for month in months:
+                self.stdout.write(f'Would archive {month:%Y-%m}')
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        for month in months:
+            path, count = partitions.archive_month(month, directory)
+            if path is None:
+                self.stdout.write(f'Dropped empty month {month:%Y-%m}')
+            else:
+                self.stdout.write(f'Archived {count} rows from {month:%Y-%m} to {path}')
+        created = partitions.ensure_partitions(now, getattr(settings, 'AUDIT_PARTITIONS_AHEAD', 3))
+        self.stdout.write(self.style.SUCCESS(
+            f'Archived {len(months)} months; created {len(created)} partitions'
+        ))
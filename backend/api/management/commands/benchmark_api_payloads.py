@@ -0,0 +1,138 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.expansion import optimize
+from api.middleware import QueryCounter
+from api.models import AIModel, Organization, SecurityIncident, SecurityScan
+from api.serializers import SecurityIncidentSerializer, SecurityScanSerializer
+
+
+# The representations before compact relations: every relation nested in
+# full, users with all their columns.
+class LegacyUserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = '__all__'
+
+
+class LegacyOrganizationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Organization
+        fields = '__all__'
+
+
+class LegacyAIModelSerializer(serializers.ModelSerializer):
+    organization = LegacyOrganizationSerializer(read_only=True)
+
+    class Meta:
+        model = AIModel
+        fields = '__all__'
+
+
+class LegacyIncidentSerializer(serializers.ModelSerializer):
+    organization = LegacyOrganizationSerializer(read_only=True)
+    affected_model = LegacyAIModelSerializer(read_only=True)
+    reported_by = LegacyUserSerializer(read_only=True)
+    assigned_to = LegacyUserSerializer(read_only=True)
+
+    class Meta:
+        model = SecurityIncident
+        fields = '__all__'
+
+
+class LegacyScanSerializer(serializers.ModelSerializer):
+    target_model = LegacyAIModelSerializer(read_only=True)
+    created_by = LegacyUserSerializer(read_only=True)
+
+    class Meta:
+        model = SecurityScan
+        fields = '__all__'
+
+
+INCIDENT_MODES = (
+    ('legacy', LegacyIncidentSerializer, None),
+    ('compact', SecurityIncidentSerializer, {}),
+    ('fields', SecurityIncidentSerializer, {'fields': 'id,title,severity,status,created_at'}),
+    ('expanded', SecurityIncidentSerializer, {
+        'expand': 'organization,affected_model.organization,reported_by,assigned_to',
+    }),
+)
+SCAN_MODES = (
+    ('legacy', LegacyScanSerializer, None),
+    ('compact', SecurityScanSerializer, {}),
+    ('expanded', SecurityScanSerializer, {'expand': 'target_model.organization,created_by'}),
+)
+
+
+class Command(BaseCommand):
+    help = 'Compare payload size, queries and render time of the incident and scan lists per representation'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            organization = self.populate(rows)
+            incidents = SecurityIncident.objects.filter(organization=organization).order_by('-created_at')
+            scans = SecurityScan.objects.filter(target_model__organization=organization).order_by('-created_at')
+            self.stdout.write(f'{rows} rows per page')
+            for label, queryset, modes in (('incidents', incidents, INCIDENT_MODES), ('scans', scans, SCAN_MODES)):
+                for name, serializer_class, params in modes:
+                    self.measure(f'{label} {name}', queryset, serializer_class, params, rows, options['repeat'])
+            transaction.set_rollback(True)
+
+    def populate(self, rows):
+        organization = Organization.objects.create(name='Payload benchmark', description='x' * 200)
+        users = [User.objects.create_user(f'payload-benchmark-{n}', password='x') for n in range(5)]
+        models = [
+            AIModel.objects.create(
+                organization=organization, name=f'Model {n}', model_type='llm',
+                version='1.0', description='y' * 200,
+            )
+            for n in range(10)
+        ]
+        SecurityIncident.objects.bulk_create(
+            SecurityIncident(
+                organization=organization, affected_model=models[n % 10], reported_by=users[n % 5],
+                assigned_to=users[(n + 1) % 5], title=f'Incident {n}', description='z' * 200, severity='low',
+            )
+            for n in range(rows)
+        )
+        SecurityScan.objects.bulk_create(
+            SecurityScan(
+                scan_type='vulnerability', target_model=models[n % 10], created_by=users[n % 5],
+                findings={'issues': n},
+            )
+            for n in range(rows)
+        )
+        return organization
+
+    def measure(self, label, queryset, serializer_class, params, rows, repeat):
+        if params is None:
+            context = {}
+        else:
+            request = Request(APIRequestFactory().get('/', params))
+            queryset = optimize(queryset, serializer_class, request)
+            context = {'request': request}
+        timings = []
+        for _ in range(repeat):
+            queries = QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(queries):
+                payload = JSONRenderer().render(
+                    serializer_class(queryset.all()[:rows], many=True, context=context).data
+                )
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stdout.write(
+            f'{label:>20}: {len(payload) / rows:7.0f} bytes/row, {queries.count:4d} queries, '
+            f'{min(timings):7.1f} ms'
+        )
@@ -0,0 +1,67 @@
+import statistics
+import time
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from api import audit
+from api.models import AuditLog, Organization, SecurityIncident, UserProfile
+
+MODES = (
+    ('off', {'AUDIT_ENABLED': False}),
+    # One INSERT per event on the request thread.
+    ('synchronous', {'AUDIT_ENABLED': True, 'AUDIT_BATCH_SIZE': 1, 'AUDIT_FLUSH_INTERVAL': 0}),
+    ('buffered', {'AUDIT_ENABLED': True}),
+)
+
+
+class Command(BaseCommand):
+    help = 'Measure the request latency cost of audit capture on incident updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(f'audit-bench-{suffix}', password=uuid.uuid4().hex)
+        organization = Organization.objects.create(name=f'Audit benchmark {suffix}')
+        UserProfile.objects.create(user=user, organization=organization, role='admin')
+        incident = SecurityIncident.objects.create(
+            organization=organization, title='Benchmark', description='', severity='low'
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+        url = reverse('incident-detail', args=[incident.pk])
+        # Views bind their throttle classes at import; measure without them.
+        unthrottled = mock.patch.object(APIView, 'get_throttles', return_value=[])
+
+        try:
+            for name, overrides in MODES:
+                with unthrottled, override_settings(ACCESS_LOG_ENABLED=False, **overrides):
+                    timings = []
+                    for n in range(total):
+                        started = time.perf_counter()
+                        client.patch(url, {'title': f'Benchmark {n}'}, format='json')
+                        timings.append((time.perf_counter() - started) * 1000)
+                    started = time.perf_counter()
+                    audit.flush()
+                    drained = (time.perf_counter() - started) * 1000
+                timings.sort()
+                self.stdout.write(
+                    f'{name:>11}: mean {statistics.mean(timings):.2f} ms, '
+                    f'p95 {timings[int(len(timings) * 0.95)]:.2f} ms, '
+                    f'final flush {drained:.1f} ms'
+                )
+            written = AuditLog.objects.filter(organization=organization).count()
+            self.stdout.write(f'audit rows written: {written} (expected {2 * total})')
+        finally:
+            AuditLog.objects.filter(organization=organization).delete()
+            organization.delete()
+            user.delete()
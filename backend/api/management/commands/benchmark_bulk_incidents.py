@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api import bulk, rollups
+from api.middleware import QueryCounter
+from api.models import Organization, SecurityIncident
+
+
+class Command(BaseCommand):
+    help = 'Time the bulk incident operations on one large id list (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incidents', type=int, default=100_000)
+        parser.add_argument('--days', type=int, default=90)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            organization_id, ids = self.populate(options['incidents'], options['days'])
+            assignee = User.objects.create_user('bulk-benchmark')
+            self.stdout.write(f'{len(ids)} ids, chunks of {bulk.get_chunk_size()}')
+            self.measure('transition open -> investigating',
+                         bulk.transition, organization_id, ids, 'investigating')
+            self.measure('assign', bulk.assign, organization_id, ids, assignee)
+            self.measure('transition -> resolved', bulk.transition, organization_id, ids, 'resolved')
+            self.measure('delete', bulk.delete, organization_id, ids)
+            transaction.set_rollback(True)
+
+    def populate(self, total, days):
+        organization = Organization.objects.create(name='Bulk benchmark organization')
+        severities = [value for value, _ in SecurityIncident.SEVERITY_CHOICES]
+        now = timezone.now()
+        ids = []
+        for start in range(0, total, 10_000):
+            created = SecurityIncident.objects.bulk_create(
+                SecurityIncident(
+                    title=f'Incident {n}', description='', organization=organization,
+                    severity=severities[n % 4],
+                )
+                for n in range(start, min(start + 10_000, total))
+            )
+            SecurityIncident.objects.filter(
+                pk__gte=created[0].pk, pk__lte=created[-1].pk
+            ).update(created_at=now - timedelta(days=days * start / total))
+            ids.extend(incident.pk for incident in created)
+        rollups.rebuild(organization.pk)
+        return organization.pk, ids
+
+    def measure(self, label, operation, *args):
+        queries = QueryCounter()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            summary, _ = operation(*args)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'{label}: {elapsed:.2f}s, {queries.count} queries, {dict(summary)}'
+        )
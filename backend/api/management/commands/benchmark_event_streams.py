@@ -0,0 +1,71 @@
+import asyncio
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from api import events
+from api.streams import EventStream
+
+# Not a real organization: publishing and fan-out never touch its row.
+ORGANIZATION_ID = 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Open thousands of event streams in one event loop, publish events to their organization, '
+        'and report fan-out latency and the queries run meanwhile'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--streams', default='100,1000,5000', help='Comma-separated stream counts')
+        parser.add_argument('--events', type=int, default=200)
+        parser.add_argument('--interval-ms', type=float, default=2.0, help='Time between published events')
+
+    def handle(self, *args, **options):
+        with override_settings(EVENTS_ENABLED=True, EVENT_BUS_BACKEND='local'):
+            for count in (int(value) for value in options['streams'].split(',')):
+                with CaptureQueriesContext(connection) as queries:
+                    latencies, elapsed, publish_queries = asyncio.run(self.measure(count, options))
+                quantiles = statistics.quantiles(latencies, n=100)
+                self.stdout.write(
+                    f'{count:5d} streams: {len(latencies)} deliveries in {elapsed:6.2f} s '
+                    f'({len(latencies) / elapsed:8.0f}/s), latency p50 {quantiles[49]:6.2f} ms, '
+                    f'p99 {quantiles[98]:6.2f} ms, max {max(latencies):6.2f} ms, {len(queries) + publish_queries} queries'
+                )
+
+    async def measure(self, count, options):
+        topic = events.organization_topic(ORGANIZATION_ID)
+        streams = [EventStream(events.subscribe([topic], events.AsyncSubscription)) for _ in range(count)]
+        latencies = []
+
+        async def consume(stream):
+            for _ in range(options['events']):
+                event = await stream.subscription.get(30)
+                if event is None:
+                    break
+                stream.chunk(event)
+                latencies.append((time.perf_counter() - event['data']['sent']) * 1000)
+
+        def publish():
+            # Publishers are synchronous code (views, scan workers) in their own thread.
+            with CaptureQueriesContext(connection) as queries:
+                for number in range(options['events']):
+                    # Outside a transaction, so delivered at once.
+                    events.publish('benchmark', ORGANIZATION_ID, {'number': number, 'sent': time.perf_counter()})
+                    time.sleep(options['interval_ms'] / 1000)
+            connection.close()
+            return len(queries)
+
+        consumers = [asyncio.ensure_future(consume(stream)) for stream in streams]
+        started = time.perf_counter()
+        try:
+            publish_queries = await asyncio.get_running_loop().run_in_executor(None, publish)
+            await asyncio.gather(*consumers)
+        finally:
+            for stream in streams:
+                stream.subscription.close()
+        return latencies, time.perf_counter() - started, publish_queries
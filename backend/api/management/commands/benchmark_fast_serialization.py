@@ -0,0 +1,92 @@
+import statistics
+import time
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from api.models import AIModel, Organization, SecurityIncident, UserProfile
+from content_app.models import BlogPost, CaseStudy, Category, Client, Tag
+
+ENDPOINTS = ('blogpost-list', 'casestudy-list', 'incident-list')
+
+
+class Command(BaseCommand):
+    help = 'Compare list throughput with and without the values() fast path (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page')
+        parser.add_argument('--requests', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            user = self.populate(rows)
+            client = APIClient()
+            client.force_authenticate(user)
+            # Views bind their throttle classes at import; measure without them.
+            unthrottled = mock.patch.object(APIView, 'get_throttles', return_value=[])
+            settings = {'ACCESS_LOG_ENABLED': False, 'CONTENT_RESPONSE_CACHE_ENABLED': False}
+            for name in ENDPOINTS:
+                results = {}
+                for enabled in (False, True):
+                    with unthrottled, override_settings(FAST_SERIALIZATION_ENABLED=enabled, **settings):
+                        results[enabled] = self.measure(client, reverse(name), rows, options['requests'])
+                (slow, expected), (fast, content) = results[False], results[True]
+                identical = 'identical' if content == expected else 'OUTPUT DIFFERS'
+                self.stdout.write(
+                    f'{name:>15}: serializer {slow:6.1f} ms, fast path {fast:6.1f} ms '
+                    f'({slow / fast:.1f}x, {1000 / fast:.0f} pages/s), {len(content)} bytes {identical}'
+                )
+            transaction.set_rollback(True)
+
+    def populate(self, rows):
+        suffix = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(f'fast-bench-{suffix}', password=uuid.uuid4().hex)
+        organization = Organization.objects.create(name=f'Fast path benchmark {suffix}')
+        UserProfile.objects.create(user=user, organization=organization, role='admin')
+        model = AIModel.objects.create(
+            organization=organization, name='Model', model_type='llm', version='1', description='d'
+        )
+        SecurityIncident.objects.bulk_create(
+            SecurityIncident(
+                organization=organization, affected_model=model, reported_by=user,
+                title=f'Incident {n}', description='x' * 200, severity='low',
+            )
+            for n in range(rows)
+        )
+
+        categories = [Category.objects.create(name=f'Bench {suffix} {n}', slug=f'bench-{suffix}-{n}') for n in range(3)]
+        tags = [Tag.objects.create(name=f'Bench {suffix} {n}', slug=f'bench-{suffix}-{n}') for n in range(3)]
+        acme = Client.objects.create(name=f'Bench client {suffix}')
+        published = timezone.now() - timezone.timedelta(hours=1)
+        for n in range(rows):
+            post = BlogPost.objects.create(
+                title=f'Bench post {n}', slug=f'bench-post-{suffix}-{n}', content='<p>x</p>',
+                author=user, is_published=True, published_at=published, status='published',
+            )
+            post.categories.set(categories)
+            post.tags.set(tags)
+            study = CaseStudy.objects.create(
+                title=f'Bench study {n}', slug=f'bench-study-{suffix}-{n}', content='<p>x</p>',
+                client=acme, industry=categories[0], is_published=True, published_at=published,
+                status='published',
+            )
+            study.categories.set(categories)
+            study.tags.set(tags)
+        return user
+
+    def measure(self, client, url, rows, total):
+        timings = []
+        for _ in range(total):
+            started = time.perf_counter()
+            response = client.get(url, {'page_size': rows})
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), response.content
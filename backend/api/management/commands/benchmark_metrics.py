@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+from api import metrics
+from api.middleware import RequestLoggingMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request overhead of metrics recording'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--routes', type=int, default=50)
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        routes = options['routes']
+        records = [
+            {
+                'route': f'route-{n % routes}', 'method': 'GET', 'status': 200,
+                'duration_ms': (n % 300) / 10, 'db_queries': 3, 'db_time_ms': 0.4,
+            }
+            for n in range(total)
+        ]
+
+        started = time.perf_counter()
+        for record in records:
+            metrics.observe_request(record)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'observe_request(): {elapsed / total * 1e6:.2f} us/request')
+
+        started = time.perf_counter()
+        text = metrics.exposition()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'exposition of {text.count(chr(10))} lines: {elapsed * 1000:.1f} ms'
+        )
+
+        factory = RequestFactory()
+        middleware = RequestLoggingMiddleware(lambda request: HttpResponse('ok'))
+        for enabled in (False, True):
+            with override_settings(METRICS_ENABLED=enabled, ACCESS_LOG_ENABLED=False):
+                started = time.perf_counter()
+                for _ in range(total):
+                    middleware(factory.get('/api/v1/health/'))
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'middleware, metrics {"on" if enabled else "off"} (incl. RequestFactory): '
+                f'{elapsed / total * 1e6:.1f} us/request'
+            )
+        metrics.REGISTRY.reset()
@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.urls import resolve
+
+from api import ratelimit
+from api.middleware import RateLimitMiddleware
+
+
+class Command(BaseCommand):
+    help = 'Measure the per-request overhead of the rate limiter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=500)
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        clients = options['clients']
+        policy = ratelimit.Policy('benchmark', limit=10 ** 9, period=60)
+
+        for name, store_class in ratelimit.STORES.items():
+            store = store_class()
+            started = time.perf_counter()
+            for n in range(total):
+                ratelimit.check(policy, f'ip:10.0.{n % clients}.1', store=store)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'check() with {name} store: {elapsed / total * 1e6:.1f} us/request'
+            )
+
+        factory = RequestFactory()
+        middleware = RateLimitMiddleware(lambda request: None)
+        policies = {'contact-api': {'rate': '1000000000/minute', 'methods': ['POST']}}
+        for store_name in ratelimit.STORES:
+            with override_settings(RATE_LIMIT_STORE=store_name, RATE_LIMIT_POLICIES=policies):
+                ratelimit.reset_store()
+                started = time.perf_counter()
+                for n in range(total):
+                    request = factory.post('/api/v1/contact/', REMOTE_ADDR=f'10.1.{n % clients}.1')
+                    request.resolver_match = resolve('/api/v1/contact/')
+                    middleware.process_view(request, None, (), {})
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f'middleware ({store_name} store, incl. RequestFactory): '
+                f'{elapsed / total * 1e6:.1f} us/request'
+            )
+        ratelimit.reset_store()
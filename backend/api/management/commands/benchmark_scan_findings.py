@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from api import scan_findings
+from api.middleware import QueryCounter
+from api.models import AIModel, Organization, SecurityScan, UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        'Store synthetic scan findings as rows, then compare a scan list page carrying every '
+        'finding inline (the former layout) with the default list and the findings endpoint '
+        '(rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scans', type=int, default=20)
+        parser.add_argument('--findings', type=int, default=5000, help='Findings per scan')
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            client, scans, items = self.populate(options['scans'], options['findings'])
+            list_url = reverse('securityscan-list')
+            findings_url = reverse('securityscan-findings', args=[scans[0].pk])
+
+            # The former layout: every finding in the scan's JSON, rendered in lists.
+            for scan in scans:
+                SecurityScan.objects.filter(pk=scan.pk).update(findings={'findings': items[scan.pk]})
+            self.measure(client, 'inline findings', list_url, {'fields': 'id,status,findings'}, options['repeat'])
+            for scan in scans:
+                SecurityScan.objects.filter(pk=scan.pk).update(findings={})
+
+            self.measure(client, 'scan list', list_url, {}, options['repeat'])
+            self.measure(client, 'findings page', findings_url, {}, options['repeat'])
+            self.measure(client, 'critical findings', findings_url, {'severity': 'critical'}, options['repeat'])
+            self.measure(client, 'one rule', findings_url, {'rule_id': 'rule.7'}, options['repeat'])
+            transaction.set_rollback(True)
+
+    def populate(self, count, per_scan):
+        organization = Organization.objects.create(name='Benchmark organization')
+        user = User.objects.create_user(username='findings-benchmark')
+        UserProfile.objects.create(user=user, organization=organization, role='admin')
+        model = AIModel.objects.create(name='model', model_type='llm', version='1', organization=organization)
+        rng = random.Random(0)
+        scans, items = [], {}
+        started = time.perf_counter()
+        for _ in range(count):
+            scan = SecurityScan.objects.create(scan_type='custom', target_model=model, status='completed')
+            items[scan.pk] = [
+                {
+                    'check': 'benchmark', 'rule_id': f'rule.{rng.randrange(50)}',
+                    'severity': rng.choice(scan_findings.SEVERITIES),
+                    'message': 'Synthetic finding for benchmarking', 'location': f'file.py:{n}',
+                }
+                for n in range(per_scan)
+            ]
+            rows = scan_findings.prepare(items[scan.pk])
+            SecurityScan.objects.filter(pk=scan.pk).update(**scan_findings.counts(rows))
+            scan_findings.store(scan.pk, rows)
+            scans.append(scan)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Stored {count * per_scan} findings in {elapsed:.1f}s ({count * per_scan / elapsed:.0f}/s)')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client, scans, items
+
+    def measure(self, client, label, url, params, repeat):
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            response = client.get(url, params)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            client.get(url, params)
+        elapsed = (time.perf_counter() - started) / repeat
+        self.stdout.write(
+            f'{label}: {elapsed * 1000:.1f} ms/request, {len(response.content) / 1024:.0f} KiB, '
+            f'{queries.count} queries, status {response.status_code}'
+        )
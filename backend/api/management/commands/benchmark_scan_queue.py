@@ -0,0 +1,83 @@
+import io
+import statistics
+import time
+import uuid
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.utils import timezone
+
+from api.models import AIModel, Organization, SecurityScan
+
+WORK_SECONDS = 0.0
+
+
+def simulated_scan(scan, job):
+    if WORK_SECONDS:
+        time.sleep(WORK_SECONDS)
+        job.check()
+    return {'issues': 0}
+
+
+class Command(BaseCommand):
+    help = (
+        'Queue thousands of scans and drain them with run_scan_worker at several pool sizes '
+        '(rows are committed so worker processes see them, and deleted afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scans', type=int, default=2000)
+        parser.add_argument('--processes', default='1,2,4', help='Comma-separated pool sizes')
+        parser.add_argument('--batch', type=int, default=1)
+        parser.add_argument('--work-ms', type=float, default=0.0, help='Simulated time per scan')
+
+    def handle(self, *args, **options):
+        global WORK_SECONDS
+        WORK_SECONDS = options['work_ms'] / 1000
+        organization = Organization.objects.create(name=f'Scan queue benchmark {uuid.uuid4().hex[:8]}')
+        model = AIModel.objects.create(
+            organization=organization, name='Model', model_type='llm', version='1', description='d'
+        )
+        self.stdout.write(
+            f'{connection.vendor}, {options["scans"]} scans, batch {options["batch"]}, '
+            f'{options["work_ms"]:g} ms of work per scan'
+        )
+        try:
+            for processes in (int(value) for value in options['processes'].split(',')):
+                self.measure(model, processes, options)
+        finally:
+            organization.delete()
+
+    def measure(self, model, processes, options):
+        total = options['scans']
+        SecurityScan.objects.filter(target_model=model).delete()
+        queued_at = timezone.now()
+        SecurityScan.objects.bulk_create(
+            SecurityScan(scan_type='vulnerability', target_model=model, status='queued', queued_at=queued_at)
+            for _ in range(total)
+        )
+        runner = f'{__name__}.simulated_scan'
+        started = time.perf_counter()
+        with override_settings(SCAN_RUNNER=runner, METRICS_ENABLED=False):
+            call_command(
+                'run_scan_worker', processes=processes, batch=options['batch'], burst=True,
+                poll_interval=0.05, stdout=io.StringIO(),
+            )
+        elapsed = time.perf_counter() - started
+
+        scans = SecurityScan.objects.filter(target_model=model)
+        completed = scans.filter(status='completed').count()
+        waits = sorted(
+            (started_at - queued).total_seconds() * 1000
+            for queued, started_at in scans.filter(started_at__isnull=False).values_list('queued_at', 'started_at')
+        )
+        quantiles = statistics.quantiles(waits, n=100) if len(waits) > 1 else waits * 99
+        duplicates = scans.filter(attempts__gt=1).count()
+        self.stdout.write(
+            f'{processes:2d} processes: {completed}/{total} completed in {elapsed:6.2f} s '
+            f'({completed / elapsed:7.0f} scans/s), queue wait p50 {quantiles[49]:7.0f} ms, '
+            f'p95 {quantiles[94]:7.0f} ms, max {waits[-1] if waits else 0:7.0f} ms, '
+            f'{duplicates} claimed twice'
+        )
@@ -0,0 +1,83 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from api import scan_stats
+from api.middleware import QueryCounter
+from api.models import AIModel, Organization, SecurityScan
+from api.rollups import DASHBOARD_RANGES
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare scan statistics from the scans table and from the daily rollups '
+        'on a synthetic scan history (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scans', type=int, default=500_000)
+        parser.add_argument('--history-days', type=int, default=365)
+        parser.add_argument('--window', type=int, default=90, choices=DASHBOARD_RANGES)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            organization = self.populate(options['scans'], options['history_days'])
+            for use_rollups in (False, True):
+                with override_settings(SCAN_STATS_ROLLUPS=use_rollups):
+                    if use_rollups:
+                        started = time.perf_counter()
+                        rows = scan_stats.rebuild(organization.pk)
+                        self.stdout.write(f'Rebuilt {rows} rollup rows in {time.perf_counter() - started:.1f}s')
+                    self.measure(organization, options['window'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def populate(self, total, days):
+        organization = Organization.objects.create(name='Benchmark organization')
+        models = AIModel.objects.bulk_create(
+            AIModel(name=f'model-{n}', model_type='llm', version='1', description='', organization=organization)
+            for n in range(20)
+        )
+        scan_types = [value for value, _ in SecurityScan.SCAN_TYPES]
+        rng = random.Random(0)
+        batch_size = 10_000
+        batches = max(1, -(-total // batch_size))
+        now = timezone.now()
+        started = time.perf_counter()
+        for batch in range(batches):
+            count = min(batch_size, total - batch * batch_size)
+            created_at = now - timedelta(days=days * batch / batches)
+            scans = []
+            for n in range(count):
+                status = 'failed' if n % 20 == 0 else 'completed'
+                milliseconds = int(rng.lognormvariate(9, 1))
+                scans.append(SecurityScan(
+                    scan_type=scan_types[n % 4], target_model=models[n % 20], status=status,
+                    started_at=created_at, completed_at=created_at + timedelta(milliseconds=milliseconds),
+                    duration_ms=milliseconds,
+                ))
+            created = SecurityScan.objects.bulk_create(scans)
+            # Spread the history evenly over the last ``days`` days.
+            SecurityScan.objects.filter(pk__gte=created[0].pk, pk__lte=created[-1].pk).update(created_at=created_at)
+        self.stdout.write(f'Inserted {total} scans in {time.perf_counter() - started:.1f}s')
+        return organization
+
+    def measure(self, organization, window, repeat):
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            data = scan_stats.get_statistics(organization.pk, window)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            scan_stats.get_statistics(organization.pk, window)
+        elapsed = (time.perf_counter() - started) / repeat
+        p50 = data['durations_by_type'][0]['p50_ms']
+        self.stdout.write(
+            f'{data["source"]}: {elapsed * 1000:.1f} ms/request, {queries.count} queries, '
+            f'{data["total_scans"]} scans in {window} days, first p50 {p50} ms'
+        )
+
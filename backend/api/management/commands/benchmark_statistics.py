@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from api import statistics
+from api.middleware import QueryCounter
+from api.models import AIModel, Organization, SecurityIncident, SecurityScan
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the aggregate and materialized organization statistics on a '
+        'synthetic incident history (rolled back afterwards)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incidents', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=730)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            organization = self.populate(options['incidents'], options['days'])
+            for materialized in (False, True):
+                with override_settings(ORGANIZATION_STATS_MATERIALIZED=materialized):
+                    if materialized:
+                        statistics.rebuild(organization.pk)
+                    self.measure(organization, options['repeat'], materialized)
+            transaction.set_rollback(True)
+
+    def populate(self, total, days):
+        organization = Organization.objects.create(name='Benchmark organization')
+        models = AIModel.objects.bulk_create(
+            AIModel(
+                name=f'model-{n}', model_type='llm', version='1',
+                description='', organization=organization,
+            )
+            for n in range(10)
+        )
+        SecurityScan.objects.bulk_create(
+            SecurityScan(scan_type='vulnerability', target_model=models[n % 10],
+                         status='running' if n % 4 == 0 else 'completed')
+            for n in range(100)
+        )
+
+        severities = [value for value, _ in SecurityIncident.SEVERITY_CHOICES]
+        statuses = [value for value, _ in SecurityIncident.STATUS_CHOICES]
+        batch_size = 10_000
+        batches = max(1, -(-total // batch_size))
+        now = timezone.now()
+        started = time.perf_counter()
+        for batch in range(batches):
+            count = min(batch_size, total - batch * batch_size)
+            created = SecurityIncident.objects.bulk_create(
+                SecurityIncident(
+                    title=f'Incident {n}', description='', organization=organization,
+                    severity=severities[n % 4], status=statuses[n % 4],
+                )
+                for n in range(count)
+            )
+            # Spread the history evenly over the last ``days`` days.
+            SecurityIncident.objects.filter(
+                pk__gte=created[0].pk, pk__lte=created[-1].pk
+            ).update(created_at=now - timedelta(days=days * batch / batches))
+        self.stdout.write(
+            f'Inserted {total} incidents in {time.perf_counter() - started:.1f}s'
+        )
+        return organization
+
+    def measure(self, organization, repeat, materialized):
+        queries = QueryCounter()
+        with connection.execute_wrapper(queries):
+            statistics.get_statistics(organization)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            statistics.get_statistics(organization)
+        elapsed = (time.perf_counter() - started) / repeat
+        mode = 'materialized' if materialized else 'aggregate'
+        self.stdout.write(
+            f'{mode}: {elapsed * 1000:.1f} ms/request, {queries.count} queries'
+        )
@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api import partitions
+
+
+class Command(BaseCommand):
+    help = 'Create the monthly audit log partitions for the coming months (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead', type=int, default=getattr(settings, 'AUDIT_PARTITIONS_AHEAD', 3),
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            self.stdout.write('The audit log table is not partitioned on this database; nothing to do')
+            return
+        created = partitions.ensure_partitions(timezone.now(), options['months_ahead'])
+        for name in created:
+            self.stdout.write(f'Created {name}')
+        self.stdout.write(self.style.SUCCESS(f'{len(created)} partitions created'))
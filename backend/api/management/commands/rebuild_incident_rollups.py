@@ -0,0 +1,18 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from api.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Backfill or repair the daily incident rollups from the incidents table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--organization', type=int, help='Only this organization id')
+        parser.add_argument('--since', type=date.fromisoformat, help='First day (YYYY-MM-DD)')
+        parser.add_argument('--until', type=date.fromisoformat, help='Last day (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        rows = rebuild(options['organization'], options['since'], options['until'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {rows} rollup rows'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Organization
+from api.statistics import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the materialized statistics row of every organization'
+
+    def add_arguments(self, parser):
+        parser.add_argument('organization_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        organization_ids = options['organization_ids'] or list(
+            Organization.objects.values_list('pk', flat=True)
+        )
+        for organization_id in organization_ids:
+            with transaction.atomic():
+                rebuild(organization_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt statistics for {len(organization_ids)} organizations'
+        ))
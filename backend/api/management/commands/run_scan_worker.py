@@ -0,0 +1,118 @@
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+# api modules are imported inside functions: under the "spawn" start method a
+# worker imports this module before Django is set up.
+
+
+def run_worker(batch, poll_interval, burst, stop_event):
+    """Worker process entry point: run scans until told to stop."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        # Started with the "spawn" method: a fresh interpreter.
+        django.setup()
+    from api import metrics, scan_queue
+
+    if multiprocessing.parent_process() is not None:
+        # The supervisor handles Ctrl-C and tells its workers to stop.
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop_event.set())
+    try:
+        scan_queue.work(batch=batch, poll_interval=poll_interval, stop_event=stop_event, burst=burst)
+    finally:
+        # Processes exit without running atexit handlers.
+        if metrics.get_multiproc_dir():
+            metrics.write_snapshot()
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run queued security scans in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=getattr(settings, 'SCAN_WORKER_PROCESSES', 2),
+            help='Worker processes (0 runs scans in this process)',
+        )
+        parser.add_argument('--batch', type=int, default=1, help='Scans claimed at a time per process')
+        parser.add_argument(
+            '--poll-interval', type=float, default=getattr(settings, 'SCAN_POLL_INTERVAL', 1.0),
+            help='Seconds an idle worker waits before polling the queue again',
+        )
+        parser.add_argument('--burst', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        from api import scan_queue
+
+        if options['processes'] < 0 or options['batch'] < 1:
+            raise CommandError('--processes must not be negative and --batch must be positive')
+        stop_event = multiprocessing.Event()
+        previous = {
+            signum: signal.signal(signum, lambda signum, frame: stop_event.set())
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            scan_queue.requeue_expired()
+            worker_args = (options['batch'], options['poll_interval'], options['burst'], stop_event)
+            if options['processes'] == 0:
+                self.run_in_process(worker_args)
+            else:
+                self.supervise(options['processes'], worker_args, stop_event)
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS('Scan workers stopped'))
+
+    def run_in_process(self, worker_args):
+        from api import scan_queue
+
+        done = threading.Event()
+
+        def reap():
+            try:
+                while not done.wait(scan_queue.get_lease_seconds() / 2):
+                    scan_queue.requeue_expired()
+            finally:
+                connections.close_all()
+
+        reaper = threading.Thread(target=reap, name='scan-reaper', daemon=True)
+        reaper.start()
+        try:
+            run_worker(*worker_args)
+        finally:
+            done.set()
+            reaper.join()
+
+    def supervise(self, count, worker_args, stop_event):
+        from api import scan_queue
+
+        burst = worker_args[2]
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        workers = [self.spawn(worker_args) for _ in range(count)]
+        self.stdout.write(f'Started {count} scan worker processes')
+        while workers:
+            for process in workers:
+                process.join(scan_queue.get_lease_seconds() / 2 / len(workers))
+            # Scans held by crashed workers return to the queue.
+            scan_queue.requeue_expired()
+            connections.close_all()
+            alive = []
+            for process in workers:
+                if process.is_alive():
+                    alive.append(process)
+                elif process.exitcode and not stop_event.is_set() and not burst:
+                    self.stderr.write(f'Scan worker {process.pid} exited with {process.exitcode}; restarting')
+                    alive.append(self.spawn(worker_args))
+            workers = alive
+
+    def spawn(self, worker_args):
+        process = multiprocessing.Process(target=run_worker, args=worker_args, name='scan-worker')
+        process.start()
+        return process
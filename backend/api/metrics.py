@@ -0,0 +1,387 @@
+"""
+In-process metrics registry exported in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms are kept in plain dicts keyed by
+label values, each metric behind its own lock, so recording a value costs a
+few microseconds and never touches the network or the database. ``/metrics``
+renders the registry in the Prometheus exposition format.
+
+Request metrics are recorded by ``api.middleware.RequestLoggingMiddleware``
+from the record it already builds for the access log; the response cache and
+the rate limiter record their own counters.
+
+Multiprocess mode
+-----------------
+Gunicorn workers each have their own registry. When
+``METRICS_MULTIPROC_DIR`` is set, every worker writes a snapshot of its
+registry to ``<dir>/metrics-<pid>.json`` from a background thread every
+``METRICS_FLUSH_INTERVAL`` seconds (and at exit), and ``/metrics`` merges all
+snapshots: counters and histograms are summed, including those of workers
+that have since exited; gauges are combined according to their
+``multiprocess_mode`` over live workers only. Clear the directory when the
+server (re)starts.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import threading
+
+from django.conf import settings
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def is_enabled():
+    return getattr(settings, 'METRICS_ENABLED', True)
+
+
+def get_multiproc_dir():
+    return getattr(settings, 'METRICS_MULTIPROC_DIR', '')
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'Metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def reset(self):
+        for metric in self.metrics.values():
+            metric.reset()
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        registry.register(self)
+
+    def snapshot(self):
+        with self.lock:
+            return [[list(labels), self._copy(value)] for labels, value in self.values.items()]
+
+    def reset(self):
+        with self.lock:
+            self.values.clear()
+
+    def _copy(self, value):
+        return value
+
+    def samples(self, values):
+        """Exposition lines for ``values`` (label tuple -> value)."""
+        for labels, value in sorted(values.items()):
+            yield f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}'
+
+
+class Counter(Metric):
+    """A monotonically increasing value."""
+    type = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def merge(self, snapshots):
+        merged = {}
+        for snapshot, _ in snapshots:
+            for labels, value in snapshot:
+                labels = tuple(labels)
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+
+class Gauge(Metric):
+    """
+    A value that goes up and down.
+
+    ``multiprocess_mode`` decides how workers' values combine: ``sum``,
+    ``max`` or ``min``, over live workers only.
+    """
+    type = 'gauge'
+
+    def __init__(self, *args, multiprocess_mode='sum', **kwargs):
+        super().__init__(*args, **kwargs)
+        self.multiprocess_mode = multiprocess_mode
+
+    def set(self, value, *labels):
+        with self.lock:
+            self.values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def merge(self, snapshots):
+        combine = {'sum': lambda a, b: a + b, 'max': max, 'min': min}[self.multiprocess_mode]
+        merged = {}
+        for snapshot, alive in snapshots:
+            if not alive:
+                continue
+            for labels, value in snapshot:
+                labels = tuple(labels)
+                merged[labels] = combine(merged[labels], value) if labels in merged else value
+        return merged
+
+
+class Histogram(Metric):
+    """Observations counted into fixed buckets, plus their sum and count."""
+    type = 'histogram'
+
+    def __init__(self, *args, buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        # Per-bucket (non-cumulative) counts, then +Inf, sum and count.
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def _copy(self, value):
+        return list(value)
+
+    def merge(self, snapshots):
+        merged = {}
+        for snapshot, _ in snapshots:
+            for labels, state in snapshot:
+                labels = tuple(labels)
+                if labels in merged:
+                    merged[labels] = [a + b for a, b in zip(merged[labels], state)]
+                else:
+                    merged[labels] = list(state)
+        return merged
+
+    def samples(self, values):
+        bounds = [format_value(bound) for bound in self.buckets] + ['+Inf']
+        bucket_names = self.labelnames + ('le',)
+        for labels, state in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket{format_labels(bucket_names, labels + (bound,))} '
+                    f'{cumulative}'
+                )
+            label_text = format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{label_text} {format_value(state[-2])}'
+            yield f'{self.name}_count{label_text} {state[-1]}'
+
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return f'{value:.1f}'
+    return str(value)
+
+
+def format_labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(
+        f'{name}="{escape(value)}"' for name, value in zip(names, values)
+    )
+    return '{' + pairs + '}'
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+# Metrics recorded by the backend.
+
+REQUESTS = Counter(
+    'http_requests_total', 'HTTP requests handled.', ('route', 'method', 'status'),
+)
+IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'HTTP requests being handled.',
+)
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'HTTP request latency.', ('route', 'method'),
+)
+DB_QUERIES = Counter(
+    'http_request_db_queries_total', 'Database queries run while handling requests.', ('route',),
+)
+DB_TIME = Counter(
+    'http_request_db_seconds_total', 'Time spent in database queries.', ('route',),
+)
+RESPONSE_CACHE = Counter(
+    'content_response_cache_requests_total',
+    'Content response cache lookups by result (hit, miss, bypassed).', ('result',),
+)
+RESPONSE_CACHE_INVALIDATIONS = Counter(
+    'content_response_cache_invalidations_total', 'Content response cache generation bumps.',
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    'rate_limit_rejections_total', 'Requests rejected by the rate limiter.', ('policy',),
+)
+AUDIT_EVENTS = Counter(
+    'audit_events_total', 'Audit events flushed to the database, by result (written, dropped).',
+    ('result',),
+)
+SCAN_JOBS = Counter(
+    'scan_jobs_total', 'Scans run by queue workers, by outcome (completed, failed, cancelled).',
+    ('scan_type', 'outcome'),
+)
+SCAN_QUEUE_WAIT = Histogram(
+    'scan_queue_wait_seconds', 'Time from queueing a scan to a worker claiming it.',
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+SCAN_RUN_DURATION = Histogram(
+    'scan_run_duration_seconds', 'Time workers spend running a scan.', ('scan_type',),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+SCAN_CHECKS = Counter(
+    'scan_checks_total', 'Scan checks run, by check and status (ok, error, timeout).', ('check', 'status'),
+)
+SCAN_CHECK_DURATION = Histogram(
+    'scan_check_duration_seconds', 'Time a scan check takes, timed-out checks included.', ('check',),
+)
+
+
+def observe_request(access):
+    """Record an access-log record (see ``api.access_log``)."""
+    if not is_enabled():
+        return
+    route = access['route'] or 'unresolved'
+    REQUESTS.inc(route, access['method'], str(access['status']))
+    REQUEST_DURATION.observe(access['duration_ms'] / 1000, route, access['method'])
+    if access['db_queries']:
+        DB_QUERIES.inc(route, amount=access['db_queries'])
+        DB_TIME.inc(route, amount=access['db_time_ms'] / 1000)
+    ensure_writer()
+
+
+# Multiprocess snapshots.
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def snapshot_path(directory, pid):
+    return os.path.join(directory, f'metrics-{pid}.json')
+
+
+def write_snapshot(registry=REGISTRY):
+    directory = get_multiproc_dir()
+    if not directory:
+        return
+    path = snapshot_path(directory, os.getpid())
+    temp = f'{path}.tmp'
+    with open(temp, 'w') as handle:
+        json.dump(registry.snapshot(), handle)
+    os.replace(temp, path)
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_snapshots(directory):
+    """``[(snapshot, alive)]`` for every worker that has written one."""
+    snapshots = []
+    for filename in os.listdir(directory):
+        if not (filename.startswith('metrics-') and filename.endswith('.json')):
+            continue
+        pid = int(filename[len('metrics-'):-len('.json')])
+        try:
+            with open(os.path.join(directory, filename)) as handle:
+                snapshots.append((json.load(handle), is_alive(pid)))
+        except (OSError, ValueError):
+            # Being replaced by its writer; the next scrape will see it.
+            continue
+    return snapshots
+
+
+class SnapshotWriter(threading.Thread):
+    """Daemon thread writing this worker's snapshot every flush interval."""
+
+    def __init__(self, interval):
+        super().__init__(name='metrics-snapshot-writer', daemon=True)
+        self.interval = interval
+        self.pid = os.getpid()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                write_snapshot()
+            except OSError:
+                pass
+
+    def stop(self):
+        self.stopped.set()
+
+
+def ensure_writer():
+    global _writer
+    if _writer is not None and _writer.pid == os.getpid():
+        return
+    if not get_multiproc_dir():
+        return
+    with _writer_lock:
+        # A forked worker inherits the parent's (dead) thread object.
+        if _writer is None or _writer.pid != os.getpid():
+            _writer = SnapshotWriter(getattr(settings, 'METRICS_FLUSH_INTERVAL', 5))
+            _writer.start()
+            atexit.register(_shutdown)
+
+
+def _shutdown():
+    if _writer is not None:
+        _writer.stop()
+    try:
+        write_snapshot()
+    except OSError:
+        pass
+
+
+def exposition(registry=REGISTRY):
+    """The registry, merged across workers if configured, as Prometheus text."""
+    directory = get_multiproc_dir()
+    if directory:
+        write_snapshot(registry)
+        snapshots = read_snapshots(directory)
+
+    lines = []
+    for name, metric in registry.metrics.items():
+        if directory:
+            values = metric.merge([(snapshot.get(name, []), alive) for snapshot, alive in snapshots])
+        else:
+            with metric.lock:
+                values = {labels: metric._copy(value) for labels, value in metric.values.items()}
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.type}')
+        lines.extend(metric.samples(values))
+    return '\n'.join(lines) + '\n'
@@ -2,96 +2,124 @@
 Custom middleware for VICTO AI Backend.
 
 This module provides middleware for:
-- Request logging and monitoring
+- Structured access logging (formatting and output live in ``api.access_log``)
+  and request metrics (``api.metrics``)
 - Security headers
-- Rate limiting
-- Performance monitoring
+- Rate limiting (policies and stores live in ``api.ratelimit``)
+- Performance monitoring and opt-in profiling (``api.profiling``)
 """
 
 import time
 import logging
-import hashlib
+import uuid
+from contextlib import ExitStack
+
+from django.db import connections
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.conf import settings
-from django.core.cache import cache
 from django.utils.deprecation import MiddlewareMixin
 from django.core.exceptions import PermissionDenied
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, empty
+
+from . import access_log, metrics, profiling, ratelimit
 
 logger = logging.getLogger(__name__)
 
 
-class RequestLoggingMiddleware(MiddlewareMixin):
+class RequestLoggingMiddleware:
     """
-    Middleware for logging all HTTP requests with performance metrics.
+    Middleware writing one structured access-log record per request.
+
+    Records are handed to ``api.access_log``, which samples them and writes
+    them off the request thread, and to ``api.metrics``. The route is the resolved URL name, the
+    size comes from ``Content-Length`` (streaming responses are never
+    materialized) and the user is only reported once authentication has
+    already resolved it.
     """
-    
-    def process_request(self, request: HttpRequest) -> None:
-        """Log request start and store start time."""
-        request.start_time = time.time()
-        request.request_id = self._generate_request_id()
-        
-        # Log request details
-        logger.info(
-            f"Request started - ID: {request.request_id} | "
-            f"Method: {request.method} | "
-            f"Path: {request.path} | "
-            f"User: {request.user.username if request.user.is_authenticated else 'Anonymous'} | "
-            f"IP: {self._get_client_ip(request)}"
-        )
-    
-    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
-        """Log response details and performance metrics."""
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            
-            # Log response details
-            logger.info(
-                f"Request completed - ID: {getattr(request, 'request_id', 'N/A')} | "
-                f"Status: {response.status_code} | "
-                f"Duration: {duration:.3f}s | "
-                f"Size: {len(response.content) if hasattr(response, 'content') else 'N/A'} bytes"
-            )
-            
-            # Add performance headers
-            response['X-Request-ID'] = getattr(request, 'request_id', 'N/A')
-            response['X-Response-Time'] = f"{duration:.3f}s"
-            
-            # Log slow requests
-            if duration > 1.0:  # Log requests taking more than 1 second
-                logger.warning(
-                    f"Slow request detected - ID: {getattr(request, 'request_id', 'N/A')} | "
-                    f"Duration: {duration:.3f}s | "
-                    f"Path: {request.path}"
-                )
-        
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        request.request_id = self._get_request_id(request)
+        queries = QueryCounter()
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            metrics.IN_PROGRESS.inc()
+            try:
+                response = self.get_response(request)
+            finally:
+                metrics.IN_PROGRESS.dec()
+
+        duration = time.perf_counter() - start
+        response['X-Request-ID'] = request.request_id
+        response['X-Response-Time'] = f"{duration:.3f}s"
+
+        match = request.resolver_match
+        record = {
+            'request_id': request.request_id,
+            'method': request.method,
+            'route': (match.view_name or match.route) if match else None,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_queries': queries.count,
+            'db_time_ms': round(queries.duration * 1000, 2),
+            'size': self._get_size(response),
+            'user_id': self._get_user_id(request),
+            'ip': self._get_client_ip(request),
+        }
+        metrics.observe_request(record)
+        access_log.log_request(record)
         return response
-    
-    def process_exception(self, request: HttpRequest, exception: Exception) -> None:
-        """Log exceptions with request context."""
-        duration = time.time() - getattr(request, 'start_time', time.time())
-        
-        logger.error(
-            f"Request exception - ID: {getattr(request, 'request_id', 'N/A')} | "
-            f"Exception: {type(exception).__name__}: {str(exception)} | "
-            f"Duration: {duration:.3f}s | "
-            f"Path: {request.path} | "
-            f"User: {request.user.username if request.user.is_authenticated else 'Anonymous'}"
-        )
-    
-    def _generate_request_id(self) -> str:
-        """Generate a unique request ID."""
-        import uuid
-        return str(uuid.uuid4())
-    
+
+    def _get_request_id(self, request: HttpRequest) -> str:
+        """Reuse a well-formed upstream request ID, otherwise generate one."""
+        request_id = request.META.get('HTTP_X_REQUEST_ID', '')
+        if 0 < len(request_id) <= 64 and request_id.replace('-', '').isalnum():
+            return request_id
+        return uuid.uuid4().hex
+
+    def _get_size(self, response: HttpResponse):
+        """Body size from the headers; ``None`` when not known up front."""
+        length = response.get('Content-Length')
+        if length is not None:
+            return int(length)
+        if response.streaming:
+            return None
+        return len(response.content)
+
+    def _get_user_id(self, request: HttpRequest):
+        """The authenticated user's id, without forcing authentication."""
+        user = request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+            return None
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return None
+
     def _get_client_ip(self, request: HttpRequest) -> str:
-        """Get the real client IP address."""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR', 'unknown')
-        return ip
+        """Get the real client IP address (see ``ratelimit.client_ip``)."""
+        return ratelimit.client_ip(request) or 'unknown'
+
+
+class QueryCounter:
+    """``execute_wrapper`` hook counting queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
 
 
 class SecurityHeadersMiddleware(MiddlewareMixin):
@@ -137,61 +165,121 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
 
 class RateLimitMiddleware(MiddlewareMixin):
     """
-    Middleware for implementing IP-based rate limiting.
+    Middleware enforcing the rate-limit policies from ``api.ratelimit``.
+
+    Runs in ``process_view`` so policies can be matched on the resolved URL
+    name. Limited responses carry ``X-RateLimit-*`` headers, and rejected
+    ones a ``429`` with ``Retry-After``.
     """
     
-    def process_request(self, request: HttpRequest) -> HttpResponse:
-        """Check rate limits before processing request."""
-        client_ip = self._get_client_ip(request)
-        rate_limit_key = f"rate_limit:{client_ip}"
-        
-        # Get current request count
-        current_count = cache.get(rate_limit_key, 0)
-        
-        # Check if rate limit exceeded (100 requests per minute)
-        if current_count >= 100:
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            return JsonResponse(
-                {'error': 'Rate limit exceeded. Please try again later.'},
-                status=429
-            )
-        
-        # Increment request count
-        cache.set(rate_limit_key, current_count + 1, 60)  # 60 seconds TTL
-        
-        return None
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs):
+        """Check rate limits before the view runs."""
+        if not getattr(settings, 'RATE_LIMIT_ENABLED', True):
+            return None
+
+        match = request.resolver_match
+        policy = ratelimit.get_policy(match.url_name if match else None, request.method)
+        if policy is None:
+            return None
+
+        decision = ratelimit.check(policy, self._get_identity(request, policy))
+        request.rate_limit = decision
+        if decision.allowed:
+            return None
+
+        metrics.RATE_LIMIT_REJECTIONS.inc(policy.name)
+        logger.warning(
+            "Rate limit exceeded for %s on %s (%s)",
+            self._get_client_ip(request), request.path, policy.name
+        )
+        response = JsonResponse(
+            {'error': 'Rate limit exceeded. Please try again later.'},
+            status=429
+        )
+        response['Retry-After'] = str(decision.retry_after)
+        return response
+    
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """Expose the client's current budget."""
+        decision = getattr(request, 'rate_limit', None)
+        if decision is not None:
+            response['X-RateLimit-Limit'] = str(decision.limit)
+            response['X-RateLimit-Remaining'] = str(decision.remaining)
+            response['X-RateLimit-Reset'] = str(decision.reset)
+        return response
+
+    def _get_identity(self, request: HttpRequest, policy) -> str:
+        """Key the counter on the user when known, else on the client IP."""
+        if policy.scope in ('auto', 'user'):
+            user_id = self._get_user_id(request)
+            if user_id is not None:
+                return f"user:{user_id}"
+        return f"ip:{self._get_client_ip(request)}"
+
+    def _get_user_id(self, request: HttpRequest):
+        """User id from the session or a valid JWT, without a database hit."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if not header.startswith('Bearer '):
+            return None
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+        try:
+            token = JWTAuthentication().get_validated_token(header.split(' ', 1)[1].encode())
+        except (InvalidToken, TokenError):
+            return None
+        return token.get(settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id'))
     
     def _get_client_ip(self, request: HttpRequest) -> str:
-        """Get the real client IP address."""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            ip = x_forwarded_for.split(',')[0]
-        else:
-            ip = request.META.get('REMOTE_ADDR', 'unknown')
-        return ip
+        """Get the real client IP address (see ``ratelimit.client_ip``)."""
+        return ratelimit.client_ip(request) or 'unknown'
 
 
-class PerformanceMonitoringMiddleware(MiddlewareMixin):
+class PerformanceMonitoringMiddleware:
     """
-    Middleware for monitoring request performance and adding performance headers.
+    Middleware adding request timing headers and, when ``PROFILING_ENABLED``
+    is set, a per-request profile from ``api.profiling``.
+
+    Profiled responses carry a ``Server-Timing`` header (SQL, duplicate
+    queries, serializer, view and total time) and are aggregated per route.
     """
-    
-    def process_request(self, request: HttpRequest) -> None:
-        """Store request start time for performance monitoring."""
-        request.start_time = time.time()
-    
-    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
-        """Add performance monitoring headers."""
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
-            response['X-Request-Duration'] = f"{duration:.3f}s"
-            
-            # Add performance warnings for slow requests
-            if duration > 2.0:
-                response['X-Performance-Warning'] = 'Slow request detected'
-        
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not profiling.is_enabled():
+            start = time.perf_counter()
+            response = self.get_response(request)
+            response['X-Request-Duration'] = f"{time.perf_counter() - start:.3f}s"
+            return response
+
+        profile = profiling.RequestProfile()
+        request.profile = profile
+        token = profile.activate()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            profile.deactivate(token)
+        profile.finish()
+
+        response['X-Request-Duration'] = f"{profile.total:.3f}s"
+        response['Server-Timing'] = profile.server_timing()
+        match = request.resolver_match
+        profiling.record(match.view_name if match else 'unresolved', profile)
         return response
 
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs):
+        profile = getattr(request, 'profile', None)
+        if profile is not None:
+            profile.start_view()
+        return None
+
 
 class ErrorHandlingMiddleware(MiddlewareMixin):
     """
@@ -221,20 +309,27 @@ class ErrorHandlingMiddleware(MiddlewareMixin):
 
 class CachingMiddleware(MiddlewareMixin):
     """
-    Middleware for implementing intelligent response caching.
+    Middleware for adding default Cache-Control headers to GET responses.
+
+    Validators (ETag/Last-Modified) and 304 responses are produced by the
+    views themselves via ``api.conditional.ConditionalGetMixin``, before the
+    body is rendered; this middleware never hashes response content.
     """
     
     def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
         """Add caching headers for GET requests."""
         
-        # Only cache GET requests
-        if request.method == 'GET' and response.status_code == 200:
-            # Add cache control headers
+        if request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+            return response
+        if response.has_header('Cache-Control'):
+            return response
+
+        if 'HTTP_AUTHORIZATION' in request.META or request.COOKIES:
+            response['Cache-Control'] = 'private, no-cache'
+        elif response.has_header('ETag'):
+            # Cheap to revalidate: let shared caches keep it briefly.
+            response['Cache-Control'] = 'public, max-age=60, must-revalidate'
+        else:
             response['Cache-Control'] = 'public, max-age=300'  # 5 minutes
-            response['ETag'] = self._generate_etag(response.content)
         
         return response
-    
-    def _generate_etag(self, content: bytes) -> str:
-        """Generate ETag for content."""
-        return hashlib.md5(content).hexdigest() 
\ No newline at end of file
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_organization_industry_organization_size_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizationStats',
+            fields=[
+                ('organization', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='api.organization')),
+                ('total_incidents', models.PositiveIntegerField(default=0)),
+                ('active_incidents', models.PositiveIntegerField(default=0)),
+                ('low_incidents', models.PositiveIntegerField(default=0)),
+                ('medium_incidents', models.PositiveIntegerField(default=0)),
+                ('high_incidents', models.PositiveIntegerField(default=0)),
+                ('critical_incidents', models.PositiveIntegerField(default=0)),
+                ('total_models', models.PositiveIntegerField(default=0)),
+                ('running_scans', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='securityincident',
+            index=models.Index(fields=['organization', 'created_at'], name='incident_org_created_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+
+def backfill_rollups(apps, schema_editor):
+    SecurityIncident = apps.get_model('api', 'SecurityIncident')
+    IncidentDailyRollup = apps.get_model('api', 'IncidentDailyRollup')
+    groups = (
+        SecurityIncident.objects.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('organization_id', 'day', 'severity', 'status')
+        .annotate(total=Count('pk'))
+    )
+    IncidentDailyRollup.objects.bulk_create(
+        (
+            IncidentDailyRollup(
+                organization_id=group['organization_id'], day=group['day'],
+                severity=group['severity'], status=group['status'], count=group['total'],
+            )
+            for group in groups.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_organizationstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncidentDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('severity', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High'), ('critical', 'Critical')], max_length=20)),
+                ('status', models.CharField(choices=[('open', 'Open'), ('investigating', 'Investigating'), ('resolved', 'Resolved'), ('closed', 'Closed')], max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('organization', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='incident_rollups', to='api.organization')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='incidentdailyrollup',
+            constraint=models.UniqueConstraint(fields=('organization', 'day', 'severity', 'status'), name='unique_incident_daily_rollup'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
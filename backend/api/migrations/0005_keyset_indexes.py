@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_incidentdailyrollup'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='securityincident',
+            name='incident_org_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['created_at', 'id'], name='auditlog_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securityincident',
+            index=models.Index(fields=['organization', 'created_at', 'id'], name='incident_org_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securityscan',
+            index=models.Index(fields=['created_at', 'id'], name='scan_created_id_idx'),
+        ),
+    ]
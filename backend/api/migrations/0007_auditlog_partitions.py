@@ -0,0 +1,112 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:11
+
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+TABLE = 'api_auditlog'
+LEGACY = 'api_auditlog_unpartitioned'
+MONTHS_AHEAD = 3
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_audit_log(apps, schema_editor):
+    """
+    Rebuild api_auditlog as a table range-partitioned by month on
+    created_at (PostgreSQL only). The primary key becomes (id, created_at),
+    as partitioned tables require; indexes and foreign keys are recreated
+    on the parent under their existing names.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [TABLE])
+        if cursor.fetchone():
+            return
+
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'", [TABLE]
+        )
+        primary_key, = cursor.fetchone()
+        cursor.execute(
+            'SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() '
+            'AND tablename = %s AND indexname <> %s', [TABLE, primary_key]
+        )
+        indexes = [definition for definition, in cursor.fetchall()]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'", [TABLE]
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT MIN(created_at) FROM {quote(TABLE)}')
+        oldest, = cursor.fetchone()
+
+        cursor.execute(f'ALTER TABLE {quote(TABLE)} RENAME TO {quote(LEGACY)}')
+        cursor.execute(
+            f'CREATE TABLE {quote(TABLE)} (LIKE {quote(LEGACY)} '
+            f'INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS) '
+            f'PARTITION BY RANGE (created_at)'
+        )
+        now = datetime.now(timezone.utc)
+        month = datetime((oldest or now).year, (oldest or now).month, 1, tzinfo=timezone.utc)
+        last = add_months(datetime(now.year, now.month, 1, tzinfo=timezone.utc), MONTHS_AHEAD)
+        while month <= last:
+            name = f'{TABLE}_p{month.year:04d}_{month.month:02d}'
+            cursor.execute(
+                f"CREATE TABLE {quote(name)} PARTITION OF {quote(TABLE)} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE {quote(TABLE + "_default")} PARTITION OF {quote(TABLE)} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {quote(TABLE)} SELECT * FROM {quote(LEGACY)}')
+        # A serial id keeps its sequence (owned by the old table until now);
+        # an identity id gets a new one that must continue after the copy.
+        cursor.execute('SELECT pg_get_serial_sequence(%s, %s), pg_get_serial_sequence(%s, %s)',
+                       [LEGACY, 'id', TABLE, 'id'])
+        old_sequence, new_sequence = cursor.fetchone()
+        if new_sequence is None and old_sequence:
+            cursor.execute(f'ALTER SEQUENCE {old_sequence} OWNED BY {quote(TABLE)}.id')
+        elif new_sequence:
+            cursor.execute(
+                f'SELECT setval(%s, COALESCE((SELECT MAX(id) FROM {quote(TABLE)}), 0) + 1, false)',
+                [new_sequence],
+            )
+        cursor.execute(f'DROP TABLE {quote(LEGACY)}')
+
+        cursor.execute(
+            f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(primary_key)} PRIMARY KEY (id, created_at)'
+        )
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {quote(TABLE)} ADD CONSTRAINT {quote(name)} {definition}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_auditlog_organization'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['organization', 'action', 'created_at'], name='auditlog_org_action_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['organization', 'model_name', 'object_id', 'created_at'], name='auditlog_org_object_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['organization', 'user', 'created_at'], name='auditlog_org_user_idx'),
+        ),
+        migrations.RunPython(partition_audit_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_auditlog_partitions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securityscan',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='error',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='lease_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='lease_token',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='queued_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='worker',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='securityscan',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('stopped', 'Stopped')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='securityscan',
+            index=models.Index(fields=['status', 'queued_at'], name='scan_status_queued_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='securityscan',
+            index=models.Index(fields=['status', 'lease_expires_at'], name='scan_status_lease_idx'),
+        ),
+    ]
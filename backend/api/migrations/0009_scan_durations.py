@@ -0,0 +1,66 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_durations(apps, schema_editor):
+    SecurityScan = apps.get_model('api', 'SecurityScan')
+    scans = SecurityScan.objects.filter(started_at__isnull=False, completed_at__isnull=False).only(
+        'started_at', 'completed_at'
+    )
+    batch = []
+    for scan in scans.iterator(chunk_size=1000):
+        elapsed = scan.completed_at - scan.started_at
+        scan.duration_ms = max(0, round(elapsed.total_seconds() * 1000))
+        batch.append(scan)
+        if len(batch) == 1000:
+            SecurityScan.objects.bulk_update(batch, ['duration_ms'])
+            batch = []
+    SecurityScan.objects.bulk_update(batch, ['duration_ms'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_scan_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('scan_type', models.CharField(choices=[('vulnerability', 'Vulnerability Scan'), ('penetration', 'Penetration Test'), ('compliance', 'Compliance Check'), ('custom', 'Custom Scan')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('queued', 'Queued'), ('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed'), ('stopped', 'Stopped')], max_length=20)),
+                ('bucket', models.SmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('duration_ms_total', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='duration_ms',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='securityscan',
+            index=models.Index(fields=['target_model', 'created_at', 'duration_ms'], name='scan_model_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='scandailyrollup',
+            name='organization',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_rollups', to='api.organization'),
+        ),
+        migrations.AddField(
+            model_name='scandailyrollup',
+            name='target_model',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_rollups', to='api.aimodel'),
+        ),
+        migrations.AddConstraint(
+            model_name='scandailyrollup',
+            constraint=models.UniqueConstraint(fields=('organization', 'day', 'scan_type', 'target_model', 'status', 'bucket'), name='unique_scan_daily_rollup'),
+        ),
+        migrations.RunPython(backfill_durations, migrations.RunPython.noop),
+    ]
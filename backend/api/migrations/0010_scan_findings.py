@@ -0,0 +1,95 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+SEVERITIES = ('critical', 'high', 'medium', 'low', 'info')
+
+
+def move_findings(apps, schema_editor):
+    """Move each scan's ``findings['findings']`` list into ScanFinding rows."""
+    SecurityScan = apps.get_model('api', 'SecurityScan')
+    ScanFinding = apps.get_model('api', 'ScanFinding')
+    scans = SecurityScan.objects.filter(findings__has_key='findings').only('findings')
+    for scan in scans.iterator(chunk_size=100):
+        items = scan.findings['findings']
+        valid = isinstance(items, list) and all(
+            isinstance(item, dict) and item.get('severity') in SEVERITIES and item.get('rule_id')
+            for item in items
+        )
+        if not valid:
+            # Left as stored.
+            continue
+        rows = [
+            ScanFinding(
+                scan_id=scan.pk, check_name=str(item.get('check', ''))[:100], rule_id=str(item['rule_id'])[:200],
+                severity=item['severity'], severity_rank=SEVERITIES.index(item['severity']),
+                message=str(item.get('message', '')), location=str(item.get('location', ''))[:255],
+            )
+            for item in items
+        ]
+        ScanFinding.objects.bulk_create(rows, batch_size=1000)
+        counts = {f'{severity}_findings': 0 for severity in SEVERITIES}
+        for row in rows:
+            counts[f'{row.severity}_findings'] += 1
+        SecurityScan.objects.filter(pk=scan.pk).update(
+            findings={key: value for key, value in scan.findings.items() if key != 'findings'},
+            total_findings=len(rows), **counts,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_scan_durations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securityscan',
+            name='critical_findings',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='high_findings',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='info_findings',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='low_findings',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='medium_findings',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='securityscan',
+            name='total_findings',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='ScanFinding',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('check_name', models.CharField(blank=True, max_length=100)),
+                ('rule_id', models.CharField(max_length=200)),
+                ('severity', models.CharField(choices=[('critical', 'Critical'), ('high', 'High'), ('medium', 'Medium'), ('low', 'Low'), ('info', 'Info')], max_length=10)),
+                ('severity_rank', models.PositiveSmallIntegerField()),
+                ('message', models.TextField(blank=True)),
+                ('location', models.CharField(blank=True, max_length=255)),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='finding_rows', to='api.securityscan')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['scan', 'severity_rank', 'rule_id', 'location'], name='finding_scan_order_idx'), models.Index(fields=['scan', 'rule_id'], name='finding_scan_rule_idx'), models.Index(fields=['scan', 'location'], name='finding_scan_location_idx'), models.Index(fields=['scan', 'check_name'], name='finding_scan_check_idx')],
+            },
+        ),
+        migrations.RunPython(move_findings, migrations.RunPython.noop),
+    ]
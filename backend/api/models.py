@@ -50,9 +50,11 @@ class SecurityScan(models.Model):
 
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('queued', 'Queued'),
         ('running', 'Running'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
+        ('stopped', 'Stopped'),
     ]
 
     scan_type = models.CharField(max_length=20, choices=SCAN_TYPES)
@@ -64,10 +66,67 @@ class SecurityScan(models.Model):
     created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Execution queue (api.scan_queue)
+    queued_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=100, blank=True)
+    lease_token = models.CharField(max_length=32, blank=True)
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    # completed_at - started_at, in milliseconds (api.scan_stats)
+    duration_ms = models.PositiveBigIntegerField(null=True, blank=True)
+    # Finding counts; the findings themselves are ScanFinding rows (api.scan_findings)
+    total_findings = models.PositiveIntegerField(default=0)
+    critical_findings = models.PositiveIntegerField(default=0)
+    high_findings = models.PositiveIntegerField(default=0)
+    medium_findings = models.PositiveIntegerField(default=0)
+    low_findings = models.PositiveIntegerField(default=0)
+    info_findings = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return f"{self.get_scan_type_display()} - {self.target_model.name}"
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='scan_created_id_idx'),
+            models.Index(fields=['status', 'queued_at'], name='scan_status_queued_idx'),
+            models.Index(fields=['status', 'lease_expires_at'], name='scan_status_lease_idx'),
+            models.Index(fields=['target_model', 'created_at', 'duration_ms'], name='scan_model_created_idx'),
+        ]
+
+class ScanFinding(models.Model):
+    """
+    One finding of a scan (see ``api.scan_findings``). ``severity_rank``
+    orders severities most severe first.
+    """
+    SEVERITY_CHOICES = [
+        ('critical', 'Critical'),
+        ('high', 'High'),
+        ('medium', 'Medium'),
+        ('low', 'Low'),
+        ('info', 'Info'),
+    ]
+
+    scan = models.ForeignKey(SecurityScan, on_delete=models.CASCADE, related_name='finding_rows')
+    # The pipeline check that reported it; blank for findings posted to complete_scan
+    check_name = models.CharField(max_length=100, blank=True)
+    rule_id = models.CharField(max_length=200)
+    severity = models.CharField(max_length=10, choices=SEVERITY_CHOICES)
+    severity_rank = models.PositiveSmallIntegerField()
+    message = models.TextField(blank=True)
+    location = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return f"{self.scan_id} {self.severity} {self.rule_id} {self.location}"
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['scan', 'severity_rank', 'rule_id', 'location'], name='finding_scan_order_idx'),
+            models.Index(fields=['scan', 'rule_id'], name='finding_scan_rule_idx'),
+            models.Index(fields=['scan', 'location'], name='finding_scan_location_idx'),
+            models.Index(fields=['scan', 'check_name'], name='finding_scan_check_idx'),
+        ]
+
 class UserProfile(models.Model):
     ROLE_CHOICES = [
         ('admin', 'Administrator'),
@@ -119,6 +178,88 @@ class SecurityIncident(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['organization', 'created_at', 'id'], name='incident_org_created_id_idx'),
+        ]
+
+class IncidentDailyRollup(models.Model):
+    """
+    Incident counts per organization, day, severity and status.
+
+    Maintained incrementally by ``api.signals``; ``rebuild_incident_rollups``
+    recomputes any range from ``SecurityIncident``. Days are taken in the
+    project time zone.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='incident_rollups')
+    day = models.DateField()
+    severity = models.CharField(max_length=20, choices=SecurityIncident.SEVERITY_CHOICES)
+    status = models.CharField(max_length=20, choices=SecurityIncident.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.organization_id} {self.day} {self.severity}/{self.status}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['organization', 'day', 'severity', 'status'],
+                name='unique_incident_daily_rollup',
+            ),
+        ]
+
+class ScanDailyRollup(models.Model):
+    """
+    Finished scans per organization, creation day, type, model, status and
+    duration bucket (see ``api.scan_stats``), with their summed durations.
+
+    Maintained by ``api.signals`` and ``api.scan_queue`` when
+    ``SCAN_STATS_ROLLUPS`` is on; ``rebuild_scan_rollups`` recomputes any
+    range from ``SecurityScan``. ``bucket`` is -1 for scans without a
+    duration.
+    """
+    organization = models.ForeignKey(Organization, on_delete=models.CASCADE, related_name='scan_rollups')
+    day = models.DateField()
+    scan_type = models.CharField(max_length=20, choices=SecurityScan.SCAN_TYPES)
+    target_model = models.ForeignKey(AIModel, on_delete=models.CASCADE, related_name='scan_rollups')
+    status = models.CharField(max_length=20, choices=SecurityScan.STATUS_CHOICES)
+    bucket = models.SmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    duration_ms_total = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.organization_id} {self.day} {self.scan_type}/{self.status}#{self.bucket}: {self.count}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['organization', 'day', 'scan_type', 'target_model', 'status', 'bucket'],
+                name='unique_scan_daily_rollup',
+            ),
+        ]
+
+class OrganizationStats(models.Model):
+    """
+    Materialized counters behind ``OrganizationViewSet.statistics``.
+
+    Maintained incrementally by ``api.signals`` when
+    ``ORGANIZATION_STATS_MATERIALIZED`` is on; ``rebuild_organization_stats``
+    recomputes every row from the source tables.
+    """
+    organization = models.OneToOneField(
+        Organization, on_delete=models.CASCADE, primary_key=True, related_name='stats'
+    )
+    total_incidents = models.PositiveIntegerField(default=0)
+    active_incidents = models.PositiveIntegerField(default=0)
+    low_incidents = models.PositiveIntegerField(default=0)
+    medium_incidents = models.PositiveIntegerField(default=0)
+    high_incidents = models.PositiveIntegerField(default=0)
+    critical_incidents = models.PositiveIntegerField(default=0)
+    total_models = models.PositiveIntegerField(default=0)
+    running_scans = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Statistics for {self.organization_id}"
 
 class AuditLog(models.Model):
     ACTION_CHOICES = [
@@ -132,15 +273,28 @@ class AuditLog(models.Model):
     ]
 
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
+    organization = models.ForeignKey(
+        Organization, on_delete=models.SET_NULL, null=True, blank=True, related_name='audit_logs'
+    )
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     model_name = models.CharField(max_length=100)
     object_id = models.CharField(max_length=100)
     details = models.JSONField(default=dict)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set when the event is recorded; rows are written later, in batches.
+    created_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         return f"{self.action} by {self.user.username} on {self.model_name}"
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='auditlog_created_id_idx'),
+            models.Index(fields=['organization', 'created_at', 'id'], name='auditlog_org_created_id_idx'),
+            models.Index(fields=['organization', 'action', 'created_at'], name='auditlog_org_action_idx'),
+            models.Index(
+                fields=['organization', 'model_name', 'object_id', 'created_at'], name='auditlog_org_object_idx'
+            ),
+            models.Index(fields=['organization', 'user', 'created_at'], name='auditlog_org_user_idx'),
+        ]
@@ -0,0 +1,180 @@
+"""
+Keyset (cursor) pagination on ``(created_at, id)``.
+
+Each page is fetched with ``WHERE (created_at, id) < (last seen)``,
+``ORDER BY created_at DESC, id DESC`` and ``LIMIT page_size + 1``, so it
+is a range scan on a ``(created_at, id)`` index however deep the client
+goes, no ``COUNT(*)`` is issued, and rows inserted while a client pages do
+not shift later pages. Cursors are opaque base64 tokens in the ``next`` and
+``previous`` links.
+
+``?ordering=created_at`` pages oldest first. Any other ``ordering``, and
+actions not listed in ``keyset_actions`` (such as ranked search), fall back
+to page-number pagination.
+
+``?count=true`` adds a total: exact up to ``count_cap`` rows, beyond that
+the planner's estimate on PostgreSQL (``count_is_exact`` says which).
+"""
+
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    ordering_query_param = api_settings.ORDERING_PARAM
+    keyset_field = 'created_at'
+    keyset_actions = ('list',)
+    count_cap = 10000
+    fallback_class = PageNumberPagination
+    invalid_cursor_message = 'Invalid cursor'
+
+    def use_keyset(self, request, view):
+        if view is not None and getattr(view, 'action', None) not in self.keyset_actions:
+            return False
+        ordering = request.query_params.get(self.ordering_query_param)
+        return ordering in (None, '', self.keyset_field, f'-{self.keyset_field}')
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.fallback = None
+        if not self.use_keyset(request, view):
+            self.fallback = self.fallback_class()
+            return self.fallback.paginate_queryset(queryset, request, view)
+
+        self.size = self.get_page_size(request)
+        self.descending = (
+            request.query_params.get(self.ordering_query_param) != self.keyset_field
+        )
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ('1', 'true'):
+            self.count, self.count_is_exact = self.get_count(queryset)
+
+        cursor = self.decode_cursor(request)
+        backwards = cursor is not None and cursor[2] == 'p'
+        # Walking backwards is walking forwards in the opposite order.
+        descending = self.descending != backwards
+
+        field = self.keyset_field
+        if cursor is not None:
+            value, pk, _ = cursor
+            before = '__lt' if descending else '__gt'
+            boundary = '__lte' if descending else '__gte'
+            queryset = queryset.filter(
+                Q(**{f'{field}{boundary}': value})
+                & (Q(**{f'{field}{before}': value}) | Q(**{f'pk{before}': pk}))
+            )
+        prefix = '-' if descending else ''
+        rows = list(queryset.order_by(f'{prefix}{field}', f'{prefix}pk')[:self.size + 1])
+
+        has_more = len(rows) > self.size
+        rows = rows[:self.size]
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        if self.fallback is not None:
+            return self.fallback.get_paginated_response(data)
+        payload = OrderedDict()
+        if self.count is not None:
+            payload['count'] = self.count
+            payload['count_is_exact'] = self.count_is_exact
+        payload['next'] = self.get_next_link()
+        payload['previous'] = self.get_previous_link()
+        payload['results'] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'count': {'type': 'integer', 'description': 'Only with ?count=true'},
+                'count_is_exact': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_link(self.page[-1], 'n')
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_link(self.page[0], 'p')
+
+    def encode_link(self, row, direction):
+        if isinstance(row, dict):
+            # values() rows (api.fastpath) carry the keyset field and ``pk``.
+            value, pk = row[self.keyset_field], row['pk']
+        else:
+            value, pk = getattr(row, self.keyset_field), row.pk
+        token = json.dumps([value.isoformat(), pk, direction], separators=(',', ':'))
+        cursor = base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            token = base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+            value, pk, direction = json.loads(token)
+            value = parse_datetime(value)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if value is None or not isinstance(pk, int) or direction not in ('n', 'p'):
+            raise NotFound(self.invalid_cursor_message)
+        return value, pk, direction
+
+    def get_count(self, queryset):
+        """``(count, exact)``, counting at most ``count_cap + 1`` rows."""
+        queryset = queryset.order_by()
+        capped = queryset[:self.count_cap + 1].count()
+        if capped <= self.count_cap:
+            return capped, True
+        estimate = self.estimate_count(queryset)
+        return (estimate, False) if estimate is not None else (capped, False)
+
+    def estimate_count(self, queryset):
+        if connections[queryset.db].vendor != 'postgresql':
+            return None
+        sql, params = queryset.query.sql_with_params()
+        with connections[queryset.db].cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return max(int(plan[0]['Plan']['Plan Rows']), self.count_cap + 1)
@@ -0,0 +1,156 @@
+"""
+Monthly storage management for ``AuditLog``.
+
+On PostgreSQL ``api_auditlog`` is range-partitioned on ``created_at`` (see
+migration ``0007_auditlog_partitions``): one ``api_auditlog_pYYYY_MM`` table
+per month plus ``api_auditlog_default`` for rows outside every partition.
+Queries bounded on ``created_at`` only touch the matching months, and
+expiring a month is a ``DETACH`` and ``DROP`` instead of a ``DELETE``.
+``ensure_partitions()`` creates the coming months ahead of time; run
+``manage.py create_audit_partitions`` from cron (monthly is enough).
+
+Other databases keep a single table; the same month ranges are exported and
+removed with date-bounded queries on the ``created_at`` index.
+
+``archive_month()`` backs ``manage.py archive_audit_logs``: it writes a
+month's rows to ``auditlog-YYYY-MM.jsonl.gz`` and removes them only once the
+file is complete.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from .models import AuditLog
+
+TABLE = AuditLog._meta.db_table
+EXPORT_FIELDS = (
+    'id', 'created_at', 'user_id', 'organization_id', 'action',
+    'model_name', 'object_id', 'details', 'ip_address',
+)
+DELETE_BATCH_SIZE = 5000
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=dt_timezone.utc)
+
+
+def partition_name(month):
+    return f'{TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass', [TABLE]
+        )
+        return cursor.fetchone() is not None
+
+
+def partition_names():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass', [TABLE]
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+def ensure_partitions(start, months_ahead):
+    """
+    Create the monthly partitions from ``start``'s month through
+    ``months_ahead`` months after the current one. Returns the names created.
+    """
+    if not is_partitioned():
+        return []
+    existing = partition_names()
+    created = []
+    month = month_start(start)
+    last = add_months(month_start(datetime.now(dt_timezone.utc)), months_ahead)
+    quote = connection.ops.quote_name
+    while month <= last:
+        name = partition_name(month)
+        if name not in existing:
+            # Fails if the default partition already holds rows of this
+            # month; create partitions ahead of time to avoid that.
+            with connection.cursor() as cursor:
+                # Bounds are literals: DDL takes no bound parameters.
+                cursor.execute(
+                    f"CREATE TABLE {quote(name)} PARTITION OF {quote(TABLE)} "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                )
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def expired_months(before):
+    """Months with rows that ended before ``before``'s month, oldest first."""
+    cutoff = month_start(before)
+    oldest = AuditLog.objects.filter(created_at__lt=cutoff).order_by('created_at').values_list(
+        'created_at', flat=True
+    ).first()
+    months = []
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def export_month(month, path):
+    """Write the month's rows to ``path`` as gzipped JSON lines; returns the count."""
+    rows = AuditLog.objects.filter(
+        created_at__gte=month, created_at__lt=add_months(month, 1)
+    ).order_by('created_at', 'id').values(*EXPORT_FIELDS)
+    temp = f'{path}.tmp'
+    count = 0
+    with gzip.open(temp, 'wt', encoding='utf-8') as handle:
+        for row in rows.iterator(chunk_size=2000):
+            handle.write(json.dumps(row, cls=DjangoJSONEncoder, separators=(',', ':')))
+            handle.write('\n')
+            count += 1
+    os.replace(temp, path)
+    return count
+
+
+def drop_month(month):
+    """Remove the month's rows: drop its partition, or delete them in batches."""
+    name = partition_name(month)
+    if is_partitioned() and name in partition_names():
+        quote = connection.ops.quote_name
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {quote(TABLE)} DETACH PARTITION {quote(name)}')
+            cursor.execute(f'DROP TABLE {quote(name)}')
+    rows = AuditLog.objects.filter(created_at__gte=month, created_at__lt=add_months(month, 1))
+    while True:
+        ids = list(rows.values_list('pk', flat=True)[:DELETE_BATCH_SIZE])
+        if not ids:
+            return
+        AuditLog.objects.filter(pk__in=ids).delete()
+
+
+def archive_month(month, directory):
+    """
+    Export then remove one month; returns ``(path, rows)``, with no file
+    (``path`` is ``None``) for an empty month.
+    """
+    path = os.path.join(directory, f'auditlog-{month.year:04d}-{month.month:02d}.jsonl.gz')
+    count = export_month(month, path)
+    if not count:
+        os.remove(path)
+        path = None
+    drop_month(month)
+    return path, count
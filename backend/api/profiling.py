@@ -0,0 +1,199 @@
+"""
+Opt-in per-request profiling for the Django backend.
+
+With ``PROFILING_ENABLED`` on, ``api.middleware.PerformanceMonitoringMiddleware``
+attaches a ``RequestProfile`` to every request and records:
+
+- SQL query count and time, through ``connection.execute_wrapper``;
+- duplicate queries (same SQL and parameters executed more than once);
+- time spent rendering serializers (``serializer.data``, which runs
+  ``to_representation``), counted once for the outermost serializer;
+- time spent in the view, and the total.
+
+The numbers are returned in a ``Server-Timing`` header and folded into a
+per-route latency histogram kept in the worker process, which staff can
+read from ``GET /api/v1/profiling/stats/`` (``DELETE`` resets it).
+"""
+
+import contextvars
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from rest_framework.serializers import BaseSerializer
+
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+def is_enabled():
+    return getattr(settings, 'PROFILING_ENABLED', False)
+
+
+def get_current():
+    """The profile of the request being handled, if it is being profiled."""
+    return _current.get()
+
+
+class RequestProfile:
+    """Timings and query statistics for one request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.total = 0.0
+        self.view_start = None
+        self.view_time = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.queries = Counter()
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - start
+            self.sql_count += 1
+            self.queries[(sql, repr(params))] += 1
+
+    def activate(self):
+        return _current.set(self)
+
+    def deactivate(self, token):
+        _current.reset(token)
+
+    def start_view(self):
+        self.view_start = time.perf_counter()
+
+    def finish(self):
+        end = time.perf_counter()
+        self.total = end - self.start
+        if self.view_start is not None:
+            self.view_time = end - self.view_start
+
+    @property
+    def duplicate_queries(self):
+        return sum(count - 1 for count in self.queries.values() if count > 1)
+
+    def most_duplicated(self):
+        if not self.queries:
+            return None
+        (sql, _), count = self.queries.most_common(1)[0]
+        return sql if count > 1 else None
+
+    def server_timing(self):
+        """The ``Server-Timing`` header value."""
+        return ', '.join([
+            f'sql;dur={self.sql_time * 1000:.2f};desc="{self.sql_count} queries"',
+            f'dupsql;desc="{self.duplicate_queries} duplicate queries"',
+            f'serializer;dur={self.serializer_time * 1000:.2f}',
+            f'view;dur={self.view_time * 1000:.2f}',
+            f'total;dur={self.total * 1000:.2f}',
+        ])
+
+
+class RouteStats:
+    """Aggregated profiles of one route."""
+
+    def __init__(self):
+        self.count = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.duplicate_queries = 0
+        self.serializer_time = 0.0
+        self.view_time = 0.0
+        self.most_duplicated = None
+
+    def add(self, profile):
+        total_ms = profile.total * 1000
+        index = next(
+            (i for i, bound in enumerate(BUCKETS_MS) if total_ms <= bound),
+            len(BUCKETS_MS),
+        )
+        self.buckets[index] += 1
+        self.count += 1
+        self.total_time += profile.total
+        self.max_time = max(self.max_time, profile.total)
+        self.sql_count += profile.sql_count
+        self.sql_time += profile.sql_time
+        self.duplicate_queries += profile.duplicate_queries
+        self.serializer_time += profile.serializer_time
+        self.view_time += profile.view_time
+        self.most_duplicated = profile.most_duplicated() or self.most_duplicated
+
+    def as_dict(self):
+        def mean_ms(total):
+            return round(total / self.count * 1000, 2) if self.count else 0.0
+
+        labels = [f'le_{bound}ms' for bound in BUCKETS_MS] + ['inf']
+        return {
+            'count': self.count,
+            'histogram': dict(zip(labels, self.buckets)),
+            'mean_ms': mean_ms(self.total_time),
+            'max_ms': round(self.max_time * 1000, 2),
+            'mean_view_ms': mean_ms(self.view_time),
+            'mean_serializer_ms': mean_ms(self.serializer_time),
+            'mean_sql_ms': mean_ms(self.sql_time),
+            'mean_sql_queries': round(self.sql_count / self.count, 2) if self.count else 0.0,
+            'duplicate_queries': self.duplicate_queries,
+            'most_duplicated_sql': self.most_duplicated,
+        }
+
+
+_routes = {}
+_routes_lock = threading.Lock()
+
+
+def record(route, profile):
+    with _routes_lock:
+        _routes.setdefault(route, RouteStats()).add(profile)
+
+
+def get_stats():
+    """Per-route profile aggregates for this worker process."""
+    with _routes_lock:
+        return {route: stats.as_dict() for route, stats in sorted(_routes.items())}
+
+
+def reset_stats():
+    with _routes_lock:
+        _routes.clear()
+
+
+def _profiled_data(fget):
+    def data(serializer):
+        profile = _current.get()
+        if profile is None:
+            return fget(serializer)
+        profile.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return fget(serializer)
+        finally:
+            profile.serializer_depth -= 1
+            if not profile.serializer_depth:
+                profile.serializer_time += time.perf_counter() - start
+    data.profiled = True
+    return data
+
+
+def install():
+    """
+    Time ``serializer.data`` for profiled requests.
+
+    Called from ``ApiConfig.ready``. ``Serializer`` and ``ListSerializer``
+    both defer to ``BaseSerializer.data``, so wrapping it covers every
+    serializer; outside a profiled request the wrapper is a context-variable
+    lookup.
+    """
+    fget = BaseSerializer.data.fget
+    if getattr(fget, 'profiled', False):
+        return
+    BaseSerializer.data = property(_profiled_data(fget))
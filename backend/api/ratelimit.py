@@ -0,0 +1,236 @@
+"""
+Rate limiting for the Django backend.
+
+Limits are enforced by ``api.middleware.RateLimitMiddleware`` using a
+sliding-window counter: each client has one counter per fixed window, and
+the current estimate is the current window's count plus the previous
+window's count weighted by how much of it still overlaps the sliding
+window. Counters are only ever changed with atomic ``incr`` operations, so
+concurrent workers cannot lose updates, and keys expire on their own
+schedule, so a client is always released once its rate drops.
+
+Policies are declared in settings::
+
+    RATE_LIMIT_DEFAULT = '100/minute'      # '' disables the catch-all policy
+    RATE_LIMIT_POLICIES = {
+        # URL name -> policy
+        'token_obtain_pair': {'rate': '5/minute', 'methods': ['POST'], 'scope': 'ip'},
+    }
+
+``scope`` is ``ip``, ``user`` or ``auto`` (user when the request carries a
+valid JWT or session, IP otherwise).
+
+The IP is ``client_ip()``: ``REMOTE_ADDR``, or, behind
+``TRUSTED_PROXY_COUNT`` reverse proxies, the ``X-Forwarded-For`` entry the
+outermost of them appended. Entries to its left come from the client and
+are ignored, so rotating them does not earn a fresh budget.
+
+Counters live in a pluggable store (``RATE_LIMIT_STORE``): ``cache`` shares
+them across workers through the Django cache, ``memory`` keeps them in the
+worker process. A process-local cache (see ``api.caching.is_shared()``) would
+not share them either, so ``cache`` then falls back to ``memory`` with a
+warning that every worker enforces its own limit.
+"""
+
+import ipaddress
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import caching
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {
+    's': 1, 'sec': 1, 'second': 1,
+    'm': 60, 'min': 60, 'minute': 60,
+    'h': 3600, 'hour': 3600,
+    'd': 86400, 'day': 86400,
+}
+
+
+def get_trusted_proxy_count():
+    return getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+
+
+def client_ip(request):
+    """The client's IP address as a string, or ``None`` when unknown or invalid."""
+    address = request.META.get('REMOTE_ADDR', '')
+    proxies = get_trusted_proxy_count()
+    if proxies > 0:
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        # Fewer hops than proxies: the request skipped them; keep REMOTE_ADDR.
+        if len(hops) >= proxies:
+            address = hops[-proxies]
+    try:
+        return str(ipaddress.ip_address(address))
+    except ValueError:
+        return None
+
+
+def parse_rate(rate):
+    """Parse ``'<count>/<period>'`` into ``(count, seconds)``."""
+    count, _, period = rate.partition('/')
+    period = period.strip().lower()
+    multiplier, unit = 1, period
+    digits = ''.join(ch for ch in period if ch.isdigit())
+    if digits:
+        multiplier, unit = int(digits), period[len(digits):]
+    if unit.endswith('s') and unit not in PERIODS:
+        unit = unit[:-1]
+    return int(count), multiplier * PERIODS[unit]
+
+
+class MemoryRateLimitStore:
+    """Counters in a dict guarded by a lock; local to the worker process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.next_purge = 0
+
+    def incr(self, key, ttl):
+        now = time.monotonic()
+        with self.lock:
+            if now >= self.next_purge:
+                self.counters = {
+                    k: v for k, v in self.counters.items() if v[1] > now
+                }
+                self.next_purge = now + 60
+            count, expires = self.counters.get(key, (0, now + ttl))
+            if expires <= now:
+                count, expires = 0, now + ttl
+            self.counters[key] = (count + 1, expires)
+            return count + 1
+
+    def get(self, key):
+        with self.lock:
+            count, expires = self.counters.get(key, (0, 0))
+            return count if expires > time.monotonic() else 0
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+
+class CacheRateLimitStore:
+    """Counters in the Django cache, shared by every worker using it."""
+
+    prefix = 'ratelimit'
+
+    def incr(self, key, ttl):
+        key = f'{self.prefix}:{key}'
+        if cache.add(key, 1, ttl):
+            return 1
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Expired between add and incr.
+            cache.add(key, 0, ttl)
+            return cache.incr(key)
+
+    def get(self, key):
+        return cache.get(f'{self.prefix}:{key}', 0)
+
+    def clear(self):
+        pass
+
+
+STORES = {
+    'memory': MemoryRateLimitStore,
+    'cache': CacheRateLimitStore,
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                name = getattr(settings, 'RATE_LIMIT_STORE', 'cache')
+                if name == 'cache' and not caching.is_shared():
+                    logger.warning(
+                        'RATE_LIMIT_STORE is "cache" but the default cache is process-local; '
+                        'using the memory store, so each worker enforces the limits separately'
+                    )
+                    name = 'memory'
+                _store = STORES[name]()
+    return _store
+
+
+def reset_store():
+    global _store
+    with _store_lock:
+        _store = None
+
+
+@dataclass(frozen=True)
+class Policy:
+    name: str
+    limit: int
+    period: int
+    scope: str = 'auto'
+    methods: tuple = ()
+
+    def applies_to(self, method):
+        return not self.methods or method in self.methods
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    retry_after: int = 0
+
+
+def build_policy(name, spec):
+    limit, period = parse_rate(spec['rate'])
+    methods = tuple(method.upper() for method in spec.get('methods', ()))
+    return Policy(name, limit, period, spec.get('scope', 'auto'), methods)
+
+
+def get_policy(url_name, method):
+    """The policy for a resolved URL name, falling back to the default."""
+    policies = getattr(settings, 'RATE_LIMIT_POLICIES', {})
+    if url_name in policies:
+        policy = build_policy(url_name, policies[url_name])
+        if policy.applies_to(method):
+            return policy
+    default = getattr(settings, 'RATE_LIMIT_DEFAULT', '')
+    if default:
+        return build_policy('default', {'rate': default})
+    return None
+
+
+def check(policy, identity, now=None, store=None):
+    """Count one request for ``identity`` against ``policy``."""
+    store = store or get_store()
+    now = time.time() if now is None else now
+    window = int(now // policy.period)
+    base = f'{policy.name}:{identity}'
+    current = store.incr(f'{base}:{window}', policy.period * 2)
+    previous = store.get(f'{base}:{window - 1}')
+    elapsed = (now % policy.period) / policy.period
+    estimate = previous * (1 - elapsed) + current
+    reset = math.ceil(policy.period - now % policy.period)
+
+    if estimate > policy.limit:
+        # Time until the previous window's weight drops enough to let one
+        # more request through, capped at the end of the current window.
+        if previous:
+            needed = (previous + current - policy.limit) / previous
+            retry_after = math.ceil(max(needed - elapsed, 0) * policy.period)
+        else:
+            retry_after = reset
+        return Decision(False, policy.limit, 0, reset, max(1, min(retry_after, reset)))
+    return Decision(True, policy.limit, max(0, int(policy.limit - estimate)), reset)
@@ -0,0 +1,157 @@
+"""
+Daily incident rollups behind ``SecurityIncidentViewSet.dashboard_data``.
+
+``IncidentDailyRollup`` holds one counter per ``(organization, day,
+severity, status)``. ``api.signals`` moves an incident between counters
+when it is created, changes severity, status or organization, or is
+deleted, so dashboards read at most ``days x severities x statuses`` small
+rows instead of scanning incidents.
+
+``rebuild()`` recomputes a range from the incidents table; it backs the
+``rebuild_incident_rollups`` command and repairs ranges touched by
+``QuerySet.update``, which skips the signals.
+"""
+
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import IncidentDailyRollup, SecurityIncident
+
+DASHBOARD_RANGES = (7, 30, 90, 365)
+SEVERITIES = tuple(value for value, _ in SecurityIncident.SEVERITY_CHOICES)
+STATUSES = tuple(value for value, _ in SecurityIncident.STATUS_CHOICES)
+
+
+def day_of(moment):
+    return timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+
+
+def rollup_key(incident):
+    """The counter ``incident`` is counted in, or ``None``."""
+    if incident is None or incident.created_at is None:
+        return None
+    return (incident.organization_id, day_of(incident.created_at), incident.severity, incident.status)
+
+
+def _add(key, amount):
+    organization_id, day, severity, status = key
+    rows = IncidentDailyRollup.objects.filter(
+        organization_id=organization_id, day=day, severity=severity, status=status
+    )
+    if rows.update(count=F('count') + amount) or amount < 0:
+        return
+    try:
+        with transaction.atomic():
+            IncidentDailyRollup.objects.create(
+                organization_id=organization_id, day=day,
+                severity=severity, status=status, count=amount,
+            )
+    except IntegrityError:
+        # Created concurrently; the row exists now.
+        rows.update(count=F('count') + amount)
+
+
+def move(before, after):
+    """Move one incident from counter ``before`` to ``after`` (either may be ``None``)."""
+    if before == after:
+        return
+    if before is not None:
+        _add(before, -1)
+    if after is not None:
+        _add(after, 1)
+
+
+def apply(deltas):
+    """Add ``{counter key: amount}`` to the counters (one query per key)."""
+    for key, amount in deltas.items():
+        if amount:
+            _add(key, amount)
+
+
+@transaction.atomic
+def rebuild(organization_id=None, start=None, end=None):
+    """
+    Recompute the rollups of one or all organizations for days in
+    ``[start, end]`` (open-ended when omitted). Returns the rows written.
+    """
+    rollups = IncidentDailyRollup.objects.all()
+    incidents = SecurityIncident.objects.order_by()
+    if organization_id is not None:
+        rollups = rollups.filter(organization_id=organization_id)
+        incidents = incidents.filter(organization_id=organization_id)
+    incidents = incidents.annotate(day=TruncDate('created_at'))
+    if start is not None:
+        rollups = rollups.filter(day__gte=start)
+        incidents = incidents.filter(day__gte=start)
+    if end is not None:
+        rollups = rollups.filter(day__lte=end)
+        incidents = incidents.filter(day__lte=end)
+
+    rollups.delete()
+    groups = incidents.values('organization_id', 'day', 'severity', 'status').annotate(
+        total=Count('pk')
+    )
+    rows = IncidentDailyRollup.objects.bulk_create(
+        (
+            IncidentDailyRollup(
+                organization_id=group['organization_id'], day=group['day'],
+                severity=group['severity'], status=group['status'], count=group['total'],
+            )
+            for group in groups.iterator()
+        ),
+        batch_size=1000,
+    )
+    return len(rows)
+
+
+def repair(incidents):
+    """
+    Rebuild the organization/day ranges covered by ``incidents``.
+
+    Call it after a ``QuerySet.update`` that leaves organizations and
+    creation dates alone (such as a bulk status change).
+    """
+    spans = (
+        incidents.order_by()
+        .annotate(day=TruncDate('created_at'))
+        .values('organization_id')
+        .annotate(first=Min('day'), last=Max('day'))
+    )
+    for span in spans:
+        rebuild(span['organization_id'], span['first'], span['last'])
+
+
+def get_dashboard(organization_id, days, today=None):
+    """Trend and breakdowns for the last ``days`` days, from the rollups alone."""
+    today = today or timezone.localdate()
+    start = today - timedelta(days=days - 1)
+    rows = IncidentDailyRollup.objects.filter(
+        organization_id=organization_id, day__gte=start, day__lte=today, count__gt=0
+    ).values_list('day', 'severity', 'status', 'count')
+
+    by_day = Counter()
+    by_status = Counter()
+    by_severity = Counter()
+    for day, severity, status, count in rows:
+        by_day[day] += count
+        by_status[status] += count
+        by_severity[severity] += count
+
+    return {
+        'incidents_by_status': [
+            {'status': status, 'count': by_status[status]} for status in STATUSES if by_status[status]
+        ],
+        'incidents_by_severity': [
+            {'severity': severity, 'count': by_severity[severity]}
+            for severity in SEVERITIES if by_severity[severity]
+        ],
+        'incident_trend': [
+            {'day': start + timedelta(days=offset), 'count': by_day[start + timedelta(days=offset)]}
+            for offset in range(days)
+        ],
+    }
@@ -0,0 +1,353 @@
+"""
+Scan checks: a registry of checks and the pipeline running them.
+
+A check is a function registered with ``@register(name, scan_types=...)``.
+It receives a plain-dict snapshot of the scanned ``AIModel`` (see
+``snapshot()``) and returns findings built with ``finding()``. The modules
+in ``SCAN_CHECK_MODULES`` are imported on first use to register their
+checks; ``api.builtin_checks`` holds offline checks that only look at the
+model's own metadata.
+
+The pipeline of a scan type is every check registered for it, in name order
+(``custom`` scans run every check). ``run_scan`` is the ``SCAN_RUNNER`` of
+``api.scan_queue``:
+
+- Checks run concurrently, each in its own thread or, for
+  ``executor='process'``, its own process, at most ``SCAN_CHECK_THREADS``
+  and ``SCAN_CHECK_PROCESSES`` at a time. A check running past its
+  ``timeout`` (default ``SCAN_CHECK_TIMEOUT`` seconds) is recorded as timed
+  out; its process is killed, its thread abandoned.
+- Every finished check is saved straight away: its findings as
+  ``ScanFinding`` rows (``api.scan_findings``), its status and the counts on
+  the scan. A scan re-queued after its worker died keeps the checks that
+  completed and runs only the rest.
+- Results merge deterministically: findings are sorted by severity, rule,
+  location and message, whatever order the checks finished in.
+
+``findings`` of a scan run by the pipeline::
+
+    {
+        "pipeline": ["check", ...],
+        "checks": {"check": {"status": "ok|error|timeout|pending", "findings": 0, "error": ""}},
+        "summary": {"critical": 0, "high": 0, "medium": 0, "low": 0, "info": 0},
+        "complete": true,
+    }
+
+``merge()`` also returns the sorted ``findings`` list; it is stored as rows,
+not in the scan's ``findings``.
+"""
+
+import importlib
+import multiprocessing
+import threading
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+from django.conf import settings
+from django.db import transaction
+
+from . import events, metrics, scan_findings
+
+SEVERITIES = ('critical', 'high', 'medium', 'low', 'info')
+EXECUTORS = ('thread', 'process')
+
+OK = 'ok'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+PENDING = 'pending'
+
+# How often a waiting pipeline checks whether its scan was cancelled.
+CANCEL_POLL_SECONDS = 0.5
+
+
+def get_check_timeout():
+    return getattr(settings, 'SCAN_CHECK_TIMEOUT', 30.0)
+
+
+def get_limits():
+    return {
+        'thread': max(1, getattr(settings, 'SCAN_CHECK_THREADS', 4)),
+        'process': max(1, getattr(settings, 'SCAN_CHECK_PROCESSES', 2)),
+    }
+
+
+class Check:
+    def __init__(self, name, func, scan_types=(), executor='thread', timeout=None):
+        if executor not in EXECUTORS:
+            raise ValueError(f'Unknown executor {executor!r} for check {name}')
+        self.name = name
+        self.func = func
+        self.scan_types = tuple(scan_types)
+        self.executor = executor
+        self._timeout = timeout
+
+    @property
+    def timeout(self):
+        return self._timeout if self._timeout is not None else get_check_timeout()
+
+    def __repr__(self):
+        return f'<Check {self.name}>'
+
+
+CHECKS = {}
+
+_loaded = False
+_load_lock = threading.Lock()
+
+
+def register(name, scan_types=(), executor='thread', timeout=None):
+    """Register the decorated function as the check ``name``."""
+    def decorator(func):
+        if name in CHECKS:
+            raise ValueError(f'Check {name} is already registered')
+        CHECKS[name] = Check(name, func, scan_types, executor, timeout)
+        return func
+    return decorator
+
+
+def load_checks():
+    global _loaded
+    if _loaded:
+        return
+    with _load_lock:
+        if not _loaded:
+            for module in getattr(settings, 'SCAN_CHECK_MODULES', ['api.builtin_checks']):
+                importlib.import_module(module)
+            _loaded = True
+
+
+def get_pipeline(scan_type):
+    """The checks a ``scan_type`` scan runs, in name order."""
+    load_checks()
+    return [
+        check for name, check in sorted(CHECKS.items())
+        if scan_type == 'custom' or scan_type in check.scan_types
+    ]
+
+
+def finding(rule_id, severity, message, location=''):
+    if severity not in SEVERITIES:
+        raise ValueError(f'Unknown severity {severity!r}')
+    return {'rule_id': rule_id, 'severity': severity, 'message': message, 'location': location}
+
+
+def snapshot(model):
+    """The ``AIModel`` as the plain dict checks receive."""
+    return {
+        'id': model.pk,
+        'name': model.name,
+        'model_type': model.model_type,
+        'version': model.version,
+        'description': model.description,
+        'status': model.status,
+        'organization_id': model.organization_id,
+    }
+
+
+def sort_key(item):
+    return (
+        SEVERITIES.index(item['severity']), item['rule_id'], item['location'],
+        item['message'], item.get('check', ''),
+    )
+
+
+def normalize(check, raw):
+    """Validated findings of ``check``, in merge order."""
+    findings = []
+    for item in raw:
+        if item.get('severity') not in SEVERITIES or not item.get('rule_id'):
+            raise ValueError(f'Invalid finding {item!r}')
+        findings.append({
+            'check': check.name,
+            'rule_id': str(item['rule_id']),
+            'severity': item['severity'],
+            'message': str(item.get('message', '')),
+            'location': str(item.get('location', '')),
+        })
+    return sorted(findings, key=sort_key)
+
+
+# Execution.
+
+def _call(func, target, writer):
+    try:
+        result = (OK, list(func(target)))
+    except Exception as exc:
+        result = (ERROR, f'{type(exc).__name__}: {exc}')
+    try:
+        writer.send(result)
+        writer.close()
+    except OSError:
+        # The pipeline gave up on this check (timeout or cancellation).
+        pass
+
+
+def _process_context():
+    # Fork where available: registered checks are already imported.
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('fork')
+    return multiprocessing.get_context()
+
+
+class Task:
+    """One check running in its own thread or process."""
+
+    def __init__(self, check, target):
+        self.check = check
+        self.reader, writer = multiprocessing.Pipe(duplex=False)
+        self.started = time.monotonic()
+        self.deadline = self.started + check.timeout
+        args = (check.func, target, writer)
+        if check.executor == 'process':
+            self.worker = _process_context().Process(target=_call, args=args, daemon=True)
+            self.worker.start()
+            # The child holds the only writer: EOF means it died.
+            writer.close()
+        else:
+            self.worker = threading.Thread(target=_call, args=args, daemon=True, name=f'check-{check.name}')
+            self.worker.start()
+
+    def result(self):
+        try:
+            status, value = self.reader.recv()
+        except EOFError:
+            status, value = ERROR, 'Check process exited without a result'
+        self.close()
+        if status == OK:
+            try:
+                return OK, normalize(self.check, value), ''
+            except (TypeError, ValueError, AttributeError) as exc:
+                return ERROR, [], str(exc)
+        return status, [], value
+
+    def abandon(self):
+        if self.check.executor == 'process':
+            self.worker.kill()
+        self.close()
+
+    def close(self):
+        self.reader.close()
+        if self.check.executor == 'process':
+            self.worker.join()
+            self.worker.close()
+
+
+def run_checks(target, checks, on_result=None, cancelled=None):
+    """
+    Run ``checks`` against ``target`` concurrently and return
+    ``{name: (status, findings, error)}``. ``on_result(name, result)`` is
+    called as each check ends; once ``cancelled`` is set, running checks
+    are abandoned and the results so far returned.
+    """
+    limits = get_limits()
+    queues = {executor: deque(check for check in checks if check.executor == executor) for executor in EXECUTORS}
+    running = {}
+    results = {}
+
+    def done(task, result):
+        results[task.check.name] = result
+        if metrics.is_enabled():
+            metrics.SCAN_CHECKS.inc(task.check.name, result[0])
+            metrics.SCAN_CHECK_DURATION.observe(time.monotonic() - task.started, task.check.name)
+        if on_result is not None:
+            on_result(task.check.name, result)
+
+    try:
+        while running or any(queues.values()):
+            for executor, queue in queues.items():
+                while queue and sum(task.check.executor == executor for task in running.values()) < limits[executor]:
+                    task = Task(queue.popleft(), target)
+                    running[task.reader] = task
+            if cancelled is not None and cancelled.is_set():
+                break
+
+            now = time.monotonic()
+            timeout = min(task.deadline for task in running.values()) - now
+            if cancelled is not None:
+                timeout = min(timeout, CANCEL_POLL_SECONDS)
+            for reader in wait(list(running), max(timeout, 0)):
+                task = running.pop(reader)
+                done(task, task.result())
+
+            now = time.monotonic()
+            for reader, task in list(running.items()):
+                if task.deadline <= now:
+                    del running[reader]
+                    task.abandon()
+                    done(task, (TIMEOUT, [], f'Timed out after {task.check.timeout:g} s'))
+    finally:
+        for task in running.values():
+            task.abandon()
+    return results
+
+
+# Results.
+
+def merge(pipeline, results, complete=False):
+    """The scan ``findings`` for ``results`` of the ``pipeline``'s checks."""
+    checks = {}
+    findings = []
+    for check in pipeline:
+        status, check_findings, error = results.get(check.name, (PENDING, [], ''))
+        checks[check.name] = {'status': status, 'findings': len(check_findings), 'error': error}
+        findings.extend(check_findings)
+    findings.sort(key=sort_key)
+    summary = dict.fromkeys(SEVERITIES, 0)
+    for item in findings:
+        summary[item['severity']] += 1
+    return {
+        'pipeline': [check.name for check in pipeline],
+        'checks': checks,
+        'findings': findings,
+        'summary': summary,
+        'complete': complete,
+    }
+
+
+def completed_results(pipeline, scan):
+    """The results of checks of ``scan`` that completed in an earlier attempt, with their stored findings."""
+    findings = scan.findings
+    if not isinstance(findings, dict) or not isinstance(findings.get('checks'), dict):
+        return {}
+    names = {check.name for check in pipeline}
+    completed = [
+        name for name, state in findings['checks'].items()
+        if name in names and isinstance(state, dict) and state.get('status') == OK
+    ]
+    if not completed:
+        return {}
+    return {
+        name: (OK, check_findings, '')
+        for name, check_findings in scan_findings.by_check(scan.pk, completed).items()
+    }
+
+
+def run_scan(scan, job):
+    """Run the pipeline of ``scan``'s type against its target model."""
+    from . import scan_queue
+
+    pipeline = get_pipeline(scan.scan_type)
+    results = completed_results(pipeline, scan)
+    remaining = [check for check in pipeline if check.name not in results]
+
+    organization_id = scan.target_model.organization_id
+
+    def save(name, result):
+        results[name] = result
+        merged = scan_findings.split(merge(pipeline, results))[0]
+        status, check_findings, error = result
+        with transaction.atomic():
+            saved = scan_queue.save_progress(job, merged, **scan_findings.summary_counts(merged['summary']))
+            if saved:
+                scan_findings.store(scan.pk, scan_findings.prepare(check_findings), checks=[name])
+        if saved:
+            events.scan_progress(
+                scan.pk, organization_id, check=name, status=status, error=error,
+                findings=check_findings, summary=merged['summary'],
+            )
+
+    run_checks(snapshot(scan.target_model), remaining, on_result=save, cancelled=job.cancelled)
+    job.check()
+    # Every finding is stored by now: return the metadata only.
+    return scan_findings.split(merge(pipeline, results, complete=True))[0]
@@ -0,0 +1,126 @@
+"""
+Per-finding storage for security scans.
+
+A scan's findings are ``ScanFinding`` rows, one per finding, inserted with
+``bulk_create`` in batches of ``BATCH_SIZE``. The scan row keeps the counts
+(``total_findings`` and ``<severity>_findings``) and, in ``findings``, only
+the run's metadata (pipeline, per-check status, summary). A scan with
+thousands of findings therefore stays small in scan lists. Its findings
+are paged from ``GET /api/v1/scans/<id>/findings/``, most severe first,
+filtered with:
+
+- ``?severity=critical,high``: one or more severities;
+- ``?rule_id=``, ``?check=``, ``?location=``: exact matches.
+
+Each filter, and the default order, is served by an index on
+``(scan, ...)``.
+
+Writers (the scan pipeline, custom ``SCAN_RUNNER``s, ``complete_scan``)
+hand findings over as before: a dict whose ``findings`` key holds the list,
+or a bare list. ``split()`` separates the list from the metadata.
+"""
+
+from collections import Counter
+
+from rest_framework.exceptions import ValidationError
+
+from .models import ScanFinding
+
+SEVERITIES = tuple(value for value, _ in ScanFinding.SEVERITY_CHOICES)
+COUNT_FIELDS = ('total_findings', *(f'{severity}_findings' for severity in SEVERITIES))
+# The merge order of api.scan_checks.
+ORDERING = ('severity_rank', 'rule_id', 'location', 'message', 'check_name', 'id')
+BATCH_SIZE = 1000
+
+
+def split(findings):
+    """``(metadata, list of findings or None)`` of a runner's or client's ``findings``."""
+    if isinstance(findings, list):
+        return {}, findings
+    if not isinstance(findings, dict):
+        raise ValueError('findings must be an object or a list')
+    if 'findings' not in findings:
+        return findings, None
+    items = findings['findings']
+    if not isinstance(items, list):
+        raise ValueError('findings.findings must be a list')
+    return {key: value for key, value in findings.items() if key != 'findings'}, items
+
+
+def prepare(items):
+    """Unsaved ``ScanFinding`` rows for finding dicts; ``ValueError`` on an invalid one."""
+    rows = []
+    for item in items:
+        if not isinstance(item, dict) or item.get('severity') not in SEVERITIES or not item.get('rule_id'):
+            raise ValueError(f'Invalid finding {item!r}')
+        rows.append(ScanFinding(
+            check_name=str(item.get('check', ''))[:100],
+            rule_id=str(item['rule_id'])[:200],
+            severity=item['severity'],
+            severity_rank=SEVERITIES.index(item['severity']),
+            message=str(item.get('message', '')),
+            location=str(item.get('location', ''))[:255],
+        ))
+    return rows
+
+
+def counts(rows):
+    """The scan count fields for ``rows``."""
+    return summary_counts(Counter(row.severity for row in rows))
+
+
+def summary_counts(by_severity):
+    """The scan count fields for ``{severity: count}``."""
+    return {
+        'total_findings': sum(by_severity.get(severity, 0) for severity in SEVERITIES),
+        **{f'{severity}_findings': by_severity.get(severity, 0) for severity in SEVERITIES},
+    }
+
+
+def summary(scan):
+    """Counts by severity from the scan row."""
+    return {severity: getattr(scan, f'{severity}_findings') for severity in SEVERITIES}
+
+
+def store(scan_id, rows, checks=None):
+    """
+    Replace the findings of scan ``scan_id`` with ``rows``, or only those
+    reported by ``checks`` when given. Run it in the transaction that
+    updates the scan's counts.
+    """
+    existing = ScanFinding.objects.filter(scan_id=scan_id)
+    if checks is not None:
+        existing = existing.filter(check_name__in=checks)
+    existing.delete()
+    for row in rows:
+        row.scan_id = scan_id
+    ScanFinding.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+def by_check(scan_id, checks):
+    """``{check: [finding dicts]}`` of the stored findings of ``checks``, in merge order."""
+    results = {name: [] for name in checks}
+    rows = (
+        ScanFinding.objects.filter(scan_id=scan_id, check_name__in=checks)
+        .order_by(*ORDERING).values_list('check_name', 'rule_id', 'severity', 'message', 'location')
+    )
+    for check, rule_id, severity, message, location in rows.iterator():
+        results[check].append({
+            'check': check, 'rule_id': rule_id, 'severity': severity, 'message': message, 'location': location,
+        })
+    return results
+
+
+def filter_findings(queryset, params):
+    """``queryset`` narrowed by the findings endpoint's query parameters, in merge order."""
+    severities = [value.strip() for value in params.get('severity', '').split(',') if value.strip()]
+    if severities:
+        unknown = sorted(set(severities) - set(SEVERITIES))
+        if unknown:
+            raise ValidationError({'severity': [f'Unknown severities: {", ".join(unknown)}']})
+        queryset = queryset.filter(severity_rank__in=[SEVERITIES.index(value) for value in severities])
+    for param, field in (('rule_id', 'rule_id'), ('check', 'check_name'), ('location', 'location')):
+        value = params.get(param)
+        if value:
+            queryset = queryset.filter(**{field: value})
+    return queryset.order_by(*ORDERING)
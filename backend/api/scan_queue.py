@@ -0,0 +1,365 @@
+"""
+Database-backed execution queue for security scans.
+
+``start_scan`` queues a scan (``status='queued'``). Worker processes started
+by ``manage.py run_scan_worker`` claim queued scans oldest first, run them
+and record the outcome on the scan row:
+
+- Claiming: on PostgreSQL ``SELECT ... FOR UPDATE SKIP LOCKED`` hands each
+  worker rows no other worker is claiming. Elsewhere (SQLite) a single
+  ``UPDATE ... WHERE pk IN (SELECT ... LIMIT n)`` picks and claims the rows
+  under the database write lock.
+  Every claim writes a fresh ``lease_token``, and every later write by the
+  worker is conditional on it.
+- Leases: a claimed scan is leased for ``SCAN_LEASE_SECONDS``, renewed by a
+  heartbeat thread every ``SCAN_HEARTBEAT_INTERVAL`` seconds.
+  ``requeue_expired()``, run by the worker supervisor, puts scans whose lease
+  ran out (their worker crashed or hung) back in the queue, or fails them
+  once they have been claimed ``SCAN_MAX_ATTEMPTS`` times.
+- Cancellation: ``stop()`` (the ``stop_scan`` action) marks the scan
+  ``stopped`` and clears its lease. The running job's next heartbeat fails
+  and sets ``Job.cancelled``; runners check it between steps and return
+  early. Whatever they return is discarded.
+
+The runner, ``SCAN_RUNNER`` (a dotted path), is called as
+``runner(scan, job)`` and returns the findings dict. A list under its
+``findings`` key replaces the scan's ``ScanFinding`` rows
+(``api.scan_findings``); without one, the rows stored so far are kept.
+
+Queue writes are ``UPDATE`` statements, which send no signals, so the
+running-scan counter of the materialized organization statistics, scan
+durations and their rollups (``api.scan_stats``) are maintained, and
+``scan.status`` events are published, here.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from . import events, metrics, scan_findings, scan_stats, statistics
+from .models import SecurityScan
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+STOPPED = 'stopped'
+
+
+def get_lease_seconds():
+    return getattr(settings, 'SCAN_LEASE_SECONDS', 60)
+
+
+def get_heartbeat_interval():
+    return getattr(settings, 'SCAN_HEARTBEAT_INTERVAL', get_lease_seconds() / 3)
+
+
+def get_max_attempts():
+    return getattr(settings, 'SCAN_MAX_ATTEMPTS', 3)
+
+
+def get_runner():
+    return import_string(getattr(settings, 'SCAN_RUNNER', 'api.scan_checks.run_scan'))
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def noop_runner(scan, job):
+    """Completes scans without findings (for benchmarking the queue itself)."""
+    return {}
+
+
+class ScanCancelled(Exception):
+    """Raised by ``Job.check()`` once the scan was stopped or its lease lost."""
+
+
+class Job:
+    """A claimed scan and the lease the worker holds on it."""
+
+    def __init__(self, scan, token):
+        self.scan = scan
+        self.token = token
+        self.cancelled = threading.Event()
+        self.done = False
+
+    def check(self):
+        if self.cancelled.is_set():
+            raise ScanCancelled(self.scan.pk)
+
+
+def _adjust_running(scan_ids, sign):
+    """Move the materialized running-scan counters of ``scan_ids`` by ``sign``."""
+    if not scan_ids or not statistics.is_materialized():
+        return
+    counts = Counter(
+        SecurityScan.objects.filter(pk__in=scan_ids).values_list('target_model__organization_id', flat=True)
+    )
+    change = {organization_id: {'running_scans': count} for organization_id, count in counts.items()}
+    if sign > 0:
+        statistics.apply_change({}, change)
+    else:
+        statistics.apply_change(change, {})
+
+
+def enqueue(scan):
+    """Queue a pending ``scan``; False if it is no longer pending."""
+    now = timezone.now()
+    queued = SecurityScan.objects.filter(pk=scan.pk, status='pending').update(
+        status=QUEUED, queued_at=now, error='', updated_at=now,
+    )
+    if queued:
+        scan.status, scan.queued_at, scan.error, scan.updated_at = QUEUED, now, '', now
+        events.scan_status(scan.pk, events.scan_organization_id(scan), QUEUED, queued_at=now)
+    return bool(queued)
+
+
+def claim(worker, limit=1):
+    """Lease up to ``limit`` queued scans, oldest first, to ``worker``."""
+    token = uuid.uuid4().hex
+    queued = SecurityScan.objects.filter(status=QUEUED).order_by('queued_at', 'pk').values_list('pk', flat=True)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(queued.select_for_update(skip_locked=True)[:limit])
+            claimed = ids and _mark_claimed(ids, worker, token)
+    else:
+        # No row locks: pick and claim the rows in one UPDATE statement, which
+        # SQLite runs under its database write lock.
+        claimed = _mark_claimed(queued[:limit], worker, token)
+    if not claimed:
+        return []
+    scans = list(
+        SecurityScan.objects.filter(status=RUNNING, lease_token=token)
+        .select_related('target_model').order_by('queued_at', 'pk')
+    )
+    _adjust_running([scan.pk for scan in scans], +1)
+    for scan in scans:
+        events.scan_status(
+            scan.pk, scan.target_model.organization_id, RUNNING,
+            started_at=scan.started_at, attempts=scan.attempts,
+        )
+    return [Job(scan, token) for scan in scans]
+
+
+def _mark_claimed(ids, worker, token):
+    now = timezone.now()
+    return SecurityScan.objects.filter(pk__in=ids, status=QUEUED).update(
+        status=RUNNING, worker=worker, lease_token=token,
+        lease_expires_at=now + timezone.timedelta(seconds=get_lease_seconds()),
+        started_at=Coalesce('started_at', Value(now)), attempts=F('attempts') + 1, updated_at=now,
+    )
+
+
+def _duration_until(now):
+    # From the stored started_at: the caller's copy may be stale. NULL if unset.
+    return scan_stats.duration_ms_until('started_at', Value(now, output_field=DateTimeField()))
+
+
+def renew(job):
+    """Extend ``job``'s lease; False once it was stopped, finished or taken over."""
+    return bool(
+        SecurityScan.objects.filter(pk=job.scan.pk, lease_token=job.token, status=RUNNING).update(
+            lease_expires_at=timezone.now() + timezone.timedelta(seconds=get_lease_seconds())
+        )
+    )
+
+
+def beat(job):
+    """One heartbeat: renew the lease, or cancel the job when it is gone."""
+    if not job.cancelled.is_set() and not renew(job):
+        job.cancelled.set()
+    return not job.cancelled.is_set()
+
+
+def save_progress(job, findings, **fields):
+    """
+    Store partial ``findings`` (and other scan ``fields``) of a running
+    ``job`` and renew its lease, so a re-queued scan resumes from them.
+    Cancels the job if the lease is gone.
+    """
+    now = timezone.now()
+    # updated_at changes with the findings, so conditional GETs see progress.
+    saved = SecurityScan.objects.filter(pk=job.scan.pk, lease_token=job.token, status=RUNNING).update(
+        findings=findings, lease_expires_at=now + timezone.timedelta(seconds=get_lease_seconds()),
+        updated_at=now, **fields,
+    )
+    if not saved:
+        job.cancelled.set()
+    return bool(saved)
+
+
+def finish(job, findings=None, error=''):
+    """Record the outcome of ``job``; False if the worker no longer holds the scan."""
+    rows = None
+    if findings is not None:
+        try:
+            findings, items = scan_findings.split(findings)
+            rows = None if items is None else scan_findings.prepare(items)
+        except ValueError as exc:
+            findings, error = None, error or f'Invalid findings: {exc}'
+    now = timezone.now()
+    fields = {
+        'status': FAILED if error else COMPLETED, 'error': error, 'completed_at': now,
+        'duration_ms': _duration_until(now), 'lease_token': '', 'lease_expires_at': None, 'updated_at': now,
+    }
+    if findings is not None:
+        # Otherwise keep the partial findings saved so far.
+        fields['findings'] = findings
+    if rows is not None:
+        fields.update(scan_findings.counts(rows))
+    with transaction.atomic():
+        finished = SecurityScan.objects.filter(pk=job.scan.pk, lease_token=job.token, status=RUNNING).update(**fields)
+        if finished and rows is not None:
+            scan_findings.store(job.scan.pk, rows)
+    if finished:
+        _adjust_running([job.scan.pk], -1)
+        scan_stats.record_finished([job.scan.pk])
+        events.scan_status(
+            job.scan.pk, job.scan.target_model.organization_id, fields['status'],
+            completed_at=now, error=error, summary=(findings or {}).get('summary'),
+        )
+    return bool(finished)
+
+
+def stop(scan):
+    """Stop a queued or running ``scan``; False if it is neither."""
+    now = timezone.now()
+    fields = {'status': STOPPED, 'completed_at': now, 'lease_token': '', 'lease_expires_at': None, 'updated_at': now}
+    duration = _duration_until(now)
+    scans = SecurityScan.objects.filter(pk=scan.pk)
+    if scans.filter(status=RUNNING).update(duration_ms=duration, **fields):
+        _adjust_running([scan.pk], -1)
+    elif not scans.filter(status=QUEUED).update(duration_ms=duration, **fields):
+        return False
+    scan_stats.record_finished([scan.pk])
+    for name, value in fields.items():
+        setattr(scan, name, value)
+    events.scan_status(scan.pk, events.scan_organization_id(scan), STOPPED, completed_at=now)
+    return True
+
+
+def requeue_expired():
+    """Re-queue (or fail, past ``SCAN_MAX_ATTEMPTS``) scans whose lease expired."""
+    now = timezone.now()
+    expired = SecurityScan.objects.filter(status=RUNNING, lease_expires_at__lt=now)
+    requeued, failed = [], []
+    rows = expired.values_list('pk', 'lease_token', 'attempts', 'target_model__organization_id')
+    for scan_id, token, attempts, organization_id in rows:
+        held = SecurityScan.objects.filter(pk=scan_id, lease_token=token, status=RUNNING)
+        if attempts >= get_max_attempts():
+            error = f'Lease expired after {attempts} attempts'
+            if held.update(
+                status=FAILED, error=error, completed_at=now, duration_ms=_duration_until(now),
+                lease_token='', lease_expires_at=None, updated_at=now,
+            ):
+                failed.append(scan_id)
+                events.scan_status(scan_id, organization_id, FAILED, completed_at=now, error=error)
+        elif held.update(status=QUEUED, worker='', lease_token='', lease_expires_at=None, updated_at=now):
+            requeued.append(scan_id)
+            events.scan_status(scan_id, organization_id, QUEUED, requeued=True)
+    _adjust_running(requeued + failed, -1)
+    scan_stats.record_finished(failed)
+    if requeued or failed:
+        logger.warning('Expired scan leases: %d re-queued, %d failed', len(requeued), len(failed))
+    return requeued, failed
+
+
+class Heartbeat(threading.Thread):
+    """Renews the leases of a batch of jobs until stopped."""
+
+    def __init__(self, jobs):
+        super().__init__(name='scan-heartbeat', daemon=True)
+        self.jobs = jobs
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(get_heartbeat_interval()):
+                for job in self.jobs:
+                    if not job.done:
+                        beat(job)
+        finally:
+            # This thread's own connection.
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def execute(job, runner=None):
+    """Run one claimed ``job`` and record its outcome, which is returned."""
+    scan = job.scan
+    runner = runner or get_runner()
+    started = time.monotonic()
+    findings, error = None, ''
+    try:
+        findings = runner(scan, job)
+    except ScanCancelled:
+        pass
+    except Exception as exc:
+        logger.exception('Scan %s failed', scan.pk)
+        error = f'{type(exc).__name__}: {exc}'
+    job.done = True
+
+    if job.cancelled.is_set() or not finish(job, findings, error):
+        outcome = 'cancelled'
+    else:
+        outcome = FAILED if error else COMPLETED
+    if metrics.is_enabled():
+        metrics.SCAN_JOBS.inc(scan.scan_type, outcome)
+        metrics.SCAN_RUN_DURATION.observe(time.monotonic() - started, scan.scan_type)
+        metrics.ensure_writer()
+    return outcome
+
+
+def work_once(worker=None, limit=1, runner=None):
+    """Claim and run up to ``limit`` scans; returns their outcomes."""
+    jobs = claim(worker or worker_name(), limit)
+    if not jobs:
+        return []
+    if metrics.is_enabled():
+        now = timezone.now()
+        for job in jobs:
+            if job.scan.queued_at is not None:
+                metrics.SCAN_QUEUE_WAIT.observe((now - job.scan.queued_at).total_seconds())
+    heartbeat = Heartbeat(jobs)
+    heartbeat.start()
+    try:
+        return [execute(job, runner) for job in jobs]
+    finally:
+        heartbeat.stop()
+
+
+def work(worker=None, batch=1, poll_interval=None, stop_event=None, burst=False):
+    """
+    Run scans until ``stop_event`` is set, or until the queue is empty when
+    ``burst`` is true. Returns the number of scans run.
+    """
+    worker = worker or worker_name()
+    stop_event = stop_event or threading.Event()
+    if poll_interval is None:
+        poll_interval = getattr(settings, 'SCAN_POLL_INTERVAL', 1.0)
+    count = 0
+    while not stop_event.is_set():
+        outcomes = work_once(worker, batch)
+        count += len(outcomes)
+        if not outcomes:
+            if burst:
+                break
+            stop_event.wait(poll_interval)
+    return count
@@ -0,0 +1,313 @@
+"""
+Scan statistics for ``SecurityScanViewSet.scan_statistics``.
+
+Every scan that has both ``started_at`` and ``completed_at`` stores
+``duration_ms``. Model saves set it in ``api.signals``. The queue's
+``UPDATE`` statements compute it in SQL with ``duration_ms_until()``.
+Both clamp it to 0 when the clocks of the web and worker hosts disagree.
+
+Durations are counted in log-scale buckets, ``BUCKETS_PER_DOUBLING`` per
+doubling. Percentiles interpolate within a bucket, so they are accurate to
+one bucket width, about 9%. Because they come from bucket counts, one
+grouped query over a window gives counts by status and type, plus
+p50/p90/p99 per scan type and per model. Two modes, selected with
+``SCAN_STATS_ROLLUPS``:
+
+- aggregate (default): one ``GROUP BY`` over the organization's scans created
+  in the window, served by the ``(target_model, created_at, duration_ms)``
+  index.
+- rollups: finished scans are read from ``ScanDailyRollup``, one row per
+  organization, day, type, model, status and bucket. Queued and running
+  scans are counted live from the scans table. Reads then cost a few hundred
+  rows whatever the history. ``api.signals`` and ``api.scan_queue`` keep the
+  rollups current. Run ``manage.py rebuild_scan_rollups`` when switching this
+  on, and after moving a model to another organization.
+
+The window is the last ``days`` days, today included, by creation date in
+the project time zone. Percentiles cover completed scans only.
+"""
+
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, Count, F, Func, Sum, Value, When
+from django.db.models.functions import Floor, Greatest, Ln, TruncDate
+from django.utils import timezone
+
+from .models import AIModel, ScanDailyRollup, SecurityScan
+from .rollups import day_of
+
+BUCKETS_PER_DOUBLING = 8
+NO_DURATION = -1
+PERCENTILES = (('p50_ms', 0.5), ('p90_ms', 0.9), ('p99_ms', 0.99))
+STATUSES = tuple(value for value, _ in SecurityScan.STATUS_CHOICES)
+SCAN_TYPES = tuple(value for value, _ in SecurityScan.SCAN_TYPES)
+FINISHED_STATUSES = ('completed', 'failed', 'stopped')
+ACTIVE_STATUSES = tuple(status for status in STATUSES if status not in FINISHED_STATUSES)
+
+_SCALE = BUCKETS_PER_DOUBLING / math.log(2)
+
+
+def is_rollup_enabled():
+    return getattr(settings, 'SCAN_STATS_ROLLUPS', False)
+
+
+class DurationMs(Func):
+    """Whole milliseconds from ``start`` to ``end``."""
+    output_field = BigIntegerField()
+    arg_joiner = ' - '
+    template = 'CAST(ROUND(EXTRACT(EPOCH FROM (%(expressions)s)) * 1000) AS bigint)'
+
+    def __init__(self, start, end, **extra):
+        super().__init__(end, start, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, arg_joiner=') - julianday(',
+            template='CAST(ROUND((julianday(%(expressions)s)) * 86400000) AS integer)', **extra_context
+        )
+
+
+def duration_ms(started_at, completed_at):
+    if started_at is None or completed_at is None:
+        return None
+    return max(0, round((completed_at - started_at).total_seconds() * 1000))
+
+
+def duration_ms_until(start_field, end):
+    """``duration_ms()`` as SQL: from column ``start_field`` to ``end``, NULL while it is unset."""
+    # PostgreSQL's GREATEST skips NULLs, so the NULL case is spelled out.
+    return Case(
+        When(**{f'{start_field}__isnull': False}, then=Greatest(DurationMs(start_field, end), Value(0))),
+        default=None, output_field=BigIntegerField(),
+    )
+
+
+def bucket_of(milliseconds):
+    if milliseconds is None:
+        return NO_DURATION
+    return math.floor(math.log(milliseconds + 1) * _SCALE)
+
+
+def bucket_expression():
+    """``bucket_of('duration_ms')`` in SQL; NULL without a duration."""
+    return Floor(Ln(F('duration_ms') + 1) * _SCALE)
+
+
+def percentiles(histogram):
+    """``PERCENTILES`` of ``{bucket: count}``, in milliseconds."""
+    total = sum(histogram.values())
+    if not total:
+        return {name: None for name, _ in PERCENTILES}
+    buckets = sorted(histogram.items())
+    values = {}
+    for name, quantile in PERCENTILES:
+        rank = quantile * total
+        cumulative = 0
+        for bucket, count in buckets:
+            if cumulative + count >= rank:
+                fraction = (rank - cumulative) / count
+                values[name] = round(2 ** ((bucket + fraction) / BUCKETS_PER_DOUBLING) - 1, 1)
+                break
+            cumulative += count
+    return values
+
+
+def window_start(days, today=None):
+    return (today or timezone.localdate()) - timedelta(days=days - 1)
+
+
+# Rollup maintenance.
+
+def rollup_entry(scan):
+    """``(rollup key, duration)`` of a finished ``scan``, or ``None``."""
+    if scan is None or scan.status not in FINISHED_STATUSES or scan.created_at is None:
+        return None
+    return _entry(
+        scan.target_model.organization_id, scan.created_at, scan.scan_type,
+        scan.target_model_id, scan.status, scan.duration_ms,
+    )
+
+
+def _entry(organization_id, created_at, scan_type, target_model_id, status, milliseconds):
+    key = (organization_id, day_of(created_at), scan_type, target_model_id, status, bucket_of(milliseconds))
+    return key, milliseconds or 0
+
+
+def _add(key, count, total):
+    organization_id, day, scan_type, target_model_id, status, bucket = key
+    rows = ScanDailyRollup.objects.filter(
+        organization_id=organization_id, day=day, scan_type=scan_type,
+        target_model_id=target_model_id, status=status, bucket=bucket,
+    )
+    if rows.update(count=F('count') + count, duration_ms_total=F('duration_ms_total') + total) or count < 0:
+        return
+    try:
+        with transaction.atomic():
+            ScanDailyRollup.objects.create(
+                organization_id=organization_id, day=day, scan_type=scan_type, target_model_id=target_model_id,
+                status=status, bucket=bucket, count=count, duration_ms_total=total,
+            )
+    except IntegrityError:
+        # Created concurrently; the row exists now.
+        rows.update(count=F('count') + count, duration_ms_total=F('duration_ms_total') + total)
+
+
+def move(before, after):
+    """Move one scan from rollup entry ``before`` to ``after`` (either may be ``None``)."""
+    if before == after:
+        return
+    if before is not None:
+        _add(before[0], -1, -before[1])
+    if after is not None:
+        _add(after[0], 1, after[1])
+
+
+def record_finished(scan_ids):
+    """Count scans that ``QuerySet.update`` just finished into the rollups."""
+    if not scan_ids or not is_rollup_enabled():
+        return
+    rows = SecurityScan.objects.filter(pk__in=scan_ids, status__in=FINISHED_STATUSES).values_list(
+        'target_model__organization_id', 'created_at', 'scan_type', 'target_model_id', 'status', 'duration_ms',
+    )
+    counts, totals = Counter(), Counter()
+    for row in rows:
+        key, milliseconds = _entry(*row)
+        counts[key] += 1
+        totals[key] += milliseconds
+    for key, count in counts.items():
+        _add(key, count, totals[key])
+
+
+@transaction.atomic
+def rebuild(organization_id=None, start=None, end=None):
+    """
+    Recompute the rollups of one or all organizations for days in
+    ``[start, end]`` (open-ended when omitted). Returns the rows written.
+    """
+    rollups = ScanDailyRollup.objects.all()
+    scans = SecurityScan.objects.filter(status__in=FINISHED_STATUSES).order_by()
+    if organization_id is not None:
+        rollups = rollups.filter(organization_id=organization_id)
+        scans = scans.filter(target_model__organization_id=organization_id)
+    scans = scans.annotate(day=TruncDate('created_at'))
+    if start is not None:
+        rollups = rollups.filter(day__gte=start)
+        scans = scans.filter(day__gte=start)
+    if end is not None:
+        rollups = rollups.filter(day__lte=end)
+        scans = scans.filter(day__lte=end)
+
+    rollups.delete()
+    groups = scans.annotate(bucket=bucket_expression()).values(
+        'target_model__organization_id', 'day', 'scan_type', 'target_model_id', 'status', 'bucket',
+    ).annotate(total=Count('pk'), duration_total=Sum('duration_ms'))
+    rows = ScanDailyRollup.objects.bulk_create(
+        (
+            ScanDailyRollup(
+                organization_id=group['target_model__organization_id'], day=group['day'],
+                scan_type=group['scan_type'], target_model_id=group['target_model_id'], status=group['status'],
+                bucket=NO_DURATION if group['bucket'] is None else int(group['bucket']),
+                count=group['total'], duration_ms_total=group['duration_total'] or 0,
+            )
+            for group in groups.iterator()
+        ),
+        batch_size=1000,
+    )
+    return len(rows)
+
+
+# Reading.
+
+GROUP_FIELDS = ('scan_type', 'status', 'target_model_id', 'target_model__name')
+
+
+def aggregate_rows(organization_id, start):
+    """Counts by type, status, model and bucket of the scans created since ``start``, in one query."""
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    return (
+        SecurityScan.objects.filter(target_model__organization_id=organization_id, created_at__gte=since)
+        .order_by()
+        .annotate(bucket=bucket_expression())
+        .values(*GROUP_FIELDS, 'bucket')
+        .annotate(count=Count('pk'), duration_total=Sum('duration_ms'))
+    )
+
+
+def rollup_rows(organization_id, start):
+    """The same rows: finished scans from the rollups, the others from the scans table."""
+    since = timezone.make_aware(datetime.combine(start, time.min))
+    finished = (
+        ScanDailyRollup.objects.filter(organization_id=organization_id, day__gte=start, count__gt=0)
+        .order_by()
+        .values(*GROUP_FIELDS, 'bucket')
+        .annotate(count=Sum('count'), duration_total=Sum('duration_ms_total'))
+    )
+    active = (
+        # Written so the planner starts from the few unfinished scans (the
+        # status indexes) rather than from every scan of the window.
+        SecurityScan.objects.filter(
+            status__in=ACTIVE_STATUSES, created_at__gte=since,
+            target_model__in=AIModel.objects.filter(organization_id=organization_id),
+        )
+        .order_by()
+        .values(*GROUP_FIELDS)
+        .annotate(count=Count('pk'), duration_total=Sum('duration_ms'))
+    )
+    return [*finished, *active]
+
+
+def get_statistics(organization_id, days, today=None):
+    start = window_start(days, today)
+    use_rollups = is_rollup_enabled()
+    rows = rollup_rows(organization_id, start) if use_rollups else aggregate_rows(organization_id, start)
+
+    by_status = Counter()
+    by_type = Counter()
+    type_histograms = defaultdict(Counter)
+    model_histograms = defaultdict(Counter)
+    model_names = {}
+    completed_count = completed_total = 0
+    for row in rows:
+        count = row['count']
+        by_status[row['status']] += count
+        by_type[row['scan_type']] += count
+        bucket = row.get('bucket')
+        if row['status'] != 'completed' or bucket is None or bucket == NO_DURATION:
+            continue
+        bucket = int(bucket)
+        type_histograms[row['scan_type']][bucket] += count
+        model_histograms[row['target_model_id']][bucket] += count
+        model_names[row['target_model_id']] = row['target_model__name']
+        completed_count += count
+        completed_total += row['duration_total'] or 0
+
+    return {
+        'days': days,
+        'source': 'rollups' if use_rollups else 'scans',
+        'total_scans': sum(by_status.values()),
+        'scans_by_status': [
+            {'status': status, 'count': by_status[status]} for status in STATUSES if by_status[status]
+        ],
+        'scans_by_type': [
+            {'scan_type': scan_type, 'count': by_type[scan_type]} for scan_type in SCAN_TYPES if by_type[scan_type]
+        ],
+        'average_duration_ms': round(completed_total / completed_count, 1) if completed_count else None,
+        'durations_by_type': [
+            {
+                'scan_type': scan_type, 'completed': sum(type_histograms[scan_type].values()),
+                **percentiles(type_histograms[scan_type]),
+            }
+            for scan_type in SCAN_TYPES if scan_type in type_histograms
+        ],
+        'durations_by_model': [
+            {
+                'target_model': model_id, 'name': model_names[model_id],
+                'completed': sum(histogram.values()), **percentiles(histogram),
+            }
+            for model_id, histogram in sorted(model_histograms.items())
+        ],
+    }
@@ -1,61 +1,148 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.utils import timezone
 from .models import (
     Organization,
     UserProfile,
     SecurityIncident,
     AIModel,
     SecurityScan,
+    ScanFinding,
     AuditLog
 )
+from .bulk import RESOLVED_STATUSES, can_transition
+from .expansion import CompactRelatedField, ExpandableSerializerMixin
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
-        fields = "__all__"
+        fields = ['id', 'username', 'email', 'first_name', 'last_name']
         ref_name = "ApiUserSerializer"
 
-class OrganizationSerializer(serializers.ModelSerializer):
+class OrganizationSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Organization
         fields = '__all__'
 
-class AIModelSerializer(serializers.ModelSerializer):
-    organization = OrganizationSerializer(read_only=True)
+class AIModelSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    organization = CompactRelatedField()
 
     class Meta:
         model = AIModel
         fields = '__all__'
+        expandable_fields = {'organization': OrganizationSerializer}
 
-class SecurityScanSerializer(serializers.ModelSerializer):
-    target_model = AIModelSerializer(read_only=True)
-    created_by = UserSerializer(read_only=True)
+class SecurityScanSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    target_model = CompactRelatedField()
+    created_by = CompactRelatedField(display_field='username')
 
     class Meta:
         model = SecurityScan
-        fields = '__all__'
+        exclude = ['lease_token']
+        # The scan queue owns the lifecycle: status and timestamps change
+        # through start/stop/complete, never through a plain update.
+        read_only_fields = [
+            'status', 'started_at', 'completed_at', 'queued_at', 'attempts', 'worker', 'lease_expires_at', 'error',
+            'duration_ms', 'total_findings', 'critical_findings', 'high_findings', 'medium_findings', 'low_findings', 'info_findings',
+        ]
+        expandable_fields = {'target_model': AIModelSerializer, 'created_by': UserSerializer}
+        list_deferred_fields = ['findings']
+
+    def validate_findings(self, value):
+        if isinstance(value, list) or (isinstance(value, dict) and 'findings' in value):
+            raise serializers.ValidationError('Findings are recorded with complete_scan.')
+        return value
+
+class ScanFindingSerializer(serializers.ModelSerializer):
+    check = serializers.CharField(source='check_name', read_only=True)
 
-class UserProfileSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
-    organization = OrganizationSerializer(read_only=True)
+    class Meta:
+        model = ScanFinding
+        fields = ['id', 'check', 'rule_id', 'severity', 'message', 'location']
+
+class UserProfileSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    user = CompactRelatedField(display_field='username')
+    organization = CompactRelatedField()
 
     class Meta:
         model = UserProfile
         fields = '__all__'
+        expandable_fields = {'user': UserSerializer, 'organization': OrganizationSerializer}
 
-class SecurityIncidentSerializer(serializers.ModelSerializer):
-    organization = OrganizationSerializer(read_only=True)
-    affected_model = AIModelSerializer(read_only=True)
-    reported_by = UserSerializer(read_only=True)
-    assigned_to = UserSerializer(read_only=True)
+class SecurityIncidentSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    organization = CompactRelatedField()
+    affected_model = CompactRelatedField()
+    reported_by = CompactRelatedField(display_field='username')
+    assigned_to = CompactRelatedField(display_field='username')
 
     class Meta:
         model = SecurityIncident
         fields = '__all__'
+        read_only_fields = ['resolved_at']
+        expandable_fields = {
+            'organization': OrganizationSerializer,
+            'affected_model': AIModelSerializer,
+            'reported_by': UserSerializer,
+            'assigned_to': UserSerializer,
+        }
+
+    def validate(self, attrs):
+        # Same rules as api.bulk.transition: allowed moves only; resolving
+        # stamps resolved_at (kept between resolved and closed), reopening
+        # clears it.
+        current = self.instance.status if self.instance is not None else None
+        new = attrs.get('status', current)
+        if current is not None and new != current and not can_transition(current, new):
+            raise serializers.ValidationError({'status': f'Cannot move an incident from {current} to {new}.'})
+        # Only a real change goes into attrs, so audit details list just
+        # the fields that moved.
+        resolved_at = self.instance.resolved_at if self.instance is not None else None
+        if new in RESOLVED_STATUSES and resolved_at is None:
+            attrs['resolved_at'] = timezone.now()
+        elif new not in RESOLVED_STATUSES and resolved_at is not None:
+            attrs['resolved_at'] = None
+        return attrs
 
-class AuditLogSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+class AuditLogSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    user = CompactRelatedField(display_field='username')
+    organization = CompactRelatedField()
 
     class Meta:
         model = AuditLog
-        fields = '__all__' 
\ No newline at end of file
+        fields = '__all__'
+        expandable_fields = {'user': UserSerializer, 'organization': OrganizationSerializer}
+
+
+# Request bodies of the SecurityIncidentViewSet bulk actions (api.bulk).
+
+def get_bulk_max_items():
+    return getattr(settings, 'INCIDENT_BULK_MAX_ITEMS', 100000)
+
+
+class BulkIncidentIdsSerializer(serializers.Serializer):
+    incident_ids = serializers.ListField(child=serializers.IntegerField(min_value=1), allow_empty=False)
+
+    def validate_incident_ids(self, value):
+        if len(value) > get_bulk_max_items():
+            raise serializers.ValidationError(f'At most {get_bulk_max_items()} ids per request.')
+        return value
+
+
+class BulkIncidentStatusSerializer(BulkIncidentIdsSerializer):
+    status = serializers.ChoiceField(choices=SecurityIncident.STATUS_CHOICES)
+
+
+class BulkIncidentAssignSerializer(BulkIncidentIdsSerializer):
+    user_id = serializers.IntegerField(allow_null=True)
+
+
+class BulkIncidentItemSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SecurityIncident
+        fields = ['title', 'description', 'severity', 'status', 'affected_model']
+
+    def validate_affected_model(self, value):
+        if value is not None and value.organization_id != self.context.get('organization_id'):
+            raise serializers.ValidationError('Unknown model.')
+        return value
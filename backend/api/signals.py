@@ -0,0 +1,172 @@
+"""
+Signal handlers keeping derived API data in sync with the models.
+
+Set-based writers (``api.bulk``) run inside ``suspended()`` and update the
+derived tables, and publish their events, once per batch instead. Cached
+tenants (``api.tenancy``) are dropped whatever the writer.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import events, rollups, scan_stats, statistics, tenancy
+from .models import AIModel, Organization, SecurityIncident, SecurityScan, UserProfile
+
+
+_suspended = ContextVar('derived_updates_suspended', default=False)
+
+
+@contextmanager
+def suspended():
+    """Skip the per-row handlers below; the caller maintains the derived tables."""
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+
+
+def _previous(sender, instance):
+    """The stored version of ``instance`` before this save, loaded once per save."""
+    if '_previous' not in instance.__dict__:
+        previous = None
+        if instance.pk is not None and not instance._state.adding:
+            previous = sender.objects.filter(pk=instance.pk).first()
+        instance._previous = previous
+    return instance._previous
+
+
+@receiver(pre_save, sender=SecurityIncident)
+@receiver(pre_save, sender=AIModel)
+@receiver(pre_save, sender=SecurityScan)
+def capture_stats_before_save(sender, instance, raw=False, **kwargs):
+    if raw or _suspended.get() or not statistics.is_materialized():
+        return
+    previous = _previous(sender, instance)
+    instance._stats_before = statistics.contribution(previous) if previous else {}
+
+
+@receiver(post_save, sender=SecurityIncident)
+@receiver(post_save, sender=AIModel)
+@receiver(post_save, sender=SecurityScan)
+def update_stats_after_save(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_stats_before'):
+        return
+    statistics.apply_change(instance.__dict__.pop('_stats_before'), statistics.contribution(instance))
+
+
+@receiver(pre_delete, sender=SecurityIncident)
+@receiver(pre_delete, sender=AIModel)
+@receiver(pre_delete, sender=SecurityScan)
+def capture_stats_before_delete(sender, instance, **kwargs):
+    if statistics.is_materialized() and not _suspended.get():
+        instance._stats_before = statistics.contribution(instance)
+
+
+@receiver(post_delete, sender=SecurityIncident)
+@receiver(post_delete, sender=AIModel)
+@receiver(post_delete, sender=SecurityScan)
+def update_stats_after_delete(sender, instance, **kwargs):
+    if hasattr(instance, '_stats_before'):
+        statistics.apply_change(instance.__dict__.pop('_stats_before'), {})
+
+
+@receiver(pre_save, sender=SecurityIncident)
+def capture_rollup_before_save(sender, instance, raw=False, **kwargs):
+    if not raw and not _suspended.get():
+        instance._rollup_before = rollups.rollup_key(_previous(sender, instance))
+
+
+@receiver(post_save, sender=SecurityIncident)
+def update_rollup_after_save(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_rollup_before'):
+        return
+    rollups.move(instance.__dict__.pop('_rollup_before'), rollups.rollup_key(instance))
+
+
+@receiver(pre_delete, sender=SecurityIncident)
+def capture_rollup_before_delete(sender, instance, **kwargs):
+    if not _suspended.get():
+        instance._rollup_before = rollups.rollup_key(instance)
+
+
+@receiver(post_delete, sender=SecurityIncident)
+def update_rollup_after_delete(sender, instance, **kwargs):
+    if hasattr(instance, '_rollup_before'):
+        rollups.move(instance.__dict__.pop('_rollup_before'), None)
+
+
+@receiver(pre_save, sender=SecurityScan)
+def set_scan_duration(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.duration_ms = scan_stats.duration_ms(instance.started_at, instance.completed_at)
+
+
+@receiver(pre_save, sender=SecurityScan)
+def capture_scan_rollup_before_save(sender, instance, raw=False, **kwargs):
+    if not raw and scan_stats.is_rollup_enabled():
+        instance._scan_rollup_before = scan_stats.rollup_entry(_previous(sender, instance))
+
+
+@receiver(post_save, sender=SecurityScan)
+def update_scan_rollup_after_save(sender, instance, raw=False, **kwargs):
+    if raw or not hasattr(instance, '_scan_rollup_before'):
+        return
+    scan_stats.move(instance.__dict__.pop('_scan_rollup_before'), scan_stats.rollup_entry(instance))
+
+
+@receiver(pre_delete, sender=SecurityScan)
+def capture_scan_rollup_before_delete(sender, instance, **kwargs):
+    if scan_stats.is_rollup_enabled():
+        instance._scan_rollup_before = scan_stats.rollup_entry(instance)
+
+
+@receiver(post_delete, sender=SecurityScan)
+def update_scan_rollup_after_delete(sender, instance, **kwargs):
+    if hasattr(instance, '_scan_rollup_before'):
+        scan_stats.move(instance.__dict__.pop('_scan_rollup_before'), None)
+
+
+@receiver(post_save, sender=SecurityIncident)
+def publish_incident_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw and not _suspended.get():
+        events.incident_changed('created' if created else 'updated', instance)
+
+
+@receiver(post_delete, sender=SecurityIncident)
+def publish_incident_deleted(sender, instance, **kwargs):
+    if not _suspended.get():
+        events.incident_changed('deleted', instance)
+
+
+@receiver(post_save, sender=SecurityScan)
+def publish_scan_saved(sender, instance, raw=False, **kwargs):
+    # Queue transitions are UPDATEs and published by api.scan_queue.
+    if not raw:
+        events.scan_status(
+            instance.pk, events.scan_organization_id(instance), instance.status,
+            scan_type=instance.scan_type, started_at=instance.started_at, completed_at=instance.completed_at,
+        )
+
+
+# Connected last so every handler above sees the same previous version.
+@receiver(post_save, sender=SecurityIncident)
+@receiver(post_save, sender=AIModel)
+@receiver(post_save, sender=SecurityScan)
+def forget_previous(sender, instance, **kwargs):
+    instance.__dict__.pop('_previous', None)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_tenant(sender, instance, **kwargs):
+    tenancy.invalidate(instance.user_id)
+
+
+@receiver(pre_delete, sender=Organization)
+def forget_member_tenants(sender, instance, **kwargs):
+    # Members' profiles are detached with an UPDATE, which sends no signals.
+    tenancy.invalidate(*instance.userprofile_set.values_list('user_id', flat=True))
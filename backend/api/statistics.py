@@ -0,0 +1,170 @@
+"""
+Per-organization statistics for ``OrganizationViewSet.statistics``.
+
+Two modes, selected with ``ORGANIZATION_STATS_MATERIALIZED``:
+
+- aggregate (default): one conditional-aggregation query per table
+  (``Count(filter=Q(...))``), so incidents, models and scans are each
+  scanned once per request.
+- materialized: counters are read from the organization's
+  ``OrganizationStats`` row, which ``api.signals`` keeps current with
+  ``F()`` increments on every incident, model and scan write. Only the
+  rolling ``recent_incidents`` count is computed on read, from the
+  ``(organization, created_at)`` index, so the cost follows the last 30
+  days of incidents rather than the whole history.
+
+Writes that bypass model signals (``QuerySet.update``) must call
+``rebuild()`` for the organizations they touch. A missing row is rebuilt
+on first read.
+"""
+
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import AIModel, Organization, OrganizationStats, SecurityIncident, SecurityScan
+
+ACTIVE_STATUSES = ('open', 'investigating')
+SEVERITIES = tuple(value for value, _ in SecurityIncident.SEVERITY_CHOICES)
+RECENT_DAYS = 30
+
+COUNTER_FIELDS = (
+    'total_incidents',
+    'active_incidents',
+    *(f'{severity}_incidents' for severity in SEVERITIES),
+    'total_models',
+    'running_scans',
+)
+
+
+def is_materialized():
+    return getattr(settings, 'ORGANIZATION_STATS_MATERIALIZED', False)
+
+
+def recent_since(now=None):
+    return (now or timezone.now()) - timedelta(days=RECENT_DAYS)
+
+
+def aggregate_counts(organization_id, now=None):
+    """Every counter plus ``recent_incidents``, one pass per table."""
+    incidents = SecurityIncident.objects.filter(organization_id=organization_id).order_by()
+    counts = incidents.aggregate(
+        total_incidents=Count('pk'),
+        active_incidents=Count('pk', filter=Q(status__in=ACTIVE_STATUSES)),
+        recent_incidents=Count('pk', filter=Q(created_at__gte=recent_since(now))),
+        **{
+            f'{severity}_incidents': Count('pk', filter=Q(severity=severity))
+            for severity in SEVERITIES
+        },
+    )
+    counts['total_models'] = AIModel.objects.filter(organization_id=organization_id).count()
+    counts['running_scans'] = SecurityScan.objects.filter(
+        target_model__organization_id=organization_id, status='running'
+    ).count()
+    return counts
+
+
+def count_recent_incidents(organization_id, now=None):
+    return SecurityIncident.objects.filter(
+        organization_id=organization_id, created_at__gte=recent_since(now)
+    ).count()
+
+
+def rebuild(organization_id):
+    """Recompute an organization's stats row from the source tables."""
+    if not Organization.objects.filter(pk=organization_id).exists():
+        return None
+    counts = aggregate_counts(organization_id)
+    counts.pop('recent_incidents')
+    stats, _ = OrganizationStats.objects.update_or_create(
+        organization_id=organization_id, defaults=counts
+    )
+    return stats
+
+
+def get_statistics(organization, now=None):
+    """The payload of ``GET /organizations/<id>/statistics/``."""
+    if not is_materialized():
+        counts = aggregate_counts(organization.pk, now)
+    else:
+        stats = OrganizationStats.objects.filter(organization=organization).first()
+        if stats is None:
+            stats = rebuild(organization.pk)
+        counts = {field: getattr(stats, field) for field in COUNTER_FIELDS}
+        counts['recent_incidents'] = count_recent_incidents(organization.pk, now)
+
+    return {
+        'total_incidents': counts['total_incidents'],
+        'active_incidents': counts['active_incidents'],
+        'incidents_by_severity': [
+            {'severity': severity, 'count': counts[f'{severity}_incidents']}
+            for severity in SEVERITIES
+            if counts[f'{severity}_incidents']
+        ],
+        'recent_incidents': counts['recent_incidents'],
+        'total_models': counts['total_models'],
+        'active_scans': counts['running_scans'],
+    }
+
+
+# Incremental maintenance. A contribution is what one row adds to the
+# counters: ``{organization_id: {field: amount}}``.
+
+def incident_contribution(incident):
+    fields = {'total_incidents': 1}
+    if incident.status in ACTIVE_STATUSES:
+        fields['active_incidents'] = 1
+    if incident.severity in SEVERITIES:
+        fields[f'{incident.severity}_incidents'] = 1
+    return {incident.organization_id: fields}
+
+
+def model_contribution(model):
+    return {model.organization_id: {'total_models': 1}}
+
+
+def scan_contribution(scan):
+    if scan.status != 'running' or scan.target_model_id is None:
+        return {}
+    if SecurityScan.target_model.is_cached(scan):
+        organization_id = scan.target_model.organization_id
+    else:
+        organization_id = AIModel.objects.filter(
+            pk=scan.target_model_id
+        ).values_list('organization_id', flat=True).first()
+    return {organization_id: {'running_scans': 1}} if organization_id else {}
+
+
+CONTRIBUTIONS = {
+    SecurityIncident: incident_contribution,
+    AIModel: model_contribution,
+    SecurityScan: scan_contribution,
+}
+
+
+def contribution(instance):
+    return CONTRIBUTIONS[type(instance)](instance)
+
+
+def apply_change(before, after):
+    """
+    Move the counters from the ``before`` contribution to ``after``.
+
+    Rows that do not exist yet are left alone; they are rebuilt, including
+    this change, on first read.
+    """
+    deltas = defaultdict(Counter)
+    for organization_id, fields in after.items():
+        deltas[organization_id].update(fields)
+    for organization_id, fields in before.items():
+        deltas[organization_id].subtract(fields)
+
+    for organization_id, fields in deltas.items():
+        changes = {field: F(field) + amount for field, amount in fields.items() if amount}
+        if changes:
+            OrganizationStats.objects.filter(organization_id=organization_id).update(
+                updated_at=timezone.now(), **changes
+            )
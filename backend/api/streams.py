@@ -0,0 +1,336 @@
+"""
+Server-Sent Event streams of ``api.events``.
+
+- ``GET /api/v1/events/``: incident and scan events of the caller's
+  organization.
+- ``GET /api/v1/scans/<id>/events/``: one scan. Its current state comes
+  first, then its state transitions and check progress. The stream ends
+  once the scan has finished.
+
+Under WSGI the views return a ``StreamingHttpResponse`` whose generator
+waits on the subscription, so each open stream holds a worker thread. A
+single-threaded worker (gunicorn's default sync worker) would be pinned
+until its timeout kills it, so there the views answer ``503`` instead. The
+production image runs the ASGI application: ``backend/asgi.py`` hands the
+same URLs to ``EventStreamApp``. Its streams wait on asyncio queues, so one
+event loop holds any number of them. Either way an open stream runs no
+queries. A comment line every ``EVENT_STREAM_KEEPALIVE`` seconds keeps
+proxies from closing idle streams.
+
+``EventSource`` cannot send headers, so streams also accept the JWT access
+token as ``?token=``.
+"""
+
+import asyncio
+import json
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import StreamingHttpResponse
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework import renderers
+from rest_framework.exceptions import APIException, AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from . import events, scan_findings, tenancy
+from .models import SecurityScan
+
+CONTENT_TYPE = 'text/event-stream'
+HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+KEEPALIVE = b': keepalive\n\n'
+TERMINAL_STATUSES = {'completed', 'failed', 'stopped'}
+
+ORGANIZATION_ROUTE = 'event-stream'
+SCAN_ROUTE = 'securityscan-events'
+
+
+def get_keepalive():
+    return getattr(settings, 'EVENT_STREAM_KEEPALIVE', 15)
+
+
+def get_retry_ms():
+    return getattr(settings, 'EVENT_STREAM_RETRY_MS', 3000)
+
+
+# Every stream of a topic gets the same event dict: encode it once. Entries
+# keep their event alive, so an id is not reused while it is cached.
+_encoded = OrderedDict()
+ENCODED_CACHE_SIZE = 256
+
+
+def encode(event):
+    cached = _encoded.get(id(event))
+    if cached is not None and cached[0] is event:
+        return cached[1]
+    data = json.dumps(event, cls=DjangoJSONEncoder)
+    encoded = f'event: {event["type"]}\ndata: {data}\n\n'.encode()
+    _encoded[id(event)] = (event, encoded)
+    while len(_encoded) > ENCODED_CACHE_SIZE:
+        try:
+            _encoded.popitem(last=False)
+        except KeyError:
+            break
+    return encoded
+
+
+def is_scan_finished(event):
+    return event['type'] == 'scan.status' and event['data']['status'] in TERMINAL_STATUSES
+
+
+class StreamsUnavailable(APIException):
+    status_code = 503
+    default_detail = 'Event streams need the ASGI server (backend.asgi) or threaded workers.'
+    default_code = 'streams_unavailable'
+
+
+def check_server(request):
+    """Refuse a stream that would pin a single-threaded WSGI worker."""
+    if request.META.get('wsgi.multithread') is False:
+        raise StreamsUnavailable()
+
+
+class StreamAuthentication(JWTAuthentication):
+    """JWT from the ``Authorization`` header or the ``token`` query parameter."""
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is None:
+            raw_token = request.query_params.get('token')
+            if raw_token:
+                validated_token = self.get_validated_token(raw_token)
+                return self.get_user(validated_token), validated_token
+        return result
+
+
+class EventStreamRenderer(renderers.BaseRenderer):
+    """Lets stream views accept ``text/event-stream``; errors render as JSON."""
+    media_type = CONTENT_TYPE
+    format = 'sse'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class EventStream:
+    """
+    The bytes of one stream: ``initial`` events, then the subscription's
+    events until ``until(event)``. Iterate it from a thread, or with
+    ``async for`` from an event loop for an ``AsyncSubscription``.
+    """
+
+    def __init__(self, subscription, initial=(), until=None):
+        self.subscription = subscription
+        self.initial = list(initial)
+        self.until = until
+        self.finished = False
+
+    def opening(self):
+        chunks = [f'retry: {get_retry_ms()}\n\n'.encode()]
+        for event in self.initial:
+            chunks.append(encode(event))
+            self.finished = self.finished or bool(self.until and self.until(event))
+        return b''.join(chunks)
+
+    def chunk(self, event):
+        prefix = b''
+        if self.subscription.overflowed:
+            # Events were dropped: clients should reload what they show.
+            self.subscription.overflowed = False
+            prefix = encode(self.message('stream.reset', {'reason': 'overflow'}))
+        if event is None:
+            return prefix + KEEPALIVE
+        self.finished = bool(self.until and self.until(event))
+        return prefix + encode(event)
+
+    def message(self, event_type, data):
+        return {'type': event_type, 'organization_id': None, 'scan_id': None,
+                'time': timezone.now().isoformat(), 'data': data}
+
+    def __iter__(self):
+        try:
+            yield self.opening()
+            while not self.finished:
+                yield self.chunk(self.subscription.get(get_keepalive()))
+        finally:
+            self.subscription.close()
+
+    async def __aiter__(self):
+        try:
+            yield self.opening()
+            while not self.finished:
+                yield self.chunk(await self.subscription.get(get_keepalive()))
+        finally:
+            self.subscription.close()
+
+
+def opened(organization_id):
+    return {
+        'type': 'stream.open', 'organization_id': organization_id, 'scan_id': None,
+        'time': timezone.now().isoformat(), 'data': {'organization_id': organization_id},
+    }
+
+
+def scan_state(scan):
+    """The ``scan.status`` event describing ``scan`` as stored now."""
+    scan.refresh_from_db()
+    return {
+        'type': 'scan.status',
+        'organization_id': scan.target_model.organization_id,
+        'scan_id': scan.pk,
+        'time': timezone.now().isoformat(),
+        'data': json.loads(json.dumps({
+            'id': scan.pk, 'status': scan.status, 'scan_type': scan.scan_type,
+            'started_at': scan.started_at, 'completed_at': scan.completed_at,
+            'error': scan.error, 'summary': scan_findings.summary(scan),
+        }, cls=DjangoJSONEncoder)),
+    }
+
+
+def response(stream):
+    # A plain generator: Django would buffer an async iterable under WSGI.
+    streaming = StreamingHttpResponse(iter(stream), content_type=CONTENT_TYPE)
+    for name, value in HEADERS.items():
+        streaming[name] = value
+    return streaming
+
+
+def organization_stream(organization_id):
+    subscription = events.subscribe([events.organization_topic(organization_id)])
+    return response(EventStream(subscription, [opened(organization_id)]))
+
+
+def scan_stream(scan):
+    # Subscribe before reading the state, so no transition falls in between.
+    subscription = events.subscribe([events.scan_topic(scan.pk)])
+    return response(EventStream(subscription, [scan_state(scan)], until=is_scan_finished))
+
+
+class StreamRejected(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class EventStreamApp:
+    """
+    ASGI application serving the event streams from the event loop; every
+    other request goes to ``application``.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            route = self.route(scope['path'])
+            if route is not None:
+                return await self.stream(route, scope, receive, send)
+        return await self.application(scope, receive, send)
+
+    def route(self, path):
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return None
+        if match.url_name == ORGANIZATION_ROUTE:
+            return ORGANIZATION_ROUTE, None
+        if match.url_name == SCAN_ROUTE:
+            return SCAN_ROUTE, match.kwargs.get('pk')
+        return None
+
+    def authorize(self, route, scope):
+        """``(organization_id, scan or None)`` for the request's credentials."""
+        try:
+            raw_token = self.token(scope)
+            if not raw_token:
+                raise StreamRejected(401, 'Authentication credentials were not provided.')
+            authentication = StreamAuthentication()
+            try:
+                user = authentication.get_user(authentication.get_validated_token(raw_token))
+            except (InvalidToken, AuthenticationFailed):
+                raise StreamRejected(401, 'Invalid or expired token.')
+            organization_id = tenancy.load(user.pk).organization_id
+            if organization_id is None:
+                raise StreamRejected(403, 'Your account is not a member of an organization.')
+            name, pk = route
+            if name == ORGANIZATION_ROUTE:
+                return organization_id, None
+            scan = SecurityScan.objects.select_related('target_model').filter(
+                pk=pk, target_model__organization_id=organization_id
+            ).first()
+            if scan is None:
+                raise StreamRejected(404, 'Not found.')
+            return organization_id, scan
+        finally:
+            close_old_connections()
+
+    def token(self, scope):
+        for name, value in scope.get('headers', []):
+            if name == b'authorization':
+                scheme, _, credentials = value.decode('latin-1').partition(' ')
+                if scheme.lower() == 'bearer':
+                    return credentials.strip()
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        return (query.get('token') or [''])[0]
+
+    async def stream(self, route, scope, receive, send):
+        try:
+            organization_id, scan = await sync_to_async(self.authorize)(route, scope)
+        except StreamRejected as rejected:
+            body = json.dumps({'detail': rejected.detail}).encode()
+            await send({
+                'type': 'http.response.start', 'status': rejected.status,
+                'headers': [(b'content-type', b'application/json')],
+            })
+            await send({'type': 'http.response.body', 'body': body})
+            return
+
+        subscription_class = events.AsyncSubscription
+        if scan is None:
+            subscription = events.subscribe([events.organization_topic(organization_id)], subscription_class)
+            stream = EventStream(subscription, [opened(organization_id)])
+        else:
+            subscription = events.subscribe([events.scan_topic(scan.pk)], subscription_class)
+            try:
+                state = await sync_to_async(self.state)(scan)
+            except BaseException:
+                subscription.close()
+                raise
+            stream = EventStream(subscription, [state], until=is_scan_finished)
+
+        headers = [(b'content-type', CONTENT_TYPE.encode())]
+        headers += [(name.lower().encode(), value.encode()) for name, value in HEADERS.items()]
+        await send({'type': 'http.response.start', 'status': 200, 'headers': headers})
+
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+            subscription.wake()
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            async for chunk in stream:
+                if disconnected.is_set():
+                    break
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        finally:
+            watcher.cancel()
+            subscription.close()
+
+    def state(self, scan):
+        try:
+            return scan_state(scan)
+        finally:
+            close_old_connections()
@@ -0,0 +1,105 @@
+"""
+Per-request tenant context: the caller's organization and role.
+
+``get_tenant(request)`` resolves the authenticated user's ``UserProfile``
+once per request and keeps the result on the request. Across requests it is
+cached under ``tenant:<user id>`` for ``TENANT_CACHE_TIMEOUT`` seconds;
+``api.signals`` drops the entry whenever the user's profile is saved or
+deleted, or their organization is deleted. The cache is only used when it
+is shared by every worker (``api.caching``): with a per-process cache the
+other workers would keep a moved user in their old organization, so each
+request reads the profile instead.
+
+``OrganizationScopedQuerysetMixin`` filters a viewset's queryset to the
+caller's organization through ``organization_field``.
+"""
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.exceptions import PermissionDenied
+
+from . import caching
+from .models import UserProfile
+
+Tenant = namedtuple('Tenant', ['organization_id', 'role'])
+
+NO_TENANT = Tenant(None, None)
+
+
+def get_cache_timeout():
+    return getattr(settings, 'TENANT_CACHE_TIMEOUT', 300)
+
+
+def cache_key(user_id):
+    return f'tenant:{user_id}'
+
+
+def invalidate(*user_ids):
+    keys = [cache_key(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    # Again once committed: a concurrent request may have cached the old row.
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def load(user_id):
+    """The tenant of ``user_id`` from the cache or the database."""
+    if not caching.is_shared():
+        return query(user_id)
+    key = cache_key(user_id)
+    cached = cache.get(key)
+    if cached is not None:
+        return Tenant(*cached)
+    tenant = query(user_id)
+    cache.set(key, tuple(tenant), get_cache_timeout())
+    return tenant
+
+
+def query(user_id):
+    row = UserProfile.objects.filter(user_id=user_id).values_list('organization_id', 'role').first()
+    return Tenant(*row) if row else NO_TENANT
+
+
+def get_tenant(request):
+    """The caller's tenant, resolved at most once per request."""
+    request = getattr(request, '_request', request)
+    tenant = getattr(request, 'tenant', None)
+    if tenant is None:
+        user = request.user
+        tenant = load(user.pk) if user.is_authenticated else NO_TENANT
+        request.tenant = tenant
+    return tenant
+
+
+def get_organization_id(request):
+    """The caller's organization id; ``PermissionDenied`` without one."""
+    organization_id = get_tenant(request).organization_id
+    if organization_id is None:
+        raise PermissionDenied('Your account is not a member of an organization.')
+    return organization_id
+
+
+class OrganizationScopedQuerysetMixin:
+    """
+    Restrict ``get_queryset()`` to the caller's organization.
+
+    ``organization_field`` is the lookup from the model to its organization
+    (``'pk'`` for ``Organization`` itself).
+    """
+    organization_field = 'organization'
+
+    @property
+    def tenant(self):
+        return get_tenant(self.request)
+
+    @property
+    def organization_id(self):
+        return get_organization_id(self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if getattr(self, 'swagger_fake_view', False):
+            return queryset.none()
+        return queryset.filter(**{self.organization_field: self.organization_id})
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
-from .views import WhoAmIView
+from .views import EventStreamView, ProfilingStatsView, WhoAmIView
 
 router = DefaultRouter()
 router.register(r'organizations', views.OrganizationViewSet)
@@ -13,5 +13,7 @@ router.register(r'audit-logs', views.AuditLogViewSet, basename='audit-log')
 
 urlpatterns = [
     path('whoami/', WhoAmIView.as_view(), name='whoami'),
+    path('profiling/stats/', ProfilingStatsView.as_view(), name='profiling-stats'),
+    path('events/', EventStreamView.as_view(), name='event-stream'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.shortcuts import render
-from rest_framework import viewsets, permissions, filters, status
+from rest_framework import viewsets, permissions, filters, renderers, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth.models import User
@@ -12,6 +12,7 @@ from .models import (
     SecurityIncident,
     AIModel,
     SecurityScan,
+    ScanFinding,
     AuditLog
 )
 from .serializers import (
@@ -21,22 +22,39 @@ from .serializers import (
     SecurityIncidentSerializer,
     AIModelSerializer,
     SecurityScanSerializer,
-    AuditLogSerializer
+    ScanFindingSerializer,
+    AuditLogSerializer,
+    BulkIncidentAssignSerializer,
+    BulkIncidentIdsSerializer,
+    BulkIncidentItemSerializer,
+    BulkIncidentStatusSerializer,
+    get_bulk_max_items,
 )
 from django.utils import timezone
-from django.db.models import Count, Avg, Q
-from datetime import timedelta
+from django.db import transaction
+from collections import Counter
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
+from .audit import AuditMixin
+from .conditional import ConditionalGetMixin
+from .expansion import ExpandableQuerysetMixin, optimize
+from .exports import ExportMixin
+from .fastpath import FastListMixin
+from .pagination import KeysetPagination
+from .tenancy import OrganizationScopedQuerysetMixin, get_organization_id
+from . import bulk, events, profiling, rollups, scan_findings, scan_queue, scan_stats, streams
+from . import statistics as organization_stats
 
 # Create your views here.
 
-class OrganizationViewSet(viewsets.ModelViewSet):
+class OrganizationViewSet(ExpandableQuerysetMixin, AuditMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing organizations.
     
     Provides CRUD operations for organizations and additional actions for
-    retrieving incidents, models, and statistics.
+    retrieving incidents, models, and statistics. The list is a directory of
+    every organization; retrieving, changing or deleting one, and its detail
+    actions, are limited to the caller's own organization.
     """
     queryset = Organization.objects.all()
     serializer_class = OrganizationSerializer
@@ -46,6 +64,12 @@ class OrganizationViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' or getattr(self, 'swagger_fake_view', False):
+            return queryset
+        return queryset.filter(pk=get_organization_id(self.request))
+
     @swagger_auto_schema(
         operation_description="Get all security incidents for a specific organization",
         responses={200: SecurityIncidentSerializer(many=True)}
@@ -56,8 +80,10 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         Get all security incidents for a specific organization.
         """
         organization = self.get_object()
-        incidents = SecurityIncident.objects.filter(organization=organization)
-        serializer = SecurityIncidentSerializer(incidents, many=True)
+        incidents = optimize(
+            SecurityIncident.objects.filter(organization=organization), SecurityIncidentSerializer, request
+        )
+        serializer = SecurityIncidentSerializer(incidents, many=True, context={'request': request})
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -70,8 +96,8 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         Get all AI models for a specific organization.
         """
         organization = self.get_object()
-        models = AIModel.objects.filter(organization=organization)
-        serializer = AIModelSerializer(models, many=True)
+        models = optimize(AIModel.objects.filter(organization=organization), AIModelSerializer, request)
+        serializer = AIModelSerializer(models, many=True, context={'request': request})
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -102,33 +128,15 @@ class OrganizationViewSet(viewsets.ModelViewSet):
         - Recent incidents (last 30 days)
         - Total AI models
         - Active security scans
+
+        Counted in one conditional-aggregation pass per table, or read from
+        the materialized ``OrganizationStats`` row (see ``api.statistics``).
         """
         org = self.get_object()
-        now = timezone.now()
-        thirty_days_ago = now - timedelta(days=30)
-
-        stats = {
-            'total_incidents': SecurityIncident.objects.filter(organization=org).count(),
-            'active_incidents': SecurityIncident.objects.filter(
-                organization=org,
-                status__in=['open', 'investigating']
-            ).count(),
-            'incidents_by_severity': SecurityIncident.objects.filter(
-                organization=org
-            ).values('severity').annotate(count=Count('id')),
-            'recent_incidents': SecurityIncident.objects.filter(
-                organization=org,
-                created_at__gte=thirty_days_ago
-            ).count(),
-            'total_models': AIModel.objects.filter(organization=org).count(),
-            'active_scans': SecurityScan.objects.filter(
-                organization=org,
-                status='running'
-            ).count(),
-        }
+        stats = organization_stats.get_statistics(org)
         return Response(stats)
 
-class AIModelViewSet(viewsets.ModelViewSet):
+class AIModelViewSet(ExpandableQuerysetMixin, OrganizationScopedQuerysetMixin, AuditMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing AI models.
     
@@ -136,6 +144,7 @@ class AIModelViewSet(viewsets.ModelViewSet):
     retrieving scans and incidents related to specific models.
     """
     queryset = AIModel.objects.all()
+    validator_fields = ('organization__name', 'organization__updated_at')
     serializer_class = AIModelSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -143,6 +152,10 @@ class AIModelViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description', 'version']
     ordering_fields = ['name', 'created_at']
 
+    def perform_create(self, serializer):
+        serializer.save(organization_id=self.organization_id)
+        self.audit('create', serializer.instance)
+
     @swagger_auto_schema(
         operation_description="Get all security scans for a specific AI model",
         responses={200: SecurityScanSerializer(many=True)}
@@ -153,8 +166,8 @@ class AIModelViewSet(viewsets.ModelViewSet):
         Get all security scans performed on a specific AI model.
         """
         model = self.get_object()
-        scans = SecurityScan.objects.filter(target_model=model)
-        serializer = SecurityScanSerializer(scans, many=True)
+        scans = optimize(SecurityScan.objects.filter(target_model=model), SecurityScanSerializer, request)
+        serializer = SecurityScanSerializer(scans, many=True, context={'request': request})
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -167,8 +180,10 @@ class AIModelViewSet(viewsets.ModelViewSet):
         Get all security incidents related to a specific AI model.
         """
         model = self.get_object()
-        incidents = SecurityIncident.objects.filter(affected_model=model)
-        serializer = SecurityIncidentSerializer(incidents, many=True)
+        incidents = optimize(
+            SecurityIncident.objects.filter(affected_model=model), SecurityIncidentSerializer, request
+        )
+        serializer = SecurityIncidentSerializer(incidents, many=True, context={'request': request})
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -190,74 +205,146 @@ class AIModelViewSet(viewsets.ModelViewSet):
             'f1_score': 0.94
         })
 
-class SecurityScanViewSet(viewsets.ModelViewSet):
+class SecurityScanViewSet(ExpandableQuerysetMixin, OrganizationScopedQuerysetMixin, AuditMixin, ConditionalGetMixin, ExportMixin, viewsets.ModelViewSet):
     queryset = SecurityScan.objects.all()
     serializer_class = SecurityScanSerializer
+    pagination_class = KeysetPagination
+    validator_fields = (
+        'target_model__name', 'target_model__updated_at',
+        'created_by__username', 'created_by__email', 'created_by__first_name', 'created_by__last_name',
+    )
     permission_classes = [permissions.IsAuthenticated]
+    organization_field = 'target_model__organization'
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['scan_type', 'status']
     search_fields = ['target_model__name']
     ordering_fields = ['created_at', 'completed_at']
+    export_fields = (
+        'id', 'created_at', 'scan_type', 'status', 'target_model_id', 'target_model__name',
+        'started_at', 'completed_at', 'created_by__username', *scan_findings.COUNT_FIELDS,
+    )
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
+        self.audit('create', serializer.instance)
 
     @action(detail=True, methods=['post'])
     def start_scan(self, request, pk=None):
+        """Queue a pending scan for the scan workers"""
         scan = self.get_object()
-        if scan.status != 'pending':
+        if not scan_queue.enqueue(scan):
             return Response(
                 {'error': 'Scan can only be started if it is in pending status'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-        scan.status = 'running'
-        scan.started_at = timezone.now()
-        scan.save()
-        return Response({'status': 'scan started'})
+        self.audit('scan', scan, details={'status': scan.status})
+        return Response({'status': 'scan queued'})
 
     @action(detail=True, methods=['post'])
     def complete_scan(self, request, pk=None):
+        """Record the findings of a scan run outside the scan workers"""
         scan = self.get_object()
         if scan.status != 'running':
             return Response(
                 {'error': 'Scan can only be completed if it is running'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        try:
+            findings, items = scan_findings.split(request.data.get('findings', {}))
+            rows = scan_findings.prepare(items or [])
+        except ValueError as exc:
+            return Response({'error': f'Invalid findings: {exc}'}, status=status.HTTP_400_BAD_REQUEST)
         scan.status = 'completed'
         scan.completed_at = timezone.now()
-        scan.findings = request.data.get('findings', {})
-        scan.save()
+        scan.findings = findings
+        for name, value in scan_findings.counts(rows).items():
+            setattr(scan, name, value)
+        # A worker still running it loses its lease and discards its result.
+        scan.lease_token = ''
+        scan.lease_expires_at = None
+        with transaction.atomic():
+            scan.save()
+            scan_findings.store(scan.pk, rows)
+        self.audit('scan', scan, details={'status': scan.status})
         return Response({'status': 'scan completed'})
 
     @action(detail=True, methods=['post'])
     def stop_scan(self, request, pk=None):
-        """Stop a running scan"""
+        """Stop a queued or running scan; a worker running it cancels at its next heartbeat"""
         scan = self.get_object()
-        if scan.status != 'running':
+        if not scan_queue.stop(scan):
             return Response(
-                {'error': 'Scan is not running'},
+                {'error': 'Scan is not queued or running'},
                 status=400
             )
-        scan.status = 'stopped'
-        scan.save()
+        self.audit('scan', scan, details={'status': scan.status})
         return Response({'status': 'scan stopped'})
 
+    @swagger_auto_schema(
+        manual_parameters=[
+            openapi.Parameter(
+                'severity', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                description='Comma-separated severities (critical, high, medium, low, info)'
+            ),
+            openapi.Parameter('rule_id', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('check', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+            openapi.Parameter('location', openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        ],
+        responses={200: ScanFindingSerializer(many=True)},
+    )
+    @action(detail=True, methods=['get'])
+    def findings(self, request, pk=None):
+        """Findings of a scan, most severe first, paginated (see ``api.scan_findings``)"""
+        scan = self.get_object()
+        queryset = scan_findings.filter_findings(ScanFinding.objects.filter(scan=scan), request.query_params)
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(ScanFindingSerializer(page, many=True).data)
+
+    @action(
+        detail=True, methods=['get'], authentication_classes=[streams.StreamAuthentication],
+        renderer_classes=[streams.EventStreamRenderer, renderers.JSONRenderer],
+    )
+    def events(self, request, pk=None):
+        """Server-Sent Events of a scan: its state, then its transitions and check progress"""
+        streams.check_server(request)
+        return streams.scan_stream(self.get_object())
+
+    @swagger_auto_schema(
+        operation_description="Scan counts and duration percentiles for the caller's organization",
+        manual_parameters=[
+            openapi.Parameter(
+                'days', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                enum=list(rollups.DASHBOARD_RANGES), default=30,
+                description='Number of days of scans (by creation date) covered'
+            ),
+        ],
+    )
     @action(detail=False, methods=['get'])
     def scan_statistics(self, request):
-        """Get scan statistics"""
-        stats = {
-            'total_scans': SecurityScan.objects.count(),
-            'scans_by_status': SecurityScan.objects.values('status')
-                .annotate(count=Count('id')),
-            'average_duration': SecurityScan.objects.filter(
-                status='completed'
-            ).aggregate(avg_duration=Avg('duration'))['avg_duration'],
-        }
-        return Response(stats)
+        """
+        Get scan statistics for the caller's organization over ``?days=``
+        (7, 30, 90 or 365, default 30): counts by status and by type, and
+        p50/p90/p99 durations of completed scans per type and per model
+        (see ``api.scan_stats``).
+        """
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = None
+        if days not in rollups.DASHBOARD_RANGES:
+            return Response(
+                {'error': f'days must be one of {", ".join(map(str, rollups.DASHBOARD_RANGES))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(scan_stats.get_statistics(self.organization_id, days))
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class UserProfileViewSet(ExpandableQuerysetMixin, AuditMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
+    validator_fields = (
+        'user__username', 'user__email', 'user__first_name', 'user__last_name',
+        'organization__name', 'organization__updated_at',
+    )
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['role', 'organization']
@@ -269,7 +356,10 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             return UserProfile.objects.all()
         return UserProfile.objects.filter(user=self.request.user)
 
-class SecurityIncidentViewSet(viewsets.ModelViewSet):
+class SecurityIncidentViewSet(
+    ExpandableQuerysetMixin, OrganizationScopedQuerysetMixin, AuditMixin, ConditionalGetMixin,
+    FastListMixin, ExportMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing security incidents.
     
@@ -277,25 +367,30 @@ class SecurityIncidentViewSet(viewsets.ModelViewSet):
     assignment, bulk updates, and dashboard data retrieval.
     """
     queryset = SecurityIncident.objects.all()
+    validator_fields = (
+        'organization__name', 'organization__updated_at',
+        'affected_model__name', 'affected_model__updated_at',
+        'reported_by__username', 'reported_by__email', 'reported_by__first_name', 'reported_by__last_name',
+        'assigned_to__username', 'assigned_to__email', 'assigned_to__first_name', 'assigned_to__last_name',
+    )
     serializer_class = SecurityIncidentSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['severity', 'status', 'organization']
     search_fields = ['title', 'description']
     ordering_fields = ['created_at', 'severity']
-
-    def get_queryset(self):
-        if getattr(self, 'swagger_fake_view', False):
-            return SecurityIncident.objects.none()
-        user_profile = UserProfile.objects.get(user=self.request.user)
-        return SecurityIncident.objects.filter(organization=user_profile.organization)
+    export_fields = (
+        'id', 'created_at', 'updated_at', 'title', 'description', 'severity', 'status',
+        'affected_model_id', 'reported_by__username', 'assigned_to__username', 'resolved_at',
+    )
 
     def perform_create(self, serializer):
-        user_profile = UserProfile.objects.get(user=self.request.user)
         serializer.save(
-            organization=user_profile.organization,
+            organization_id=self.organization_id,
             reported_by=self.request.user
         )
+        self.audit('create', serializer.instance)
 
     @swagger_auto_schema(
         operation_description="Assign a security incident to a specific user",
@@ -328,6 +423,7 @@ class SecurityIncidentViewSet(viewsets.ModelViewSet):
             user = User.objects.get(id=user_id)
             incident.assigned_to = user
             incident.save()
+            self.audit('update', incident, details={'assigned_to': user.pk})
             return Response({'status': 'incident assigned'})
         except User.DoesNotExist:
             return Response(
@@ -335,54 +431,131 @@ class SecurityIncidentViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    def bulk_response(self, operation, summary, results, **details):
+        self.audit(
+            'update' if operation != 'bulk_delete' else 'delete', model_name='SecurityIncident',
+            details={'operation': operation, 'count': len(results), **details},
+        )
+        events.publish('incident.bulk', self.organization_id, {
+            'operation': operation, 'summary': dict(summary), **details,
+        })
+        return Response({
+            'updated': summary[bulk.UPDATED],
+            'summary': dict(summary),
+            'results': results,
+        })
+
     @swagger_auto_schema(
-        operation_description="Bulk update the status of multiple security incidents",
-        request_body=openapi.Schema(
-            type=openapi.TYPE_OBJECT,
-            required=['incident_ids', 'status'],
-            properties={
-                'incident_ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_INTEGER), description='List of incident IDs to update'),
-                'status': openapi.Schema(type=openapi.TYPE_STRING, description='New status to set for the incidents')
-            }
-        ),
-        responses={
-            200: openapi.Response(description="Status updated successfully", schema=openapi.Schema(
-                type=openapi.TYPE_OBJECT,
-                properties={'updated': openapi.Schema(type=openapi.TYPE_INTEGER, description='Number of incidents updated')}
-            )),
-            400: openapi.Response(description="Bad request", schema=openapi.Schema(
-                type=openapi.TYPE_OBJECT,
-                properties={'error': openapi.Schema(type=openapi.TYPE_STRING)}
-            ))
-        }
+        operation_description="Move incidents of the caller's organization to a new status",
+        request_body=BulkIncidentStatusSerializer,
     )
     @action(detail=False, methods=['post'])
     def bulk_update_status(self, request):
         """
-        Bulk update the status of multiple security incidents.
+        Bulk status transition, with per-id results (updated, unchanged,
+        invalid_transition, not_found).
         """
-        incident_ids = request.data.get('incident_ids', [])
-        new_status = request.data.get('status')
-        
-        if not incident_ids or not new_status:
-            return Response(
-                {'error': 'incident_ids and status are required'},
-                status=400
-            )
-            
-        incidents = SecurityIncident.objects.filter(id__in=incident_ids)
-        incidents.update(status=new_status)
-        
-        return Response({'updated': len(incident_ids)})
+        serializer = BulkIncidentStatusSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        organization_id = self.organization_id
+        new_status = serializer.validated_data['status']
+        summary, results = bulk.transition(
+            organization_id, serializer.validated_data['incident_ids'], new_status
+        )
+        return self.bulk_response('bulk_update_status', summary, results, status=new_status)
+
+    @swagger_auto_schema(
+        operation_description="Assign incidents of the caller's organization to a member (null unassigns)",
+        request_body=BulkIncidentAssignSerializer,
+    )
+    @action(detail=False, methods=['post'])
+    def bulk_assign(self, request):
+        serializer = BulkIncidentAssignSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        organization_id = self.organization_id
+        user_id = serializer.validated_data['user_id']
+        assignee = None
+        if user_id is not None:
+            assignee = User.objects.filter(
+                pk=user_id, userprofile__organization=organization_id
+            ).first()
+            if assignee is None:
+                return Response({'user_id': ['Not a member of your organization.']}, status=400)
+        summary, results = bulk.assign(organization_id, serializer.validated_data['incident_ids'], assignee)
+        return self.bulk_response('bulk_assign', summary, results, assigned_to=user_id)
+
+    @swagger_auto_schema(
+        operation_description="Delete incidents of the caller's organization",
+        request_body=BulkIncidentIdsSerializer,
+    )
+    @action(detail=False, methods=['post'])
+    def bulk_delete(self, request):
+        serializer = BulkIncidentIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        organization_id = self.organization_id
+        summary, results = bulk.delete(organization_id, serializer.validated_data['incident_ids'])
+        return self.bulk_response('bulk_delete', summary, results)
+
+    @swagger_auto_schema(
+        operation_description="Create incidents in the caller's organization; invalid items are reported by index",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            required=['incidents'],
+            properties={'incidents': openapi.Schema(
+                type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)
+            )},
+        ),
+    )
+    @action(detail=False, methods=['post'])
+    def bulk_create(self, request):
+        items = request.data.get('incidents')
+        if not isinstance(items, list) or not items:
+            return Response({'incidents': ['A non-empty list is required.']}, status=400)
+        if len(items) > get_bulk_max_items():
+            return Response({'incidents': [f'At most {get_bulk_max_items()} items per request.']}, status=400)
+        organization_id = self.organization_id
+
+        valid, results = [], []
+        for index, item in enumerate(items):
+            serializer = BulkIncidentItemSerializer(data=item, context={'organization_id': organization_id})
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+                results.append({'index': index, 'result': 'created'})
+            else:
+                results.append({'index': index, 'result': 'invalid', 'errors': serializer.errors})
+        created = bulk.create(organization_id, request.user, [fields for _, fields in valid])
+        for (index, _), incident in zip(valid, created):
+            results[index]['id'] = incident.pk
+
+        self.audit(
+            'create', model_name='SecurityIncident',
+            details={'operation': 'bulk_create', 'count': len(created)},
+        )
+        events.publish('incident.bulk', organization_id, {
+            'operation': 'bulk_create', 'summary': {'created': len(created)},
+        })
+        return Response({
+            'created': len(created),
+            'summary': dict(Counter(result['result'] for result in results)),
+            'results': results,
+        })
 
     @swagger_auto_schema(
-        operation_description="Get comprehensive dashboard statistics for security incidents",
+        operation_description="Get dashboard statistics for the caller's organization",
+        manual_parameters=[
+            openapi.Parameter(
+                'days', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                enum=list(rollups.DASHBOARD_RANGES), default=30,
+                description='Number of days covered by the trend and breakdowns'
+            ),
+        ],
         responses={
             200: openapi.Response(
                 description="Dashboard data",
                 schema=openapi.Schema(
                     type=openapi.TYPE_OBJECT,
                     properties={
+                        'days': openapi.Schema(type=openapi.TYPE_INTEGER),
                         'incidents_by_status': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
                         'incidents_by_severity': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
                         'recent_incidents': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
@@ -395,32 +568,31 @@ class SecurityIncidentViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dashboard_data(self, request):
         """
-        Get comprehensive dashboard statistics for security incidents including:
-        - Incidents by status
-        - Incidents by severity
+        Get dashboard statistics for the caller's organization including:
+        - Incidents by status and by severity over the range
         - Recent incidents (last 5)
-        - Incident trend over the last 30 days
+        - Daily incident trend over the range
+
+        The range is ``?days=`` (7, 30, 90 or 365, default 30). Trends and
+        breakdowns come from the daily rollups (see ``api.rollups``).
         """
-        now = timezone.now()
-        thirty_days_ago = now - timedelta(days=30)
-        
-        data = {
-            'incidents_by_status': SecurityIncident.objects.values('status')
-                .annotate(count=Count('id')),
-            'incidents_by_severity': SecurityIncident.objects.values('severity')
-                .annotate(count=Count('id')),
-            'recent_incidents': SecurityIncident.objects.filter(
-                created_at__gte=thirty_days_ago
-            ).order_by('-created_at')[:5],
-            'incident_trend': SecurityIncident.objects.filter(
-                created_at__gte=thirty_days_ago
-            ).extra(
-                select={'day': 'date(created_at)'}
-            ).values('day').annotate(count=Count('id')),
-        }
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            days = None
+        if days not in rollups.DASHBOARD_RANGES:
+            return Response(
+                {'error': f'days must be one of {", ".join(map(str, rollups.DASHBOARD_RANGES))}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = rollups.get_dashboard(self.organization_id, days)
+        recent = self.get_queryset().order_by('-created_at')[:5]
+        data['days'] = days
+        data['recent_incidents'] = self.get_serializer(recent, many=True).data
         return Response(data)
 
-class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+class AuditLogViewSet(ExpandableQuerysetMixin, OrganizationScopedQuerysetMixin, ConditionalGetMixin, ExportMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for viewing audit logs.
     
@@ -428,19 +600,28 @@ class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     and system changes within the organization.
     """
     queryset = AuditLog.objects.all()
+    validator_fields = (
+        'user__username', 'user__email', 'user__first_name', 'user__last_name',
+        'organization__name', 'organization__updated_at',
+    )
     serializer_class = AuditLogSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['action', 'model_name']
-    search_fields = ['user__username', 'details']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    # Each filter is served by an (organization, ..., created_at) index;
+    # bounding created_at also limits PostgreSQL to the matching partitions.
+    filterset_fields = {
+        'action': ['exact'],
+        'model_name': ['exact'],
+        'object_id': ['exact'],
+        'user': ['exact'],
+        'created_at': ['gte', 'lt'],
+    }
     ordering_fields = ['created_at']
-
-    def get_queryset(self):
-        # Fix for Swagger schema generation
-        if getattr(self, 'swagger_fake_view', False):
-            return AuditLog.objects.none()
-        user_profile = UserProfile.objects.get(user=self.request.user)
-        return AuditLog.objects.filter(organization=user_profile.organization)
+    export_fields = (
+        'id', 'created_at', 'user_id', 'user__username', 'action', 'model_name',
+        'object_id', 'ip_address', 'details',
+    )
 
 class WhoAmIView(APIView):
     """
@@ -481,3 +662,30 @@ class WhoAmIView(APIView):
             'is_superuser': user.is_superuser,
         })
 
+
+
+class EventStreamView(APIView):
+    """Server-Sent Events of the caller's organization: incidents and scans."""
+    permission_classes = [IsAuthenticated]
+    authentication_classes = [streams.StreamAuthentication]
+    renderer_classes = [streams.EventStreamRenderer, renderers.JSONRenderer]
+
+    @swagger_auto_schema(auto_schema=None)
+    def get(self, request):
+        streams.check_server(request)
+        return streams.organization_stream(get_organization_id(request))
+
+
+class ProfilingStatsView(APIView):
+    """Per-route request profiles for this worker process (staff only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response({
+            'enabled': profiling.is_enabled(),
+            'routes': profiling.get_stats(),
+        })
+
+    def delete(self, request):
+        profiling.reset_stats()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -2,8 +2,10 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.views import TokenObtainPairView
 from django.contrib.auth.models import User
+from api import audit
 from .serializers import UserSerializer, RegisterSerializer, ChangePasswordSerializer
 import logging
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -20,10 +22,23 @@ class RegisterView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
+        audit.record('create', request, instance=serializer.instance, user=serializer.instance)
         headers = self.get_success_headers(serializer.data)
         logger.info(f"User {serializer.data.get('username')} registered successfully.")
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+class LoginView(TokenObtainPairView):
+    """Obtain a JWT pair, recording a login audit event."""
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        audit.record('login', request, instance=serializer.user, user=serializer.user)
+        return Response(serializer.validated_data, status=status.HTTP_200_OK)
+
 class UserProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
     serializer_class = UserSerializer
@@ -42,6 +57,7 @@ class UserProfileView(generics.RetrieveUpdateAPIView):
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
+        audit.record('update', request, instance=instance, details={'fields': sorted(serializer.validated_data)})
 
         if getattr(instance, '_prefetched_objects_cache', None):
             # If 'prefetch_related' has been applied to a queryset, we need to
@@ -71,6 +87,7 @@ class ChangePasswordView(generics.UpdateAPIView):
             # Set new password
             user.set_password(serializer.data.get("new_password"))
             user.save()
+            audit.record('update', request, instance=user, details={'fields': ['password']})
             logger.info(f"Password changed successfully for user: {user.username}")
             return Response(status=status.HTTP_200_OK)
         logger.warning(f"Invalid password change data for user {user.username}: {serializer.errors}")
@@ -85,6 +102,7 @@ class LogoutView(APIView):
             refresh_token = request.data["refresh_token"]
             token = RefreshToken(refresh_token)
             token.blacklist()
+            audit.record('logout', request, instance=request.user)
             logger.info(f"User {request.user.username} logged out successfully.")
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestLoggingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
@@ -54,8 +55,10 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'api.middleware.PerformanceMonitoringMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -107,6 +110,20 @@ else:
             }
         }
 
+# Cache. Multi-worker deployments should point this at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache) so invalidation and
+# counters are visible to every worker.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+# Caches invalidated across workers (content responses, comment threads,
+# tenants; see api.caching) are off with a per-process backend such as the
+# default LocMemCache, unless a single process serves every request.
+CACHE_SINGLE_PROCESS = config_bool('CACHE_SINGLE_PROCESS', default=DEBUG)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -172,6 +189,133 @@ REST_FRAMEWORK = {
     },
 }
 
+# Content full-text search. Leave the backend empty to pick one from the
+# database vendor (SQLite FTS5 or PostgreSQL tsvector).
+CONTENT_SEARCH_BACKEND = config('CONTENT_SEARCH_BACKEND', default='')
+CONTENT_SEARCH_CONFIG = config('CONTENT_SEARCH_CONFIG', default='english')
+CONTENT_SEARCH_MAX_RESULTS = config('CONTENT_SEARCH_MAX_RESULTS', default=500, cast=int)
+
+# Write-behind view counters: 'memory' (per worker) or 'cache' (shared
+# cache, also flushable with `manage.py flush_view_counts`).
+CONTENT_VIEW_BUFFER = config('CONTENT_VIEW_BUFFER', default='memory')
+CONTENT_VIEW_FLUSH_INTERVAL = config('CONTENT_VIEW_FLUSH_INTERVAL', default=30, cast=int)
+CONTENT_VIEW_AUTO_FLUSH = config_bool('CONTENT_VIEW_AUTO_FLUSH', default=True)
+
+# Cached comment threads on blog posts and case studies
+COMMENT_THREADS_PAGE_SIZE = config('COMMENT_THREADS_PAGE_SIZE', default=10, cast=int)
+COMMENT_MAX_REPLY_DEPTH = config('COMMENT_MAX_REPLY_DEPTH', default=3, cast=int)
+COMMENT_THREAD_CACHE_TIMEOUT = config('COMMENT_THREAD_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Response cache for anonymous/non-staff GETs on the content endpoints
+CONTENT_RESPONSE_CACHE_ENABLED = config_bool('CONTENT_RESPONSE_CACHE_ENABLED', default=True)
+CONTENT_RESPONSE_CACHE_TIMEOUT = config('CONTENT_RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Read fast path (api.fastpath): list endpoints build their JSON from
+# values() rows instead of model instances and serializer fields.
+FAST_SERIALIZATION_ENABLED = config_bool('FAST_SERIALIZATION_ENABLED', default=True)
+
+# Organization statistics (api.statistics): aggregate on read, or read the
+# incrementally maintained OrganizationStats rows. Run
+# `manage.py rebuild_organization_stats` whenever this is switched on.
+ORGANIZATION_STATS_MATERIALIZED = config_bool('ORGANIZATION_STATS_MATERIALIZED', default=False)
+
+# Tenant resolution (api.tenancy): each user's organization and role are
+# cached for this many seconds and invalidated when their profile changes
+# (with a shared cache only; see CACHE_SINGLE_PROCESS).
+TENANT_CACHE_TIMEOUT = config('TENANT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Bulk incident operations (api.bulk): ids per request, and ids per chunk
+# (each chunk is one transaction; capped by the database's parameter limit).
+INCIDENT_BULK_MAX_ITEMS = config('INCIDENT_BULK_MAX_ITEMS', default=100000, cast=int)
+INCIDENT_BULK_CHUNK_SIZE = config('INCIDENT_BULK_CHUNK_SIZE', default=1000, cast=int)
+
+# Scan execution queue (api.scan_queue): `manage.py run_scan_worker` runs
+# queued scans in SCAN_WORKER_PROCESSES processes. A claimed scan is leased
+# for SCAN_LEASE_SECONDS and renewed every SCAN_HEARTBEAT_INTERVAL seconds;
+# scans whose lease expires are re-queued, and failed after
+# SCAN_MAX_ATTEMPTS claims. SCAN_RUNNER is the dotted path of the callable
+# running a scan.
+SCAN_WORKER_PROCESSES = config('SCAN_WORKER_PROCESSES', default=2, cast=int)
+SCAN_LEASE_SECONDS = config('SCAN_LEASE_SECONDS', default=60, cast=int)
+SCAN_HEARTBEAT_INTERVAL = config('SCAN_HEARTBEAT_INTERVAL', default=20.0, cast=float)
+SCAN_MAX_ATTEMPTS = config('SCAN_MAX_ATTEMPTS', default=3, cast=int)
+SCAN_POLL_INTERVAL = config('SCAN_POLL_INTERVAL', default=1.0, cast=float)
+SCAN_RUNNER = config('SCAN_RUNNER', default='api.scan_checks.run_scan')
+
+# Scan checks (api.scan_checks): modules registering checks, and how many
+# checks of one scan run at once in threads and in processes. A check gets
+# SCAN_CHECK_TIMEOUT seconds unless it sets its own timeout.
+SCAN_CHECK_MODULES = config('SCAN_CHECK_MODULES', default='api.builtin_checks', cast=Csv())
+SCAN_CHECK_THREADS = config('SCAN_CHECK_THREADS', default=4, cast=int)
+SCAN_CHECK_PROCESSES = config('SCAN_CHECK_PROCESSES', default=2, cast=int)
+SCAN_CHECK_TIMEOUT = config('SCAN_CHECK_TIMEOUT', default=30.0, cast=float)
+
+# Scan statistics (api.scan_stats): with SCAN_STATS_ROLLUPS, finished scans
+# are counted into daily duration-histogram rollups and read from there.
+# Run `manage.py rebuild_scan_rollups` whenever this is switched on.
+SCAN_STATS_ROLLUPS = config_bool('SCAN_STATS_ROLLUPS', default=False)
+
+# Live event streams (api.events, api.streams): EVENT_BUS_BACKEND 'local'
+# delivers events within one process; 'postgres' uses NOTIFY/LISTEN on the
+# EVENT_BUS_CHANNEL channel so scan workers reach every web process, and is
+# the default on PostgreSQL. A stream buffers EVENT_STREAM_BUFFER events
+# before dropping them, and sends a keepalive after EVENT_STREAM_KEEPALIVE
+# idle seconds. Streams need the ASGI application (backend.asgi) or threaded
+# WSGI workers.
+EVENTS_ENABLED = config_bool('EVENTS_ENABLED', default=True)
+EVENT_BUS_BACKEND = config(
+    'EVENT_BUS_BACKEND',
+    default='postgres' if 'postgresql' in DATABASES['default']['ENGINE'] else 'local',
+)
+EVENT_BUS_CHANNEL = config('EVENT_BUS_CHANNEL', default='api_events')
+EVENT_STREAM_BUFFER = config('EVENT_STREAM_BUFFER', default=1000, cast=int)
+EVENT_STREAM_KEEPALIVE = config('EVENT_STREAM_KEEPALIVE', default=15.0, cast=float)
+EVENT_STREAM_RETRY_MS = config('EVENT_STREAM_RETRY_MS', default=3000, cast=int)
+
+# Audit trail (api.audit): events are buffered in process and written with
+# bulk_create by a background thread every AUDIT_FLUSH_INTERVAL seconds or
+# once AUDIT_BATCH_SIZE are waiting. A full buffer (AUDIT_BUFFER_SIZE) makes
+# requests write a batch themselves.
+AUDIT_ENABLED = config_bool('AUDIT_ENABLED', default=True)
+AUDIT_BATCH_SIZE = config('AUDIT_BATCH_SIZE', default=500, cast=int)
+AUDIT_BUFFER_SIZE = config('AUDIT_BUFFER_SIZE', default=10000, cast=int)
+AUDIT_FLUSH_INTERVAL = config('AUDIT_FLUSH_INTERVAL', default=2.0, cast=float)
+# Audit storage (api.partitions): monthly partitions on PostgreSQL, created
+# AUDIT_PARTITIONS_AHEAD months ahead by `manage.py create_audit_partitions`.
+# `manage.py archive_audit_logs` exports months older than
+# AUDIT_RETENTION_MONTHS to AUDIT_ARCHIVE_DIR and drops them.
+AUDIT_PARTITIONS_AHEAD = config('AUDIT_PARTITIONS_AHEAD', default=3, cast=int)
+AUDIT_RETENTION_MONTHS = config('AUDIT_RETENTION_MONTHS', default=12, cast=int)
+AUDIT_ARCHIVE_DIR = config('AUDIT_ARCHIVE_DIR', default='')
+
+# Rate limiting (api.ratelimit). Policies are keyed by URL name; the default
+# policy applies to every other route and is off unless configured, leaving
+# general API traffic to the DRF throttles above.
+RATE_LIMIT_ENABLED = config_bool('RATE_LIMIT_ENABLED', default=True)
+# Reverse proxies in front of the app (1 behind the bundled nginx). Client IPs
+# are read from the X-Forwarded-For hop the outermost of them added; with 0,
+# from REMOTE_ADDR. Only set it when clients cannot reach the app directly.
+TRUSTED_PROXY_COUNT = config('TRUSTED_PROXY_COUNT', default=0, cast=int)
+# Where counters live: 'cache' shares them through the default cache, but a
+# process-local one (LocMemCache unless CACHE_SINGLE_PROCESS) cannot, so the
+# store then falls back to 'memory' with a warning and every worker allows the
+# full rate. Configure a shared cache (Redis, Memcached) for exact limits.
+RATE_LIMIT_STORE = config('RATE_LIMIT_STORE', default='cache')
+RATE_LIMIT_DEFAULT = config('RATE_LIMIT_DEFAULT', default='')
+RATE_LIMIT_POLICIES = {
+    'token_obtain_pair': {
+        'rate': config('RATE_LIMIT_LOGIN', default='10/minute'), 'methods': ['POST'], 'scope': 'ip',
+    },
+    'auth_register': {'rate': '10/hour', 'methods': ['POST'], 'scope': 'ip'},
+    'change_password': {'rate': '5/minute', 'methods': ['PUT', 'PATCH'], 'scope': 'user'},
+    'contact-api': {
+        'rate': config('RATE_LIMIT_CONTACT', default='5/minute'), 'methods': ['POST'], 'scope': 'ip',
+    },
+    'newsletter-api': {'rate': '5/minute', 'methods': ['POST', 'DELETE'], 'scope': 'ip'},
+    'demo-request-api': {'rate': '5/minute', 'methods': ['POST'], 'scope': 'ip'},
+    'consultation-request-api': {'rate': '5/minute', 'methods': ['POST'], 'scope': 'ip'},
+}
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = config_bool('CORS_ALLOW_ALL_ORIGINS', default=False)
 CORS_ALLOWED_ORIGINS = config(
@@ -217,7 +361,30 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='VICTO AI <noreply@victoai.com>')
 
-# Logging
+# Per-request profiling (api.profiling): Server-Timing headers and per-route
+# histograms at /api/v1/profiling/stats/. Off by default; each profiled
+# request pays for SQL and serializer instrumentation.
+PROFILING_ENABLED = config_bool('PROFILING_ENABLED', default=False)
+
+# Prometheus metrics (api.metrics) served at /metrics. With several worker
+# processes set METRICS_MULTIPROC_DIR to a directory they all share (and that
+# is emptied on restart) so the endpoint reports every worker. Scrapers send
+# METRICS_TOKEN as a Bearer token; without a token the endpoint answers 404
+# unless METRICS_PUBLIC (default: DEBUG) opens it to anyone.
+METRICS_ENABLED = config_bool('METRICS_ENABLED', default=True)
+METRICS_MULTIPROC_DIR = config('METRICS_MULTIPROC_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+METRICS_PUBLIC = config_bool('METRICS_PUBLIC', default=DEBUG)
+
+# Logging. Access logs (api.access_log) are JSON lines written from a
+# background thread; successful requests are sampled, errors and slow
+# requests are always kept.
+ACCESS_LOG_ENABLED = config_bool('ACCESS_LOG_ENABLED', default=True)
+ACCESS_LOG_SAMPLE_RATE = config('ACCESS_LOG_SAMPLE_RATE', default=1.0, cast=float)
+ACCESS_LOG_SLOW_MS = config('ACCESS_LOG_SLOW_MS', default=1000, cast=int)
+ACCESS_LOG_ALWAYS_STATUS = config('ACCESS_LOG_ALWAYS_STATUS', default=400, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -225,11 +392,23 @@ LOGGING = {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'access': {
+            'class': 'api.access_log.AccessLogHandler',
+            'filename': config('ACCESS_LOG_FILE', default='') or None,
+            'max_queue': config('ACCESS_LOG_QUEUE_SIZE', default=10000, cast=int),
+        },
     },
     'root': {
         'handlers': ['console'],
         'level': config('LOG_LEVEL', default='INFO'),
     },
+    'loggers': {
+        'api.access': {
+            'handlers': ['access'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
 }
 
 # Swagger/OpenAPI settings
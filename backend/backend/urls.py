@@ -1,15 +1,28 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 from django.conf import settings
 from django.conf.urls.static import static
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from api import metrics
+
 def health_check(request):
     return HttpResponse("healthy", content_type="text/plain")
 
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        if not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+            return HttpResponse(status=401)
+    elif not getattr(settings, 'METRICS_PUBLIC', False):
+        # Per-route traffic and queue depths are not for anonymous callers.
+        return HttpResponse(status=404)
+    return HttpResponse(metrics.exposition(), content_type=metrics.CONTENT_TYPE)
+
 schema_view = get_schema_view(
     openapi.Info(
         title="VICTO AI API",
@@ -33,6 +46,7 @@ urlpatterns = [
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
     path('health/', health_check, name='health_check'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve static/media files during development only
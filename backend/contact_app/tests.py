@@ -1,3 +1,45 @@
+import csv
+from io import StringIO
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from .models import ContactMessage, DemoRequest
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.staff = User.objects.create_user('staff', password='pass', is_staff=True)
+        for n in range(3):
+            ContactMessage.objects.create(
+                first_name=f'First {n}', last_name='Last', email=f'{n}@example.com',
+                subject='general', message='Hello',
+            )
+        DemoRequest.objects.create(first_name='Demo', last_name='Last', email='demo@example.com')
+        DemoRequest.objects.create(
+            first_name='Done', last_name='Last', email='done@example.com', is_processed=True
+        )
+
+    def test_staff_only(self):
+        self.assertEqual(self.client.get(reverse('contact-export')).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.client.force_authenticate(User.objects.create_user('user', password='pass'))
+        self.assertEqual(self.client.get(reverse('contact-export')).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_contact_messages_export(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse('contact-export'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(rows[0][:2], ['id', 'submitted_at'])
+        self.assertEqual([row[4] for row in rows[1:]], ['0@example.com', '1@example.com', '2@example.com'])
 
-# Create your tests here.
+    def test_demo_requests_export_filters(self):
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(reverse('demo-request-export'), {'is_processed': 'false', 'output': 'ndjson'})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"email":"demo@example.com"', lines[0])
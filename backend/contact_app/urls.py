@@ -1,9 +1,18 @@
 from django.urls import path
-from .views import ContactAPIView, NewsletterSubscriptionView, DemoRequestView, ConsultationRequestView
+from .views import (
+    ContactAPIView, NewsletterSubscriptionView, DemoRequestView, ConsultationRequestView,
+    ContactMessageExportView, DemoRequestExportView, ConsultationRequestExportView,
+)
 
 urlpatterns = [
     path('contact/', ContactAPIView.as_view(), name='contact-api'),
     path('newsletter/', NewsletterSubscriptionView.as_view(), name='newsletter-api'),
     path('demo-request/', DemoRequestView.as_view(), name='demo-request-api'),
     path('consultation-request/', ConsultationRequestView.as_view(), name='consultation-request-api'),
+    path('contact/export/', ContactMessageExportView.as_view(), name='contact-export'),
+    path('demo-request/export/', DemoRequestExportView.as_view(), name='demo-request-export'),
+    path(
+        'consultation-request/export/', ConsultationRequestExportView.as_view(),
+        name='consultation-request-export',
+    ),
 ]
\ No newline at end of file
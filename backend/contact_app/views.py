@@ -4,6 +4,7 @@ from rest_framework.response import Response
 from rest_framework import status
 from .serializers import ContactSerializer, NewsletterSubscriptionSerializer, DemoRequestSerializer, ConsultationRequestSerializer
 from .models import ContactMessage, NewsletterSubscription, DemoRequest, ConsultationRequest
+from api.exports import ExportView
 import logging
 
 logger = logging.getLogger(__name__)
@@ -111,4 +112,36 @@ class ConsultationRequestView(APIView):
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
         logger.warning(f"Invalid consultation request data: {serializer.errors}")
-        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class ContactMessageExportView(ExportView):
+    """Staff-only streaming export of contact messages."""
+    queryset = ContactMessage.objects.all()
+    filterset_fields = {'subject': ['exact'], 'submitted_at': ['gte', 'lt']}
+    export_fields = (
+        'id', 'submitted_at', 'first_name', 'last_name', 'email', 'company', 'subject', 'message',
+    )
+    export_basename = 'contact-messages'
+
+
+class DemoRequestExportView(ExportView):
+    """Staff-only streaming export of demo requests."""
+    queryset = DemoRequest.objects.all()
+    filterset_fields = {'is_processed': ['exact'], 'requested_at': ['gte', 'lt']}
+    export_fields = (
+        'id', 'requested_at', 'first_name', 'last_name', 'email', 'company', 'phone_number',
+        'message', 'is_processed',
+    )
+    export_basename = 'demo-requests'
+
+
+class ConsultationRequestExportView(ExportView):
+    """Staff-only streaming export of consultation requests."""
+    queryset = ConsultationRequest.objects.all()
+    filterset_fields = {'is_processed': ['exact'], 'requested_at': ['gte', 'lt']}
+    export_fields = (
+        'id', 'requested_at', 'first_name', 'last_name', 'email', 'company', 'phone_number',
+        'preferred_date', 'preferred_time', 'message', 'is_processed',
+    )
+    export_basename = 'consultation-requests'
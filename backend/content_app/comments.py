@@ -0,0 +1,118 @@
+"""
+Comment threads for blog posts and case studies.
+
+A post's approved comments are loaded with a single query, assembled into
+threads in memory and cached per post. ``content_app.signals`` drops the
+cached threads whenever one of the post's comments is saved or deleted,
+which covers new comments, approval and spam marking. Like the response
+cache, threads are only cached when the cache is shared by every worker
+(``api.caching``); otherwise each request loads them.
+
+Replies nested deeper than ``COMMENT_MAX_REPLY_DEPTH`` are attached to their
+ancestor at the maximum depth, so no approved reply is hidden.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.pagination import PageNumberPagination
+
+from api import caching
+
+from .models import BlogPost, CaseStudy, Comment
+
+TARGET_FIELDS = {
+    BlogPost: 'blog_post',
+    CaseStudy: 'case_study',
+}
+
+
+def get_max_reply_depth():
+    return max(1, getattr(settings, 'COMMENT_MAX_REPLY_DEPTH', 3))
+
+
+def get_threads_page_size():
+    return getattr(settings, 'COMMENT_THREADS_PAGE_SIZE', 10)
+
+
+def thread_cache_key(target_field, target_id):
+    return f'content:comments:{target_field}:{target_id}'
+
+
+def build_threads(comments, max_depth):
+    """
+    Assemble serialized comments into threads.
+
+    ``comments`` is an iterable of dicts with ``id`` and ``parent_comment``
+    ordered oldest first. Top-level threads are returned newest first;
+    replies stay in chronological order.
+    """
+    roots = []
+    depth = {}
+    holder = {}
+    nodes = {}
+    for data in comments:
+        data['replies'] = []
+        parent_id = data['parent_comment']
+        if parent_id is None:
+            roots.append(data)
+            depth[data['id']] = 0
+        elif parent_id in nodes:
+            parent_depth = depth[parent_id]
+            if parent_depth < max_depth:
+                target = nodes[parent_id]
+                depth[data['id']] = parent_depth + 1
+            else:
+                target = holder[parent_id]
+                depth[data['id']] = parent_depth
+            target['replies'].append(data)
+            holder[data['id']] = target
+        else:
+            # Reply to a comment that is not visible (pending or spam).
+            continue
+        nodes[data['id']] = data
+    roots.reverse()
+    return roots
+
+
+def load_threads(target):
+    """Build the threads for ``target`` from the database (one query)."""
+    from .serializers import ThreadCommentSerializer
+
+    comments = (
+        Comment.objects
+        .filter(**{TARGET_FIELDS[type(target)]: target}, is_approved=True, is_spam=False)
+        .select_related('author')
+        .order_by('created_at', 'id')
+    )
+    serialized = [dict(data) for data in ThreadCommentSerializer(comments, many=True).data]
+    return build_threads(serialized, get_max_reply_depth())
+
+
+def get_threads(target):
+    """Cached comment threads for a blog post or case study."""
+    if not caching.is_shared():
+        return load_threads(target)
+    key = thread_cache_key(TARGET_FIELDS[type(target)], target.pk)
+    threads = cache.get(key)
+    if threads is None:
+        threads = load_threads(target)
+        cache.set(key, threads, getattr(settings, 'COMMENT_THREAD_CACHE_TIMEOUT', 3600))
+    return threads
+
+
+def invalidate_threads(comment):
+    """Drop the cached threads of the post or case study ``comment`` is on."""
+    for field in TARGET_FIELDS.values():
+        target_id = getattr(comment, f'{field}_id')
+        if target_id is not None:
+            cache.delete(thread_cache_key(field, target_id))
+
+
+class CommentThreadPagination(PageNumberPagination):
+    """Pages of top-level threads; replies travel with their thread."""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        self.page_size = get_threads_page_size()
+        return super().get_page_size(request)
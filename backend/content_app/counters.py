@@ -0,0 +1,308 @@
+"""
+Write-behind view counting for blog posts and case studies.
+
+``increment_views`` requests only add to a buffer; buffered counts are
+applied to the database in batches of ``UPDATE ... SET views = views + n``
+by ``flush_views()``, which runs on a background timer in every worker and
+from the ``flush_view_counts`` management command.
+
+Two buffers are available (``CONTENT_VIEW_BUFFER``):
+
+- ``memory``: a sharded, lock-protected counter local to the worker process.
+  Each worker flushes its own counts, so no shared infrastructure is needed.
+- ``cache``: atomic ``cache.add``/``cache.incr`` counters in the shared
+  Django cache (Redis/Memcached). Counts are bucketed into flush-window
+  epochs and an epoch is only flushed once no worker can still write to it,
+  so totals stay exact under concurrency.
+
+Serializers add the pending count to the stored value, so the ``views`` they
+render lags the true count by at most one flush window. A page of rows reads
+its pending counts with one ``pending_counts()`` call (a single ``get_many``
+with the cache buffer).
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+from .models import BlogPost, CaseStudy
+
+logger = logging.getLogger(__name__)
+
+MODELS_BY_KIND = {
+    'blogpost': BlogPost,
+    'casestudy': CaseStudy,
+}
+KIND_BY_MODEL = {model: kind for kind, model in MODELS_BY_KIND.items()}
+
+
+def get_flush_interval():
+    return getattr(settings, 'CONTENT_VIEW_FLUSH_INTERVAL', 30)
+
+
+class MemoryViewBuffer:
+    """Per-process counter split into shards to keep lock contention low."""
+
+    def __init__(self, shards=16):
+        self.shards = [(threading.Lock(), Counter()) for _ in range(shards)]
+
+    def _shard(self, kind, pk):
+        return self.shards[hash((kind, pk)) % len(self.shards)]
+
+    def add(self, kind, pk, count=1):
+        lock, counts = self._shard(kind, pk)
+        with lock:
+            counts[(kind, pk)] += count
+
+    def pending(self, kind, pk):
+        lock, counts = self._shard(kind, pk)
+        with lock:
+            return counts.get((kind, pk), 0)
+
+    def pending_many(self, kind, pks):
+        return {pk: self.pending(kind, pk) for pk in pks}
+
+    def drain(self):
+        drained = Counter()
+        for lock, counts in self.shards:
+            with lock:
+                drained.update(counts)
+                counts.clear()
+        return drained
+
+    def restore(self, counts):
+        for (kind, pk), count in counts.items():
+            self.add(kind, pk, count)
+
+
+class CacheViewBuffer:
+    """
+    Shared-cache counters bucketed by flush-window epoch.
+
+    Writers only touch the current epoch. ``drain`` collects epochs at
+    least two windows old, so a worker that read the clock just before a
+    boundary has finished writing by the time its epoch is flushed.
+    """
+
+    prefix = 'content:views'
+    max_open_epochs = 10
+
+    def __init__(self, window=None, timeout=None):
+        self.window = window or get_flush_interval()
+        self.timeout = timeout or getattr(settings, 'CONTENT_VIEW_CACHE_TIMEOUT', 86400)
+
+    def _epoch(self):
+        return int(time.time() // self.window)
+
+    def _count_key(self, epoch, kind, pk):
+        return f'{self.prefix}:{epoch}:{kind}:{pk}'
+
+    def _slot_key(self, epoch, seq):
+        return f'{self.prefix}:{epoch}:slot:{seq}'
+
+    def _seq_key(self, epoch):
+        return f'{self.prefix}:{epoch}:seq'
+
+    def _flushed_key(self):
+        return f'{self.prefix}:flushed'
+
+    def _incr(self, key, count):
+        cache.add(key, 0, self.timeout)
+        try:
+            return cache.incr(key, count)
+        except ValueError:
+            # Evicted between add and incr.
+            cache.add(key, 0, self.timeout)
+            return cache.incr(key, count)
+
+    def add(self, kind, pk, count=1):
+        epoch = self._epoch()
+        key = self._count_key(epoch, kind, pk)
+        if cache.add(key, count, self.timeout):
+            # First view of this object in the epoch: register it so the
+            # flusher can find the key without scanning the cache.
+            seq = self._incr(self._seq_key(epoch), 1)
+            cache.set(self._slot_key(epoch, seq), (kind, pk), self.timeout)
+        else:
+            self._incr(key, count)
+
+    def _open_epochs(self):
+        current = self._epoch()
+        flushed = cache.get(self._flushed_key())
+        first = current - self.max_open_epochs
+        if flushed is not None:
+            first = max(first, flushed + 1)
+        return range(first, current + 1)
+
+    def pending(self, kind, pk):
+        return self.pending_many(kind, [pk])[pk]
+
+    def pending_many(self, kind, pks):
+        keys = {
+            self._count_key(epoch, kind, pk): pk
+            for epoch in self._open_epochs() for pk in pks
+        }
+        pending = dict.fromkeys(pks, 0)
+        for key, count in cache.get_many(list(keys)).items():
+            pending[keys[key]] += count
+        return pending
+
+    def drain(self):
+        lock_key = f'{self.prefix}:flush-lock'
+        if not cache.add(lock_key, 1, self.window):
+            return Counter()
+        try:
+            drained = Counter()
+            last_closed = self._epoch() - 2
+            flushed = cache.get(self._flushed_key())
+            if flushed is None:
+                flushed = last_closed - self.timeout // self.window - 1
+            closed = range(flushed + 1, last_closed + 1)
+            seqs = cache.get_many([self._seq_key(epoch) for epoch in closed])
+            for epoch in closed:
+                seq = seqs.get(self._seq_key(epoch), 0)
+                if not seq:
+                    continue
+                slot_keys = [self._slot_key(epoch, n) for n in range(1, seq + 1)]
+                objects = list(cache.get_many(slot_keys).values())
+                count_keys = [self._count_key(epoch, kind, pk) for kind, pk in objects]
+                counts = cache.get_many(count_keys)
+                for (kind, pk), key in zip(objects, count_keys):
+                    if counts.get(key):
+                        drained[(kind, pk)] += counts[key]
+                cache.delete_many(count_keys + slot_keys + [self._seq_key(epoch)])
+            if closed:
+                cache.set(self._flushed_key(), last_closed, None)
+            return drained
+        finally:
+            cache.delete(lock_key)
+
+    def restore(self, counts):
+        for (kind, pk), count in counts.items():
+            self.add(kind, pk, count)
+
+
+BUFFERS = {
+    'memory': MemoryViewBuffer,
+    'cache': CacheViewBuffer,
+}
+
+_buffer = None
+_buffer_lock = threading.Lock()
+_flusher = None
+
+
+def get_buffer():
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                name = getattr(settings, 'CONTENT_VIEW_BUFFER', 'memory')
+                _buffer = BUFFERS[name]()
+    return _buffer
+
+
+def reset_buffer():
+    """Drop the buffer so the next call re-reads settings (used by tests)."""
+    global _buffer
+    with _buffer_lock:
+        _buffer = None
+
+
+def record_view(instance, count=1):
+    """Buffer a view of ``instance``; the database is updated on flush."""
+    get_buffer().add(KIND_BY_MODEL[type(instance)], instance.pk, count)
+    _ensure_flusher()
+
+
+def pending_views(instance):
+    """Views of ``instance`` recorded but not yet flushed."""
+    return pending_count(type(instance), instance.pk)
+
+
+def pending_count(model, pk):
+    """Views of the ``model`` row ``pk`` recorded but not yet flushed."""
+    return get_buffer().pending(KIND_BY_MODEL[model], pk)
+
+
+def pending_counts(model, pks):
+    """``{pk: views recorded but not yet flushed}`` for ``model`` rows ``pks``."""
+    pks = list(dict.fromkeys(pks))
+    if not pks:
+        return {}
+    return get_buffer().pending_many(KIND_BY_MODEL[model], pks)
+
+
+def flush_views():
+    """
+    Apply buffered counts with one ``F('views') + n`` update per distinct n.
+
+    Returns the number of views written. If the database write fails the
+    counts are put back into the buffer for the next flush.
+    """
+    buffer = get_buffer()
+    counts = buffer.drain()
+    if not counts:
+        return 0
+
+    groups = defaultdict(list)
+    for (kind, pk), count in counts.items():
+        groups[(kind, count)].append(pk)
+
+    try:
+        with transaction.atomic():
+            for (kind, count), pks in groups.items():
+                MODELS_BY_KIND[kind].objects.filter(pk__in=pks).update(
+                    views=F('views') + count
+                )
+    except Exception:
+        logger.exception('Failed to flush buffered view counts; will retry')
+        buffer.restore(counts)
+        return 0
+    return sum(counts.values())
+
+
+class ViewFlusher(threading.Thread):
+    """Daemon thread flushing the buffer every flush interval."""
+
+    def __init__(self, interval):
+        super().__init__(name='content-view-flusher', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                flush_views()
+            except Exception:
+                logger.exception('View flusher iteration failed')
+
+    def stop(self):
+        self.stopped.set()
+
+
+def _ensure_flusher():
+    global _flusher
+    if _flusher is not None or not getattr(settings, 'CONTENT_VIEW_AUTO_FLUSH', True):
+        return
+    with _buffer_lock:
+        if _flusher is None:
+            _flusher = ViewFlusher(get_flush_interval())
+            _flusher.start()
+            atexit.register(_shutdown)
+
+
+def _shutdown():
+    if _flusher is not None:
+        _flusher.stop()
+    try:
+        flush_views()
+    except Exception:
+        logger.exception('Final view flush failed')
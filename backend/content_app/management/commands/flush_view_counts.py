@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from content_app.counters import flush_views
+
+
+class Command(BaseCommand):
+    help = (
+        'Write buffered blog post and case study view counts to the database. '
+        'Only useful with CONTENT_VIEW_BUFFER=cache; the in-memory buffer is '
+        'flushed by each worker process.'
+    )
+
+    def handle(self, *args, **options):
+        written = flush_views()
+        self.stdout.write(self.style.SUCCESS(f'Flushed {written} views'))
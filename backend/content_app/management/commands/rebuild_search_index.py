@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from content_app.models import BlogPost, CaseStudy, SearchDocument
+from content_app.search import get_backend, index_instance
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for blog posts and case studies'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                backend.uninstall(cursor)
+                backend.install(cursor)
+            SearchDocument.objects.all().delete()
+
+            querysets = [
+                BlogPost.objects.prefetch_related('categories', 'tags'),
+                CaseStudy.objects.select_related('client', 'industry')
+                    .prefetch_related('categories', 'tags'),
+            ]
+            total = 0
+            for queryset in querysets:
+                for instance in queryset.iterator(chunk_size=500):
+                    index_instance(instance)
+                    total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} documents'))
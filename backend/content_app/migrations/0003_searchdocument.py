@@ -0,0 +1,43 @@
+# Generated by Django 4.2.23 on 2026-10-18 10:35
+
+from django.db import migrations, models
+
+
+def install_search_index(apps, schema_editor):
+    from content_app.search import get_backend
+    with schema_editor.connection.cursor() as cursor:
+        get_backend(schema_editor.connection.vendor).install(cursor)
+
+
+def uninstall_search_index(apps, schema_editor):
+    from content_app.search import get_backend
+    with schema_editor.connection.cursor() as cursor:
+        get_backend(schema_editor.connection.vendor).uninstall(cursor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_app', '0002_casestudy_allow_comments'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('blogpost', 'Blog Post'), ('casestudy', 'Case Study')], max_length=20)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('excerpt', models.TextField(blank=True)),
+                ('body', models.TextField(blank=True)),
+                ('keywords', models.TextField(blank=True, help_text='Tag and category names')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_search_document'),
+        ),
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
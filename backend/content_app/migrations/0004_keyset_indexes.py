@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_app', '0003_searchdocument'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(fields=['created_at', 'id'], name='content_app_created_37b589_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='casestudy',
+            index=models.Index(fields=['created_at', 'id'], name='content_app_created_8e863c_idx'),
+        ),
+    ]
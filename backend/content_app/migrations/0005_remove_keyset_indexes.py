@@ -0,0 +1,21 @@
+# Generated by Django 4.2.23 on 2026-10-18 13:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content_app', '0004_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='blogpost',
+            name='content_app_created_37b589_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='casestudy',
+            name='content_app_created_8e863c_idx',
+        ),
+    ]
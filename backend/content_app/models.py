@@ -124,9 +124,10 @@ class BlogPost(TimeStampedModel):
             self.published_at = timezone.now()
         super().save(*args, **kwargs)
 
-    def increment_views(self):
-        self.views += 1
-        self.save(update_fields=['views'])
+    def increment_views(self, count=1):
+        """Atomically add ``count`` views, bypassing the write-behind buffer."""
+        type(self).objects.filter(pk=self.pk).update(views=models.F('views') + count)
+        self.views += count
 
     def get_absolute_url(self):
         return reverse('blog-post-detail', kwargs={'slug': self.slug})
@@ -184,9 +185,10 @@ class CaseStudy(TimeStampedModel):
             self.published_at = timezone.now()
         super().save(*args, **kwargs)
 
-    def increment_views(self):
-        self.views += 1
-        self.save(update_fields=['views'])
+    def increment_views(self, count=1):
+        """Atomically add ``count`` views, bypassing the write-behind buffer."""
+        type(self).objects.filter(pk=self.pk).update(views=models.F('views') + count)
+        self.views += count
 
     def get_absolute_url(self):
         return reverse('case-study-detail', kwargs={'slug': self.slug})
@@ -208,4 +210,32 @@ class Comment(models.Model):
         ordering = ['-created_at']
 
     def __str__(self):
-        return f'Comment by {self.author.username} on {self.created_at}'
\ No newline at end of file
+        return f'Comment by {self.author.username} on {self.created_at}'
+
+class SearchDocument(models.Model):
+    """
+    Denormalized, HTML-stripped text of a blog post or case study.
+
+    Rows are maintained by ``content_app.signals`` and mirrored into the
+    database-specific full-text index managed by ``content_app.search``.
+    """
+    KIND_CHOICES = [
+        ('blogpost', 'Blog Post'),
+        ('casestudy', 'Case Study'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.PositiveBigIntegerField()
+    title = models.CharField(max_length=200)
+    excerpt = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    keywords = models.TextField(blank=True, help_text='Tag and category names')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id}'
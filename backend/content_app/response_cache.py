@@ -0,0 +1,191 @@
+"""
+Response cache for the public content endpoints.
+
+Cached entries are keyed by endpoint, full request URL and the current
+generation of every model the endpoint renders. ``content_app.signals``
+bumps a model's generation on save, delete and M2M change, so a write makes
+every dependent entry unreachable without having to enumerate keys; the
+stale entries simply expire.
+
+Staff users see drafts through ``get_queryset`` and always bypass the cache.
+Everyone else gets the same representation, so they share entries.
+
+Generations only reach every worker through a shared cache: with a
+per-process backend the response cache is off (see ``api.caching``).
+"""
+
+import functools
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from api import caching, metrics
+from api.conditional import ConditionalGetMixin
+
+KEY_PREFIX = 'content:resp'
+GENERATION_PREFIX = 'content:gen'
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+METRIC_RESULTS = {'hits': 'hit', 'misses': 'miss', 'bypassed': 'bypassed'}
+
+
+def _count(name, amount=1):
+    with _stats_lock:
+        _stats[name] += amount
+    if name == 'invalidations':
+        metrics.RESPONSE_CACHE_INVALIDATIONS.inc(amount=amount)
+    else:
+        metrics.RESPONSE_CACHE.inc(METRIC_RESULTS[name], amount=amount)
+
+
+def get_stats():
+    """Hit, miss, bypass and invalidation counts for this worker process."""
+    with _stats_lock:
+        stats = {name: _stats[name] for name in ('hits', 'misses', 'bypassed', 'invalidations')}
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def is_enabled():
+    return getattr(settings, 'CONTENT_RESPONSE_CACHE_ENABLED', True) and caching.is_shared()
+
+
+def get_timeout():
+    return getattr(settings, 'CONTENT_RESPONSE_CACHE_TIMEOUT', 300)
+
+
+def generation_key(model):
+    return f'{GENERATION_PREFIX}:{model._meta.label_lower}'
+
+
+def changed_at_key(model):
+    return f'{GENERATION_PREFIX}:{model._meta.label_lower}:changed'
+
+
+def _initial_generation():
+    # Seed from the clock so a generation evicted from the cache never
+    # comes back at a value an older entry was stored under.
+    return int(time.time() * 1000)
+
+
+def get_generations(models):
+    keys = [generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _initial_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def get_last_changed(models):
+    """When any of ``models`` was last written, as far as the cache knows."""
+    changed = cache.get_many([changed_at_key(model) for model in models])
+    return max(changed.values()) if changed else None
+
+
+def bump_generation(model, count=True):
+    """
+    Invalidate every cached response that depends on ``model``; ``count``
+    adds it to the invalidation stats.
+    """
+    key = generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_generation(), None)
+    cache.set(changed_at_key(model), time.time(), None)
+    if count:
+        _count('invalidations')
+
+
+def response_cache_key(view, request):
+    generations = get_generations(view.cache_dependencies)
+    url = hashlib.sha1(request.build_absolute_uri().encode()).hexdigest()
+    version = '-'.join(str(generation) for generation in generations)
+    return f'{KEY_PREFIX}:{view.basename}:{view.action}:{url}:{version}'
+
+
+def is_cacheable(request):
+    return is_enabled() and request.method == 'GET' and not request.user.is_staff
+
+
+def cache_response(view_method):
+    """
+    Serve a viewset GET action from the response cache.
+
+    The viewset must declare ``cache_dependencies``, the models whose
+    changes invalidate the action's output.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        if not is_cacheable(request):
+            _count('bypassed')
+            return view_method(self, request, *args, **kwargs)
+
+        key = response_cache_key(self, request)
+        data = cache.get(key)
+        if data is not None:
+            _count('hits')
+            return Response(data)
+
+        _count('misses')
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, get_timeout())
+        return response
+    return wrapper
+
+
+class CachedResponseMixin(ConditionalGetMixin):
+    """
+    Cache ``list`` and ``retrieve`` for anonymous and non-staff users.
+
+    Conditional GETs are validated from the cache generations instead of the
+    database, so a revalidation costs no queries at all. The ETag also
+    rotates every cache timeout, which is what lets scheduled posts appear
+    once their ``published_at`` passes.
+    """
+    cache_dependencies = ()
+
+    def get_validator_state(self):
+        if not is_cacheable(self.request):
+            return super().get_validator_state()
+        generations = get_generations(self.cache_dependencies)
+        window = int(time.time() // get_timeout())
+        changed = get_last_changed(self.cache_dependencies)
+        last_modified = datetime.fromtimestamp(changed, timezone.utc) if changed else None
+        return last_modified, [*generations, window]
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(request, self.cached_list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(request, self.cached_retrieve, *args, **kwargs)
+
+    # The cached handlers skip ConditionalGetMixin's own list/retrieve:
+    # validation has already happened by the time they run.
+
+    @cache_response
+    def cached_list(self, request, *args, **kwargs):
+        return super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+
+    @cache_response
+    def cached_retrieve(self, request, *args, **kwargs):
+        return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
@@ -0,0 +1,282 @@
+"""
+Full-text search for blog posts and case studies.
+
+Every post and case study has a ``SearchDocument`` row holding its
+HTML-stripped title, excerpt, body and tag/category names. The rows are
+mirrored into a database-specific index:
+
+- SQLite (dev/tests): an FTS5 virtual table ranked with ``bm25``.
+- PostgreSQL (production): a weighted ``tsvector`` column with a GIN index,
+  ranked with ``ts_rank``.
+
+Other databases fall back to ``icontains`` over the stripped text, which is
+still cheaper than scanning the raw CKEditor HTML.
+
+Title matches rank above excerpt and keyword matches, which rank above body
+matches. Searches are restricted to the caller's visible queryset inside
+the index query, so drafts never take up ``CONTENT_SEARCH_MAX_RESULTS``.
+"""
+
+import html
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, When
+from django.utils.html import strip_tags
+from django.utils.module_loading import import_string
+from rest_framework import filters
+
+from .models import BlogPost, CaseStudy, SearchDocument
+
+FTS_TABLE = 'content_app_searchdocument_fts'
+DOCUMENT_TABLE = SearchDocument._meta.db_table
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+KIND_BY_MODEL = {
+    BlogPost: 'blogpost',
+    CaseStudy: 'casestudy',
+}
+
+
+def html_to_text(value):
+    """Strip markup and collapse whitespace in CKEditor HTML."""
+    text = html.unescape(strip_tags(value or ''))
+    return ' '.join(text.split())
+
+
+def tokenize(query):
+    """Split a user query into safe search terms."""
+    return TOKEN_RE.findall(query or '')[:16]
+
+
+def candidates_sql(column, within):
+    """``(' AND <column> IN (<pks of within>)', params)``, or no condition without ``within``."""
+    if within is None:
+        return '', []
+    sql, params = within.order_by().values('pk').query.sql_with_params()
+    return f' AND {column} IN ({sql})', list(params)
+
+
+class BaseSearchBackend:
+    """Keeps the index in step with ``SearchDocument`` rows and queries it."""
+
+    def install(self, cursor):
+        """Create the backend's index structures (called from migrations)."""
+
+    def uninstall(self, cursor):
+        """Drop the backend's index structures (called from migrations)."""
+
+    def index(self, document):
+        """Add or refresh ``document`` in the index."""
+
+    def remove(self, document_id):
+        """Remove the document with primary key ``document_id``."""
+
+    def search(self, kind, query, limit, within=None):
+        """
+        Return object ids of ``kind`` matching ``query``, best first, among
+        the objects of the queryset ``within`` when given.
+        """
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    """FTS5 index keyed by ``SearchDocument`` primary key."""
+
+    # bm25 column weights for (title, excerpt, keywords, body)
+    WEIGHTS = (10.0, 4.0, 4.0, 1.0)
+
+    def install(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            'title, excerpt, keywords, body, '
+            "tokenize = 'porter unicode61 remove_diacritics 2')"
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def index(self, document):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, excerpt, keywords, body) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                [document.pk, document.title, document.excerpt,
+                 document.keywords, document.body],
+            )
+
+    def remove(self, document_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [document_id])
+
+    def search(self, kind, query, limit, within=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        restrict, restrict_params = candidates_sql('d.object_id', within)
+        # Quote every term so user input can't inject FTS5 syntax, and
+        # prefix-match the last one for search-as-you-type.
+        match = ' '.join(f'"{term}"' for term in terms) + '*'
+        rank = 'bm25({}, {})'.format(FTS_TABLE, ', '.join(map(str, self.WEIGHTS)))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT d.object_id FROM {FTS_TABLE} '
+                f'JOIN {DOCUMENT_TABLE} d ON d.id = {FTS_TABLE}.rowid '
+                f'WHERE {FTS_TABLE} MATCH %s AND d.kind = %s{restrict} '
+                f'ORDER BY {rank} LIMIT %s',
+                [match, kind, *restrict_params, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """Weighted ``tsvector`` column on the document table with a GIN index."""
+
+    def __init__(self):
+        self.config = getattr(settings, 'CONTENT_SEARCH_CONFIG', 'english')
+
+    def install(self, cursor):
+        cursor.execute(
+            f'ALTER TABLE {DOCUMENT_TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector'
+        )
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS content_app_searchdocument_vector_gin '
+            f'ON {DOCUMENT_TABLE} USING GIN (search_vector)'
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute('DROP INDEX IF EXISTS content_app_searchdocument_vector_gin')
+        cursor.execute(f'ALTER TABLE {DOCUMENT_TABLE} DROP COLUMN IF EXISTS search_vector')
+
+    def index(self, document):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {DOCUMENT_TABLE} SET search_vector = '
+                "setweight(to_tsvector(%s::regconfig, title), 'A') || "
+                "setweight(to_tsvector(%s::regconfig, excerpt), 'B') || "
+                "setweight(to_tsvector(%s::regconfig, keywords), 'B') || "
+                "setweight(to_tsvector(%s::regconfig, body), 'C') "
+                'WHERE id = %s',
+                [self.config] * 4 + [document.pk],
+            )
+
+    def search(self, kind, query, limit, within=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        tsquery = ' & '.join(terms) + ':*'
+        restrict, restrict_params = candidates_sql('object_id', within)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT object_id FROM {DOCUMENT_TABLE} '
+                f'WHERE kind = %s AND search_vector @@ to_tsquery(%s::regconfig, %s){restrict} '
+                'ORDER BY ts_rank(search_vector, to_tsquery(%s::regconfig, %s)) DESC '
+                'LIMIT %s',
+                [kind, self.config, tsquery, *restrict_params, self.config, tsquery, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """Fallback for databases without a native full-text index."""
+
+    def search(self, kind, query, limit, within=None):
+        terms = tokenize(query)
+        if not terms:
+            return []
+        documents = SearchDocument.objects.filter(kind=kind)
+        if within is not None:
+            documents = documents.filter(object_id__in=within.order_by().values('pk'))
+        for term in terms:
+            documents = documents.filter(
+                Q(title__icontains=term) | Q(excerpt__icontains=term)
+                | Q(keywords__icontains=term) | Q(body__icontains=term)
+            )
+        return list(documents.values_list('object_id', flat=True)[:limit])
+
+
+BACKENDS_BY_VENDOR = {
+    'sqlite': SQLiteFTS5Backend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(vendor=None):
+    """Return the configured backend, or the one matching the database."""
+    path = getattr(settings, 'CONTENT_SEARCH_BACKEND', '')
+    if path:
+        return import_string(path)()
+    backend_class = BACKENDS_BY_VENDOR.get(vendor or connection.vendor, SimpleSearchBackend)
+    return backend_class()
+
+
+def build_document_fields(instance):
+    """Extract the indexed text of a blog post or case study."""
+    keywords = [tag.name for tag in instance.tags.all()]
+    keywords += [category.name for category in instance.categories.all()]
+    if isinstance(instance, CaseStudy):
+        keywords.append(instance.client.name)
+        if instance.industry_id:
+            keywords.append(instance.industry.name)
+    return {
+        'title': instance.title,
+        'excerpt': html_to_text(instance.excerpt),
+        'body': html_to_text(instance.content),
+        'keywords': ' '.join(keywords),
+    }
+
+
+def index_instance(instance):
+    """Create or refresh the search document for ``instance``."""
+    document, _ = SearchDocument.objects.update_or_create(
+        kind=KIND_BY_MODEL[type(instance)],
+        object_id=instance.pk,
+        defaults=build_document_fields(instance),
+    )
+    get_backend().index(document)
+    return document
+
+
+def remove_instance(instance):
+    """Drop the search document for ``instance``."""
+    kind = KIND_BY_MODEL[type(instance)]
+    backend = get_backend()
+    for document_id in SearchDocument.objects.filter(
+        kind=kind, object_id=instance.pk
+    ).values_list('id', flat=True):
+        backend.remove(document_id)
+    SearchDocument.objects.filter(kind=kind, object_id=instance.pk).delete()
+
+
+def search_ids(model, query, limit=None, within=None):
+    """
+    Ids of ``model`` instances matching ``query``, best match first; only
+    those in the queryset ``within`` when given.
+    """
+    if limit is None:
+        limit = getattr(settings, 'CONTENT_SEARCH_MAX_RESULTS', 500)
+    return get_backend().search(KIND_BY_MODEL[model], query, limit, within)
+
+
+def filter_ranked(queryset, ids):
+    """Restrict ``queryset`` to ``ids`` and keep their ranked order."""
+    if not ids:
+        return queryset.none()
+    rank = Case(
+        *[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).order_by(rank)
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """``?search=`` filter that queries the full-text index instead of ILIKE."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '')
+        if not tokenize(query):
+            return queryset
+        return queryset.filter(pk__in=search_ids(queryset.model, query, within=queryset))
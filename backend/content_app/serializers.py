@@ -5,9 +5,69 @@ from .models import (
     Client, Comment
 )
 from django.utils import timezone
+from .comments import get_threads, get_threads_page_size
+from .counters import pending_counts, pending_views
 
 User = get_user_model()
 
+def approved_comment_count(obj):
+    """Use the list queryset's annotation when present, else count directly."""
+    count = getattr(obj, 'approved_comment_count', None)
+    if count is None:
+        count = obj.comments.filter(is_approved=True).count()
+    return count
+
+def first_comment_threads(obj):
+    """First page of cached comment threads, as served by the ``comments`` action."""
+    return get_threads(obj)[:get_threads_page_size()]
+
+class BufferedViewsField(serializers.IntegerField):
+    """
+    ``views`` including increments still waiting in the write-behind buffer.
+    Inside a ``many=True`` serializer the pending counts of the whole page
+    are read at once, on the first row.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, obj):
+        page = self.page_pending(type(obj))
+        if page is not None and obj.pk in page:
+            return obj.views + page[obj.pk]
+        return obj.views + pending_views(obj)
+
+    def page_pending(self, model):
+        """Pending counts of the list being rendered, or ``None`` outside one."""
+        page = getattr(self.parent, 'parent', None)
+        if not isinstance(page, serializers.ListSerializer) or page.instance is None:
+            return None
+        loaded = page.__dict__.setdefault('_pending_views', {})
+        if model not in loaded:
+            loaded[model] = pending_counts(model, [row.pk for row in page.instance])
+        return loaded[model]
+
+    def fast_path(self, prefix, model):
+        """Columns and row builder for ``api.fastpath``."""
+        views, pk = f'{prefix}views', f'{prefix}{model._meta.pk.attname}'
+        return (views, pk), PendingViews(model, views, pk)
+
+class PendingViews:
+    """``api.fastpath`` row builder reading a page's pending views in one call."""
+
+    def __init__(self, model, views, pk):
+        self.model = model
+        self.views = views
+        self.pk = pk
+
+    def load(self, rows, state):
+        state[self] = pending_counts(self.model, [row[self.pk] for row in rows])
+
+    def __call__(self, row, state):
+        return row[self.views] + state[self].get(row[self.pk], 0)
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -33,22 +93,45 @@ class ClientSerializer(serializers.ModelSerializer):
         model = Client
         fields = '__all__'
 
+class CommentAuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'first_name', 'last_name']
+        read_only_fields = fields
+
+class ThreadCommentSerializer(serializers.ModelSerializer):
+    """Flat comment representation assembled into threads by ``comments``."""
+    author = CommentAuthorSerializer(read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = [
+            'id', 'content', 'author', 'created_at', 'updated_at',
+            'parent_comment'
+        ]
+        read_only_fields = fields
+
 class CommentSerializer(serializers.ModelSerializer):
-    author = UserSerializer(read_only=True)
+    author = CommentAuthorSerializer(read_only=True)
     replies = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
         fields = [
             'id', 'content', 'author', 'created_at', 'updated_at',
-            'is_approved', 'parent_comment', 'replies'
+            'is_approved', 'parent_comment', 'blog_post', 'case_study',
+            'replies'
         ]
         read_only_fields = ['id', 'author', 'created_at', 'updated_at', 'is_approved']
 
     def get_replies(self, obj):
-        if obj.parent_comment is None:  # Only get replies for top-level comments
-            replies = Comment.objects.filter(parent_comment=obj, is_approved=True)
-            return CommentSerializer(replies, many=True).data
+        if obj.parent_comment_id is None:  # Only get replies for top-level comments
+            replies = getattr(obj, 'approved_replies', None)
+            if replies is None:
+                replies = Comment.objects.filter(
+                    parent_comment=obj, is_approved=True
+                ).select_related('author')
+            return ThreadCommentSerializer(replies, many=True).data
         return []
 
     def validate(self, data):
@@ -78,8 +161,9 @@ class BlogPostSerializer(serializers.ModelSerializer):
         write_only=True,
         many=True
     )
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
     comment_count = serializers.SerializerMethodField()
+    views = BufferedViewsField()
 
     class Meta:
         model = BlogPost
@@ -97,7 +181,10 @@ class BlogPostSerializer(serializers.ModelSerializer):
         ]
 
     def get_comment_count(self, obj):
-        return obj.comments.filter(is_approved=True).count()
+        return approved_comment_count(obj)
+
+    def get_comments(self, obj):
+        return first_comment_threads(obj)
 
     def validate(self, data):
         if data.get('is_published') and not data.get('published_at'):
@@ -131,8 +218,9 @@ class CaseStudySerializer(serializers.ModelSerializer):
         write_only=True,
         many=True
     )
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
     comment_count = serializers.SerializerMethodField()
+    views = BufferedViewsField()
 
     class Meta:
         model = CaseStudy
@@ -152,7 +240,10 @@ class CaseStudySerializer(serializers.ModelSerializer):
         ]
 
     def get_comment_count(self, obj):
-        return obj.comments.filter(is_approved=True).count()
+        return approved_comment_count(obj)
+
+    def get_comments(self, obj):
+        return first_comment_threads(obj)
 
     def validate(self, data):
         if data.get('is_published') and not data.get('published_at'):
@@ -164,6 +255,7 @@ class BlogPostListSerializer(serializers.ModelSerializer):
     categories = CategorySerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     comment_count = serializers.SerializerMethodField()
+    views = BufferedViewsField()
 
     class Meta:
         model = BlogPost
@@ -175,8 +267,11 @@ class BlogPostListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    # Built from the list queryset's annotation by api.fastpath.
+    fast_method_fields = {'comment_count': 'approved_comment_count'}
+
     def get_comment_count(self, obj):
-        return obj.comments.filter(is_approved=True).count()
+        return approved_comment_count(obj)
 
 class CaseStudyListSerializer(serializers.ModelSerializer):
     client = ClientSerializer(read_only=True)
@@ -184,6 +279,7 @@ class CaseStudyListSerializer(serializers.ModelSerializer):
     categories = CategorySerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
     comment_count = serializers.SerializerMethodField()
+    views = BufferedViewsField()
 
     class Meta:
         model = CaseStudy
@@ -195,5 +291,8 @@ class CaseStudyListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields
 
+    # Built from the list queryset's annotation by api.fastpath.
+    fast_method_fields = {'comment_count': 'approved_comment_count'}
+
     def get_comment_count(self, obj):
-        return obj.comments.filter(is_approved=True).count() 
\ No newline at end of file
+        return approved_comment_count(obj) 
\ No newline at end of file
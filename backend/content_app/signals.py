@@ -0,0 +1,123 @@
+"""
+Signal handlers keeping derived content data in sync with the models.
+"""
+
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .response_cache import bump_generation
+from .comments import invalidate_threads
+from .models import BlogPost, CaseStudy, Category, Client, Comment, Tag
+
+INDEXED_MODELS = (BlogPost, CaseStudy)
+
+# Saves that only touch these fields never change the indexed text.
+NON_INDEXED_FIELDS = frozenset({'views'})
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=CaseStudy)
+def index_content(sender, instance, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+    if update_fields and NON_INDEXED_FIELDS.issuperset(update_fields):
+        return
+    search.index_instance(instance)
+
+
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_delete, sender=CaseStudy)
+def unindex_content(sender, instance, **kwargs):
+    search.remove_instance(instance)
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+@receiver(m2m_changed, sender=BlogPost.categories.through)
+@receiver(m2m_changed, sender=CaseStudy.tags.through)
+@receiver(m2m_changed, sender=CaseStudy.categories.through)
+def reindex_content_relations(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # post_clear has no pk_set: remember which posts lose the keyword.
+        cleared = instance.__dict__.setdefault('_cleared_content', {})
+        cleared[sender] = list(sender.objects.filter(**{instance._meta.model_name: instance}).values_list(
+            f'{model._meta.model_name}_id', flat=True,
+        ))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        search.index_instance(instance)
+        return
+    # A tag or category gained/lost posts: reindex the affected side.
+    if action == 'post_clear':
+        pk_set = instance.__dict__.get('_cleared_content', {}).pop(sender, None)
+    if pk_set:
+        for obj in model.objects.filter(pk__in=pk_set):
+            search.index_instance(obj)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Client)
+def reindex_renamed_keyword(sender, instance, created=False, raw=False, **kwargs):
+    if created or raw:
+        return
+    if sender is Client:
+        related = [instance.case_studies.all()]
+    elif sender is Tag:
+        related = [instance.blog_posts.all(), instance.case_studies.all()]
+    else:
+        related = [
+            instance.blog_posts.all(),
+            instance.case_studies_categories.all(),
+            instance.case_studies_industry.all(),
+        ]
+    for queryset in related:
+        for obj in queryset:
+            search.index_instance(obj)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_threads(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    invalidate_threads(instance)
+
+
+
+def invalidate_responses(model):
+    # Bump now so this process stops serving stale entries, and again after
+    # commit so an entry repopulated from pre-commit data is discarded too.
+    # Only the committed bump counts as an invalidation.
+    bump_generation(model, count=False)
+    transaction.on_commit(lambda: bump_generation(model))
+
+
+@receiver(post_save, sender=BlogPost)
+@receiver(post_save, sender=CaseStudy)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Client)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=BlogPost)
+@receiver(post_delete, sender=CaseStudy)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Client)
+@receiver(post_delete, sender=Comment)
+def invalidate_cached_model(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_responses(sender)
+
+
+@receiver(m2m_changed, sender=BlogPost.tags.through)
+@receiver(m2m_changed, sender=BlogPost.categories.through)
+@receiver(m2m_changed, sender=CaseStudy.tags.through)
+@receiver(m2m_changed, sender=CaseStudy.categories.through)
+def invalidate_cached_relation(sender, instance, action, model, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_responses(type(instance))
+        invalidate_responses(model)
@@ -1,3 +1,590 @@
-from django.test import TestCase
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.serializers import ListSerializer
+from rest_framework.test import APIClient, APITestCase
+
+from . import comments, counters, response_cache
+from .models import BlogPost, CaseStudy, Category, Client, Comment, SearchDocument, Tag
+
+
+class ContentTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Security')
+        self.tag = Tag.objects.create(name='LLM')
+        self.acme = Client.objects.create(name='Acme', industry='Finance')
+
+    def create_post(self, index, **kwargs):
+        post = BlogPost.objects.create(
+            title=f'Post {index}',
+            content=f'<p>Body of post {index}</p>',
+            author=self.author,
+            is_published=True,
+            published_at=timezone.now() - timezone.timedelta(hours=1),
+            status='published',
+            **kwargs
+        )
+        post.categories.add(self.category)
+        post.tags.add(self.tag)
+        Comment.objects.create(
+            content='Nice', author=self.author, blog_post=post, is_approved=True
+        )
+        Comment.objects.create(
+            content='Pending', author=self.author, blog_post=post, is_approved=False
+        )
+        return post
+
+    def create_case_study(self, index, **kwargs):
+        study = CaseStudy.objects.create(
+            title=f'Study {index}',
+            content=f'<p>Body of study {index}</p>',
+            client=self.acme,
+            industry=self.category,
+            is_published=True,
+            published_at=timezone.now() - timezone.timedelta(hours=1),
+            status='published',
+            **kwargs
+        )
+        study.categories.add(self.category)
+        study.tags.add(self.tag)
+        Comment.objects.create(
+            content='Nice', author=self.author, case_study=study, is_approved=True
+        )
+        return study
+
+
+class ListQueryBudgetTests(ContentTestCase):
+    """
+    Query-count regression tests for the content list endpoints.
+
+    Each endpoint declares a budget; the test fails if a page costs more
+    queries than the budget, or if the cost grows with the page size.
+    """
+    QUERY_BUDGETS = {
+        'blogpost-list': 6,
+        'blogpost-featured': 5,
+        'blogpost-by-category': 6,
+        'casestudy-list': 4,
+        'casestudy-featured': 3,
+        'casestudy-by-industry': 4,
+    }
+
+    def endpoint_params(self, name):
+        if name == 'blogpost-by-category':
+            return {'category': self.category.slug}
+        if name == 'casestudy-by-industry':
+            return {'industry': self.category.slug}
+        return {}
+
+    def count_queries(self, name):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(name), self.endpoint_params(name))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_list_endpoints_stay_within_budget(self):
+        self.create_post(0, featured=True)
+        self.create_case_study(0, featured=True)
+        small = {name: self.count_queries(name) for name in self.QUERY_BUDGETS}
+
+        for index in range(1, 15):
+            self.create_post(index, featured=True)
+            self.create_case_study(index, featured=True)
+
+        for name, budget in self.QUERY_BUDGETS.items():
+            with self.subTest(endpoint=name):
+                large = self.count_queries(name)
+                self.assertLessEqual(large, budget)
+                self.assertEqual(large, small[name])
+
+    def test_lists_are_ordered_by_publication_date(self):
+        # Created first, published last: it leads the list.
+        post, newer_post = self.create_post(0), self.create_post(1)
+        study, newer_study = self.create_case_study(0), self.create_case_study(1)
+        BlogPost.objects.filter(pk=post.pk).update(published_at=timezone.now() - timezone.timedelta(minutes=1))
+        CaseStudy.objects.filter(pk=study.pk).update(published_at=timezone.now() - timezone.timedelta(minutes=1))
+        response = self.client.get(reverse('blogpost-list'))
+        self.assertEqual([row['id'] for row in response.data['results']], [post.pk, newer_post.pk])
+        response = self.client.get(reverse('casestudy-list'))
+        self.assertEqual([row['id'] for row in response.data['results']], [study.pk, newer_study.pk])
+
+    def test_comment_count_only_includes_approved(self):
+        self.create_post(0)
+        response = self.client.get(reverse('blogpost-list'))
+        self.assertEqual(response.data['results'][0]['comment_count'], 1)
+
+
+class FullTextSearchTests(ContentTestCase):
+    def test_index_strips_html_and_includes_keywords(self):
+        post = self.create_post(0)
+        document = SearchDocument.objects.get(kind='blogpost', object_id=post.pk)
+        self.assertEqual(document.body, 'Body of post 0')
+        self.assertIn('LLM', document.keywords)
+        self.assertIn('Security', document.keywords)
+
+    def test_title_matches_rank_above_body_matches(self):
+        body_match = self.create_post(0)
+        body_match.content = '<p>We discuss <strong>jailbreak</strong> attacks</p>'
+        body_match.save()
+        title_match = self.create_post(1)
+        title_match.title = 'Jailbreak defenses'
+        title_match.save()
+
+        response = self.client.get(reverse('blogpost-search'), {'q': 'jailbreak'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [row['id'] for row in response.data['results']]
+        self.assertEqual(ids, [title_match.pk, body_match.pk])
+
+    def test_markup_is_not_searchable(self):
+        self.create_post(0)
+        response = self.client.get(reverse('blogpost-search'), {'q': 'strong'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_m2m_changes_update_the_index(self):
+        study = self.create_case_study(0)
+        redteam = Tag.objects.create(name='Redteam')
+        study.tags.add(redteam)
+        response = self.client.get(reverse('casestudy-search'), {'q': 'redteam'})
+        self.assertEqual([row['id'] for row in response.data['results']], [study.pk])
+
+        study.tags.remove(redteam)
+        response = self.client.get(reverse('casestudy-search'), {'q': 'redteam'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_reverse_clear_updates_the_index(self):
+        post = self.create_post(0)
+        study = self.create_case_study(0)
+        self.tag.blog_posts.clear()
+        self.tag.case_studies.clear()
+        for kind, obj in (('blogpost', post), ('casestudy', study)):
+            self.assertNotIn('LLM', SearchDocument.objects.get(kind=kind, object_id=obj.pk).keywords)
+            self.assertIn('Security', SearchDocument.objects.get(kind=kind, object_id=obj.pk).keywords)
+
+    def test_search_param_on_list_uses_index(self):
+        self.create_post(0)
+        self.create_post(1)
+        response = self.client.get(reverse('blogpost-list'), {'search': 'post 1'})
+        self.assertEqual([row['title'] for row in response.data['results']], ['Post 1'])
+
+    def test_search_hides_unpublished_posts(self):
+        post = self.create_post(0)
+        post.is_published = False
+        post.save()
+        response = self.client.get(reverse('blogpost-search'), {'q': 'post'})
+        self.assertEqual(response.data['results'], [])
+
+    @override_settings(CONTENT_SEARCH_MAX_RESULTS=2)
+    def test_drafts_do_not_use_up_the_result_cap(self):
+        for index in range(3):
+            draft = self.create_post(index)
+            draft.is_published = False
+            draft.save()
+        published = self.create_post(3)
+        response = self.client.get(reverse('blogpost-list'), {'search': 'post'})
+        self.assertEqual([row['id'] for row in response.data['results']], [published.pk])
+        response = self.client.get(reverse('blogpost-search'), {'q': 'post'})
+        self.assertEqual([row['id'] for row in response.data['results']], [published.pk])
+
+    def test_deleting_removes_document(self):
+        post = self.create_post(0)
+        post.delete()
+        self.assertFalse(SearchDocument.objects.filter(object_id=post.pk).exists())
+
+    def test_query_syntax_is_escaped(self):
+        self.create_post(0)
+        response = self.client.get(reverse('blogpost-search'), {'q': 'post" OR NEAR(*'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_search_requires_query(self):
+        response = self.client.get(reverse('blogpost-search'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(CONTENT_VIEW_AUTO_FLUSH=False)
+class BufferedViewCounterTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        counters.reset_buffer()
+        self.addCleanup(counters.reset_buffer)
+
+    def test_increment_is_buffered_until_flush(self):
+        post = self.create_post(0)
+        url = reverse('blogpost-increment-views', args=[post.pk])
+        self.client.force_authenticate(user=self.author)
+        for _ in range(3):
+            self.client.post(url)
+
+        post.refresh_from_db()
+        self.assertEqual(post.views, 0)
+        response = self.client.get(reverse('blogpost-detail', args=[post.pk]))
+        self.assertEqual(response.data['views'], 3)
+
+        self.assertEqual(counters.flush_views(), 3)
+        post.refresh_from_db()
+        self.assertEqual(post.views, 3)
+        response = self.client.get(reverse('blogpost-list'))
+        self.assertEqual(response.data['results'][0]['views'], 3)
+
+    def test_concurrent_increments_are_not_lost(self):
+        post = self.create_post(0)
+        study = self.create_case_study(0)
+
+        def hammer():
+            for _ in range(500):
+                counters.record_view(post)
+                counters.record_view(study, 2)
+
+        threads = [threading.Thread(target=hammer) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counters.flush_views()
+        post.refresh_from_db()
+        study.refresh_from_db()
+        self.assertEqual(post.views, 4000)
+        self.assertEqual(study.views, 8000)
+
+    @override_settings(CONTENT_VIEW_BUFFER='cache', CONTENT_VIEW_FLUSH_INTERVAL=60)
+    def test_cache_buffer_flushes_closed_epochs_only(self):
+        counters.reset_buffer()
+        post = self.create_post(0)
+        with mock.patch('content_app.counters.time.time', return_value=6000.0):
+            for _ in range(5):
+                counters.record_view(post)
+            self.assertEqual(counters.pending_views(post), 5)
+            # The epoch is still open for writers, so nothing is flushed yet.
+            self.assertEqual(counters.flush_views(), 0)
+
+        with mock.patch('content_app.counters.time.time', return_value=6000.0 + 120):
+            self.assertEqual(counters.flush_views(), 5)
+            self.assertEqual(counters.pending_views(post), 0)
+            self.assertEqual(counters.flush_views(), 0)
+
+        post.refresh_from_db()
+        self.assertEqual(post.views, 5)
+
+    @override_settings(CONTENT_VIEW_BUFFER='cache')
+    def test_pages_read_pending_views_in_one_call(self):
+        counters.reset_buffer()
+        posts = [self.create_post(index, featured=True) for index in range(5)]
+        for post in posts:
+            counters.record_view(post, post.pk)
+        buffer = counters.get_buffer()
+        for name in ('blogpost-list', 'blogpost-featured'):
+            with self.subTest(endpoint=name), \
+                    mock.patch.object(buffer, 'pending_many', wraps=buffer.pending_many) as pending_many, \
+                    mock.patch.object(buffer, 'pending', wraps=buffer.pending) as pending:
+                response = self.client.get(reverse(name))
+                rows = response.data['results'] if 'results' in response.data else response.data
+                self.assertEqual({row['id']: row['views'] for row in rows}, {post.pk: post.pk for post in posts})
+                self.assertEqual((pending_many.call_count, pending.call_count), (1, 0))
+
+    def test_failed_flush_keeps_counts(self):
+        post = self.create_post(0)
+        counters.record_view(post, 4)
+        with mock.patch.object(BlogPost.objects, 'filter', side_effect=RuntimeError), \
+                self.assertLogs('content_app.counters', 'ERROR'):
+            self.assertEqual(counters.flush_views(), 0)
+        self.assertEqual(counters.pending_views(post), 4)
+        self.assertEqual(counters.flush_views(), 4)
+
+
+class CommentThreadTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.staff = User.objects.create_user(
+            username='editor', password='testpass123', is_staff=True
+        )
+        self.post = self.create_post(0)
+        self.root = self.post.comments.get(is_approved=True)
+
+    def reply(self, parent, content='Reply', approved=True):
+        return Comment.objects.create(
+            content=content, author=self.author, blog_post=self.post,
+            parent_comment=parent, is_approved=approved
+        )
+
+    def get_threads(self, **params):
+        url = reverse('blogpost-comments', args=[self.post.pk])
+        return self.client.get(url, params).data
+
+    @override_settings(CACHE_SINGLE_PROCESS=True)
+    def test_threads_load_in_constant_queries_and_are_cached(self):
+        for index in range(5):
+            self.reply(self.reply(self.root, f'Reply {index}'))
+        url = reverse('blogpost-comments', args=[self.post.pk])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        # post lookup + comments
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(len(response.data['results'][0]['replies']), 5)
+
+        with override_settings(CONTENT_RESPONSE_CACHE_ENABLED=False), \
+                CaptureQueriesContext(connection) as ctx:
+            self.client.get(url)
+        # threads come from the per-post cache
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    @override_settings(
+        CACHE_SINGLE_PROCESS=False,
+        CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    )
+    def test_threads_are_not_cached_per_process(self):
+        self.assertEqual(self.get_threads()['count'], 1)
+        self.assertIsNone(cache.get(comments.thread_cache_key('blog_post', self.post.pk)))
+        # Spam marked by another worker, whose invalidation this one never sees.
+        Comment.objects.filter(pk=self.root.pk).update(is_spam=True)
+        self.assertEqual(self.get_threads()['count'], 0)
+
+    def test_reply_depth_is_capped(self):
+        parent = self.root
+        for depth in range(6):
+            parent = self.reply(parent, f'Depth {depth + 1}')
+        with override_settings(COMMENT_MAX_REPLY_DEPTH=2):
+            cache.clear()
+            thread = self.get_threads()['results'][0]
+        depth_one = thread['replies'][0]
+        self.assertEqual(depth_one['content'], 'Depth 1')
+        self.assertEqual(
+            [reply['content'] for reply in depth_one['replies']],
+            ['Depth 2', 'Depth 3', 'Depth 4', 'Depth 5', 'Depth 6']
+        )
+        self.assertTrue(all(not reply['replies'] for reply in depth_one['replies']))
+
+    def test_threads_are_paginated_by_top_level_comment(self):
+        for index in range(12):
+            Comment.objects.create(
+                content=f'Top {index}', author=self.author,
+                blog_post=self.post, is_approved=True
+            )
+        data = self.get_threads()
+        self.assertEqual(data['count'], 13)
+        self.assertEqual(len(data['results']), 10)
+        self.assertEqual(data['results'][0]['content'], 'Top 11')
+
+    def test_unapproved_replies_and_their_children_are_hidden(self):
+        pending = self.reply(self.root, 'Pending', approved=False)
+        self.reply(pending, 'Child of pending')
+        self.assertEqual(self.get_threads()['results'][0]['replies'], [])
+
+    def test_cache_invalidated_on_create_approve_and_spam(self):
+        self.assertEqual(self.get_threads()['count'], 1)
+
+        self.client.force_authenticate(user=self.author)
+        response = self.client.post(reverse('comment-list'), {
+            'content': 'New', 'blog_post': self.post.pk
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        new_id = response.data['id']
+        self.assertEqual(self.get_threads()['count'], 1)
+
+        self.client.force_authenticate(user=self.staff)
+        self.client.post(reverse('comment-approve', args=[new_id]))
+        self.assertEqual(self.get_threads()['count'], 2)
+
+        self.client.post(reverse('comment-mark-spam', args=[new_id]))
+        self.assertEqual(self.get_threads()['count'], 1)
+
+    def test_detail_embeds_first_page_of_threads(self):
+        self.reply(self.root)
+        response = self.client.get(reverse('blogpost-detail', args=[self.post.pk]))
+        self.assertEqual(len(response.data['comments']), 1)
+        self.assertEqual(len(response.data['comments'][0]['replies']), 1)
+        self.assertNotIn('password', response.data['comments'][0]['author'])
+
+
+@override_settings(CACHE_SINGLE_PROCESS=True)
+class ResponseCacheTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        response_cache.reset_stats()
+        self.post = self.create_post(0)
+        self.url = reverse('blogpost-list')
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), response
+
+    def test_second_read_is_served_from_cache(self):
+        queries, first = self.count_queries(self.url)
+        self.assertGreater(queries, 0)
+        queries, second = self.count_queries(self.url)
+        self.assertEqual(queries, 0)
+        self.assertEqual(first.data, second.data)
+        stats = response_cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_query_params_are_part_of_the_key(self):
+        self.count_queries(self.url)
+        queries, response = self.count_queries(self.url, ordering='views')
+        self.assertGreater(queries, 0)
+
+    def test_writes_invalidate_dependent_endpoints(self):
+        self.count_queries(self.url)
+        self.post.title = 'Renamed'
+        self.post.save()
+        queries, response = self.count_queries(self.url)
+        self.assertGreater(queries, 0)
+        self.assertEqual(response.data['results'][0]['title'], 'Renamed')
+
+    def test_related_model_and_m2m_changes_invalidate(self):
+        self.count_queries(self.url)
+        self.tag.name = 'Large Language Models'
+        self.tag.save()
+        _, response = self.count_queries(self.url)
+        self.assertEqual(response.data['results'][0]['tags'][0]['name'], 'Large Language Models')
+
+        self.post.tags.clear()
+        _, response = self.count_queries(self.url)
+        self.assertEqual(response.data['results'][0]['tags'], [])
+
+        Comment.objects.create(
+            content='Another', author=self.author, blog_post=self.post, is_approved=True
+        )
+        _, response = self.count_queries(self.url)
+        self.assertEqual(response.data['results'][0]['comment_count'], 2)
+
+    def test_unrelated_writes_keep_entries(self):
+        self.count_queries(self.url)
+        self.acme.name = 'Acme Corp'
+        self.acme.save()
+        queries, _ = self.count_queries(self.url)
+        self.assertEqual(queries, 0)
+
+    def test_staff_bypass_cache(self):
+        staff = User.objects.create_user(username='editor', password='x', is_staff=True)
+        draft = BlogPost.objects.create(title='Draft', content='<p>Draft</p>', author=self.author)
+        self.count_queries(self.url)
+        self.client.force_authenticate(user=staff)
+        _, response = self.count_queries(self.url)
+        self.assertIn(draft.pk, [row['id'] for row in response.data['results']])
+        self.assertEqual(response_cache.get_stats()['bypassed'], 1)
+
+    def test_each_write_counts_one_invalidation(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.acme.name = 'Acme Corp'
+            self.acme.save()
+        self.assertEqual(response_cache.get_stats()['invalidations'], 1)
+
+    @override_settings(CACHE_SINGLE_PROCESS=False)
+    def test_off_with_a_per_process_cache(self):
+        # Other workers would never see this process's generation bumps.
+        self.count_queries(self.url)
+        queries, _ = self.count_queries(self.url)
+        self.assertGreater(queries, 0)
+        self.assertEqual(response_cache.get_stats()['bypassed'], 2)
+
+    def test_stats_endpoint_is_staff_only(self):
+        url = reverse('content-cache-stats')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+        staff = User.objects.create_user(username='editor', password='x', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('invalidations', response.data)
+
+
+@override_settings(CACHE_SINGLE_PROCESS=True)
+class ContentConditionalGetTests(ContentTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = self.create_post(0)
+
+    def test_revalidation_costs_no_queries(self):
+        url = reverse('blogpost-list')
+        etag = self.client.get(url)['ETag']
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_related_change_invalidates_etag(self):
+        url = reverse('blogpost-detail', args=[self.post.pk])
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        self.tag.name = 'Renamed'
+        self.tag.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tags'][0]['name'], 'Renamed')
+
+    def test_staff_validators_come_from_database(self):
+        staff = User.objects.create_user(username='editor', password='x', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        url = reverse('blogpost-detail', args=[self.post.pk])
+        etag = self.client.get(url)['ETag']
+        self.post.title = 'Edited'
+        self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+@override_settings(CONTENT_RESPONSE_CACHE_ENABLED=False, CONTENT_VIEW_AUTO_FLUSH=False)
+class FastPathGoldenTests(ContentTestCase):
+    """The values() fast path must render byte-identical list responses."""
+
+    def setUp(self):
+        super().setUp()
+        counters.reset_buffer()
+        self.addCleanup(counters.reset_buffer)
+        self.author.groups.create(name='Editors')
+        second = Category.objects.create(name='Awareness', order=-1, image='categories/a.png')
+        other_tag = Tag.objects.create(name='Agents')
+        globex = Client.objects.create(name='Globex', logo='clients/logos/globex.png')
+        for index in range(4):
+            post = self.create_post(
+                index, featured=index % 2 == 0, cover_image=f'blog/covers/{index}.png' if index else '',
+                schema_markup={'@type': 'Article'},
+            )
+            post.categories.add(second)
+            post.tags.add(other_tag)
+            counters.record_view(post, index)
+            study = self.create_case_study(index, key_results={'saved': index})
+            study.client = self.acme if index % 2 else globex
+            study.industry = None if index == 3 else second
+            study.save()
+            study.categories.add(second)
+            counters.record_view(study, 2)
+
+    def assertSameBytes(self, url, params=None):
+        with override_settings(FAST_SERIALIZATION_ENABLED=False):
+            expected = self.client.get(url, params)
+        with mock.patch.object(ListSerializer, 'to_representation', side_effect=AssertionError):
+            actual = self.client.get(url, params)
+        self.assertEqual(actual.status_code, status.HTTP_200_OK)
+        self.assertEqual(actual.content, expected.content)
+        return actual
+
+    def test_list_output_is_identical(self):
+        for name in ('blogpost-list', 'casestudy-list'):
+            with self.subTest(endpoint=name):
+                with mock.patch.object(PageNumberPagination, 'page_size', 3):
+                    first = self.assertSameBytes(reverse(name))
+                    self.assertSameBytes(first.data['next'])
+                self.assertSameBytes(reverse(name), {'ordering': 'views'})
+
+        staff = User.objects.create_user(username='editor', password='x', is_staff=True)
+        self.client.force_authenticate(user=staff)
+        BlogPost.objects.create(title='Draft', content='<p>x</p>', author=self.author)
+        self.assertSameBytes(reverse('blogpost-list'))
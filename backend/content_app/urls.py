@@ -13,5 +13,6 @@ router.register(r'comments', views.CommentViewSet)
 
 # The API URLs are now determined automatically by the router
 urlpatterns = [
+    path('content-cache/stats/', views.ContentCacheStatsView.as_view(), name='content-cache-stats'),
     path('', include(router.urls)),
 ] 
\ No newline at end of file
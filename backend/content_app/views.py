@@ -1,8 +1,9 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Count, Prefetch, Q
 from django.utils import timezone
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -16,8 +17,13 @@ from .serializers import (
     BlogPostListSerializer, CaseStudyListSerializer
 )
 from .permissions import IsAdminOrReadOnly, IsAuthorOrReadOnly
+from .search import FullTextSearchFilter, filter_ranked, search_ids
+from .counters import record_view
+from .comments import CommentThreadPagination, get_threads
+from .response_cache import CachedResponseMixin, cache_response, get_stats
+from api.fastpath import FastListMixin
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Category.objects.filter(is_active=True)
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -26,16 +32,18 @@ class CategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'order']
     ordering = ['order', 'name']
+    cache_dependencies = (Category,)
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
+    cache_dependencies = (Tag,)
 
-class ClientViewSet(viewsets.ModelViewSet):
+class ClientViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Client.objects.filter(is_active=True)
     serializer_class = ClientSerializer
     permission_classes = [IsAdminOrReadOnly]
@@ -43,8 +51,85 @@ class ClientViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    cache_dependencies = (Client,)
 
-class BlogPostViewSet(viewsets.ModelViewSet):
+class ListQueryOptimizationMixin:
+    """
+    Load list-style actions with a fixed number of queries.
+
+    Viewsets declare which actions render the list serializer and which
+    relations it touches; those actions get ``select_related`` /
+    ``prefetch_related`` applied and ``approved_comment_count`` annotated
+    so the serializer never issues per-row queries.
+    """
+    list_actions = ('list',)
+    list_select_related = ()
+    list_prefetch_related = ()
+
+    def is_list_action(self):
+        return self.action in self.list_actions
+
+    def optimize_list_queryset(self, queryset):
+        if self.list_select_related:
+            queryset = queryset.select_related(*self.list_select_related)
+        if self.list_prefetch_related:
+            queryset = queryset.prefetch_related(*self.list_prefetch_related)
+        return queryset.annotate(
+            approved_comment_count=Count(
+                'comments', filter=Q(comments__is_approved=True), distinct=True
+            )
+        )
+
+class RankedSearchMixin:
+    """
+    ``search`` action returning full-text matches ordered by relevance.
+
+    Unlike ``?search=`` on the list endpoint, results keep the index's
+    ranking instead of the viewset's default ordering.
+    """
+
+    @swagger_auto_schema(
+        operation_description="Ranked full-text search",
+        manual_parameters=[
+            openapi.Parameter('q', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True)
+        ]
+    )
+    @action(detail=False, methods=['get'])
+    @cache_response
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response(
+                {'error': 'Search query "q" is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.get_queryset()
+        queryset = filter_ranked(queryset, search_ids(queryset.model, query, within=queryset))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer(queryset, many=True)
+        return Response(serializer.data)
+
+class CommentThreadsMixin:
+    """``comments`` action serving cached, paginated comment threads."""
+
+    @swagger_auto_schema(
+        operation_description="Approved comments grouped into threads, paginated by top-level comment"
+    )
+    @action(detail=True, methods=['get'])
+    @cache_response
+    def comments(self, request, pk=None):
+        target = self.get_object()
+        paginator = CommentThreadPagination()
+        page = paginator.paginate_queryset(get_threads(target), request, view=self)
+        return paginator.get_paginated_response(page)
+
+class BlogPostViewSet(
+    CachedResponseMixin, ListQueryOptimizationMixin, RankedSearchMixin,
+    CommentThreadsMixin, FastListMixin, viewsets.ModelViewSet
+):
     """
     ViewSet for managing blog posts.
     
@@ -53,13 +138,19 @@ class BlogPostViewSet(viewsets.ModelViewSet):
     """
     queryset = BlogPost.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'content', 'excerpt']
     ordering_fields = ['created_at', 'published_at', 'views']
     ordering = ['-published_at', '-created_at']
+    list_actions = ('list', 'featured', 'by_category', 'search')
+    list_select_related = ('author',)
+    cache_dependencies = (BlogPost, Category, Tag, Comment)
+    list_prefetch_related = (
+        'author__groups', 'author__user_permissions', 'categories', 'tags'
+    )
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.is_list_action():
             return BlogPostListSerializer
         return BlogPostSerializer
 
@@ -70,6 +161,8 @@ class BlogPostViewSet(viewsets.ModelViewSet):
                 Q(is_published=True) & 
                 Q(published_at__lte=timezone.now())
             )
+        if self.is_list_action():
+            queryset = self.optimize_list_queryset(queryset)
         return queryset
 
     @swagger_auto_schema(
@@ -85,16 +178,18 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         Increment the view count for a blog post.
         """
         blog_post = self.get_object()
-        blog_post.increment_views()
+        record_view(blog_post)
         return Response({'status': 'views incremented'})
 
     @action(detail=False, methods=['get'])
+    @cache_response
     def featured(self, request):
         featured_posts = self.get_queryset().filter(featured=True)
         serializer = self.get_serializer(featured_posts, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cache_response
     def by_category(self, request):
         category_slug = request.query_params.get('category')
         if not category_slug:
@@ -108,16 +203,23 @@ class BlogPostViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(posts, many=True)
         return Response(serializer.data)
 
-class CaseStudyViewSet(viewsets.ModelViewSet):
+class CaseStudyViewSet(
+    CachedResponseMixin, ListQueryOptimizationMixin, RankedSearchMixin,
+    CommentThreadsMixin, FastListMixin, viewsets.ModelViewSet
+):
     queryset = CaseStudy.objects.all()
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'content', 'excerpt']
     ordering_fields = ['created_at', 'published_at', 'views']
     ordering = ['-published_at', '-created_at']
+    list_actions = ('list', 'featured', 'by_industry', 'search')
+    list_select_related = ('client', 'industry')
+    cache_dependencies = (CaseStudy, Client, Category, Tag, Comment)
+    list_prefetch_related = ('categories', 'tags')
 
     def get_serializer_class(self):
-        if self.action == 'list':
+        if self.is_list_action():
             return CaseStudyListSerializer
         return CaseStudySerializer
 
@@ -128,21 +230,25 @@ class CaseStudyViewSet(viewsets.ModelViewSet):
                 Q(is_published=True) & 
                 Q(published_at__lte=timezone.now())
             )
+        if self.is_list_action():
+            queryset = self.optimize_list_queryset(queryset)
         return queryset
 
     @action(detail=True, methods=['post'])
     def increment_views(self, request, pk=None):
         case_study = self.get_object()
-        case_study.increment_views()
+        record_view(case_study)
         return Response({'status': 'views incremented'})
 
     @action(detail=False, methods=['get'])
+    @cache_response
     def featured(self, request):
         featured_studies = self.get_queryset().filter(featured=True)
         serializer = self.get_serializer(featured_studies, many=True)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @cache_response
     def by_industry(self, request):
         industry_slug = request.query_params.get('industry')
         if not industry_slug:
@@ -162,7 +268,13 @@ class CommentViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related('author').prefetch_related(
+            Prefetch(
+                'replies',
+                queryset=Comment.objects.filter(is_approved=True).select_related('author'),
+                to_attr='approved_replies'
+            )
+        )
         if not self.request.user.is_staff:
             queryset = queryset.filter(is_approved=True)
         return queryset
@@ -199,4 +311,11 @@ class CommentViewSet(viewsets.ModelViewSet):
         comment.is_spam = True
         comment.is_approved = False
         comment.save()
-        return Response({'status': 'comment marked as spam'})
\ No newline at end of file
+        return Response({'status': 'comment marked as spam'})
+
+class ContentCacheStatsView(APIView):
+    """Response cache counters for this worker process (staff only)."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats())